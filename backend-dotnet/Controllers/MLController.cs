@@ -1,6 +1,7 @@
 using Backend.Models;
 using Backend.Services;
 using Microsoft.AspNetCore.Mvc;
+using Microsoft.AspNetCore.Mvc.ModelBinding;
 
 namespace Backend.Controllers
 {
@@ -15,9 +16,10 @@ namespace Backend.Controllers
         }
 
         [HttpPost("train")]
-        public async Task<ActionResult<TrainResponse>> Train()
+        public async Task<ActionResult<TrainResponse>> Train(
+            [FromBody(EmptyBodyBehavior = EmptyBodyBehavior.Allow)] TrainingRequest? request = null)
         {
-            var result = await _mlService.TrainAsync();
+            var result = await _mlService.TrainAsync(request);
             return Ok(result);
         }
     }
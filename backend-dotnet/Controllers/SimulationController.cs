@@ -1,6 +1,7 @@
 using Backend.Models;
 using Backend.Services;
 using Microsoft.AspNetCore.Mvc;
+using Microsoft.AspNetCore.Mvc.ModelBinding;
 
 namespace Backend.Controllers
 {
@@ -16,9 +17,10 @@ namespace Backend.Controllers
         }
 
         [HttpPost("start")]
-        public async Task<ActionResult<SimulationStartResponse>> StartSimulation()
+        public async Task<ActionResult<SimulationStartResponse>> StartSimulation(
+            [FromBody(EmptyBodyBehavior = EmptyBodyBehavior.Allow)] SimulationRequest? request = null)
         {
-            var result = await _simulationService.StartSimulationAsync();
+            var result = await _simulationService.StartSimulationAsync(request);
             return Ok(result);
         }
 
@@ -29,6 +31,34 @@ namespace Backend.Controllers
             return Ok(result);
         }
 
+        [HttpPost("sessions")]
+        public async Task<ActionResult<SimulationSession>> CreateSession([FromBody] SimulationRequest request)
+        {
+            var session = await _simulationService.CreateSessionAsync(request);
+            if (session == null)
+            {
+                return StatusCode(StatusCodes.Status502BadGateway, "ML service could not open a simulation session");
+            }
+            return Ok(session);
+        }
+
+        // Server-Sent Events passed through from the ML service: one event per scored batch of rows
+        [HttpGet("sessions/{sessionId}/events")]
+        public async Task StreamSession(string sessionId, CancellationToken cancellationToken)
+        {
+            using var upstream = await _simulationService.OpenSessionEventsAsync(sessionId, cancellationToken);
+            Response.StatusCode = (int)upstream.StatusCode;
+            if (!upstream.IsSuccessStatusCode)
+            {
+                return;
+            }
+            Response.ContentType = "text/event-stream";
+            Response.Headers.CacheControl = "no-cache";
+            await using var events = await upstream.Content.ReadAsStreamAsync(cancellationToken);
+            // CopyToAsync flushes per read, so each event reaches the client as soon as it arrives
+            await events.CopyToAsync(Response.Body, cancellationToken);
+        }
+
         [HttpGet("stats")]
         public async Task<ActionResult<SimulationStats>> GetStats()
         {
@@ -0,0 +1,33 @@
+namespace Backend.Models
+{
+    // Response of the ML service's /date-ranges/summary (exact counts from the dataset's date index)
+    public class DateRangeSummary
+    {
+        public bool WithinDataset { get; set; }
+        public DateTime? DatasetStart { get; set; }
+        public DateTime? DatasetEnd { get; set; }
+        public int TotalRecords { get; set; }
+        public List<PeriodCount> Periods { get; set; } = new List<PeriodCount>();
+        public List<DailyCount> DailyData { get; set; } = new List<DailyCount>();
+    }
+
+    public class PeriodCount
+    {
+        public string PeriodName { get; set; } = string.Empty;
+        public DateTime StartDate { get; set; }
+        public DateTime EndDate { get; set; }
+        public int DurationInDays { get; set; }
+        public int RecordCount { get; set; }
+        public int PassCount { get; set; }
+        public int FailCount { get; set; }
+    }
+
+    public class DailyCount
+    {
+        public string Date { get; set; } = string.Empty; // yyyy-MM-dd
+        public int Count { get; set; }
+        public int PassCount { get; set; }
+        public int FailCount { get; set; }
+        public string PeriodType { get; set; } = string.Empty;
+    }
+}
@@ -0,0 +1,11 @@
+namespace Backend.Models
+{
+    // Optional period whose processed rows the ML service replays; without it samples are generated
+    public class SimulationRequest
+    {
+        public DateTime? SimulationStart { get; set; }
+        public DateTime? SimulationEnd { get; set; }
+        public double? Rate { get; set; } // rows per second for streamed sessions; 0 = as fast as the client reads
+        public int? BatchSize { get; set; } // rows per streamed event
+    }
+}
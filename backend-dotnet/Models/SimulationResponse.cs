@@ -6,9 +6,10 @@ namespace Backend.Models
         public string SampleId { get; set; } = string.Empty;
         public string Prediction { get; set; } = string.Empty; // "Pass" or "Fail"
         public int Confidence { get; set; }
-        public double Temperature { get; set; }
-        public int Pressure { get; set; }
-        public double Humidity { get; set; }
+        // Null when a replayed dataset has no such reading
+        public double? Temperature { get; set; }
+        public double? Pressure { get; set; }
+        public double? Humidity { get; set; }
     }
 
     public class SimulationStartResponse
@@ -17,6 +18,22 @@ namespace Backend.Models
         public string Message { get; set; } = string.Empty;
     }
 
+    // A replay session on the ML service; its predictions stream from /api/simulation/sessions/{id}/events
+    public class SimulationSession
+    {
+        public string SessionId { get; set; } = string.Empty;
+        public string ModelId { get; set; } = string.Empty;
+        public string Status { get; set; } = string.Empty; // created | streaming | paused | completed | cancelled
+        public int TotalRows { get; set; }
+        public int BatchSize { get; set; }
+        public double Rate { get; set; }
+        public int Sent { get; set; }
+        public int PassCount { get; set; }
+        public int FailCount { get; set; }
+        public double AvgConfidence { get; set; }
+        public double? Accuracy { get; set; }
+    }
+
     public class SimulationStats
     {
         public int Total { get; set; }
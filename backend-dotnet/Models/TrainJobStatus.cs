@@ -0,0 +1,27 @@
+namespace Backend.Models
+{
+    public class TrainJobSubmitResponse
+    {
+        public bool Success { get; set; }
+        public string Message { get; set; } = string.Empty;
+        public string? JobId { get; set; }
+    }
+
+    public class TrainJobProgress
+    {
+        public int Iteration { get; set; }
+        public int TotalIterations { get; set; }
+        public double Loss { get; set; }
+        public double Accuracy { get; set; }
+    }
+
+    public class TrainJobStatus
+    {
+        public string JobId { get; set; } = string.Empty;
+        public string Status { get; set; } = string.Empty; // queued | running | succeeded | failed | cancelled
+        public bool CancelRequested { get; set; }
+        public TrainJobProgress? Progress { get; set; }
+        public string? Error { get; set; }
+        public TrainResponse? Result { get; set; }
+    }
+}
@@ -0,0 +1,11 @@
+namespace Backend.Models
+{
+    // Optional periods to train/evaluate on; without them the ML service trains on the whole dataset
+    public class TrainingRequest
+    {
+        public DateTime? TrainingStart { get; set; }
+        public DateTime? TrainingEnd { get; set; }
+        public DateTime? TestingStart { get; set; }
+        public DateTime? TestingEnd { get; set; }
+    }
+}
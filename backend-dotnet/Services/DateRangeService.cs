@@ -2,6 +2,7 @@ using Backend.Models;
 using CsvHelper;
 using CsvHelper.Configuration;
 using System.Globalization;
+using System.Net.Http.Json;
 
 namespace Backend.Services
 {
@@ -14,11 +15,16 @@ namespace Backend.Services
     {
         private readonly IConfiguration _configuration;
         private readonly string _dataDirectory;
+        private readonly HttpClient _http;
 
         public DateRangeService(IConfiguration configuration)
         {
             _configuration = configuration;
             _dataDirectory = configuration["DataDirectory"] ?? "data";
+            _http = new HttpClient
+            {
+                Timeout = TimeSpan.FromSeconds(configuration.GetValue("MLService:RequestTimeoutSeconds", 30))
+            };
         }
 
         public async Task<DateRangeResponse> ValidateDateRangesAsync(DateRangeRequest request)
@@ -45,8 +51,17 @@ namespace Backend.Services
                     return response;
                 }
 
-                // Count records in each period
+                // Exact counts from the ML service's date index; scan the CSV only if it is unavailable
+                var summary = await GetIndexedSummaryAsync(request);
+                if (summary != null)
+                {
+                    return BuildIndexedResponse(summary);
+                }
+
+                // Fallback without the index: split the CSV by period as well
                 await SplitCsvAndCallFeatureImportanceAsync(preprocessedFile, request);
+
+                // Count records in each period
                 var periods = await CountRecordsInPeriodsAsync(preprocessedFile, request);
                 response.Periods = periods;
 
@@ -96,6 +111,70 @@ namespace Backend.Services
             return (true, string.Empty);
         }
 
+        private async Task<DateRangeSummary?> GetIndexedSummaryAsync(DateRangeRequest request)
+        {
+            var mlUrl = _configuration["MLService:BaseUrl"] ?? "http://ml-service-python:8000";
+            try
+            {
+                var resp = await _http.PostAsJsonAsync($"{mlUrl}/date-ranges/summary", new
+                {
+                    training_start = request.TrainingStart,
+                    training_end = request.TrainingEnd,
+                    testing_start = request.TestingStart,
+                    testing_end = request.TestingEnd,
+                    simulation_start = request.SimulationStart,
+                    simulation_end = request.SimulationEnd,
+                    // The UI chart is fixed to January 2021
+                    daily_start = new DateTime(2021, 1, 1),
+                    daily_end = new DateTime(2021, 1, 31)
+                });
+                if (!resp.IsSuccessStatusCode)
+                {
+                    return null;
+                }
+                return await resp.Content.ReadFromJsonAsync<DateRangeSummary>();
+            }
+            catch (Exception)
+            {
+                return null;
+            }
+        }
+
+        private static DateRangeResponse BuildIndexedResponse(DateRangeSummary summary)
+        {
+            var response = new DateRangeResponse
+            {
+                Periods = summary.Periods.Select(p => new PeriodSummary
+                {
+                    PeriodName = p.PeriodName,
+                    StartDate = p.StartDate,
+                    EndDate = p.EndDate,
+                    DurationInDays = p.DurationInDays,
+                    RecordCount = p.RecordCount
+                }).ToList(),
+                DailyData = summary.DailyData.Select(d => new DailyData
+                {
+                    Date = d.Date,
+                    Day = DateTime.ParseExact(d.Date, "yyyy-MM-dd", CultureInfo.InvariantCulture).ToString("MMM d"),
+                    Volume = d.Count,
+                    PeriodType = d.Count > 0 ? d.PeriodType : string.Empty
+                }).ToList()
+            };
+
+            if (!summary.WithinDataset)
+            {
+                response.IsValid = false;
+                response.Message = summary.DatasetStart.HasValue && summary.DatasetEnd.HasValue
+                    ? $"Date ranges must be within dataset range: {summary.DatasetStart:yyyy-MM-dd} to {summary.DatasetEnd:yyyy-MM-dd}"
+                    : "The dataset has no timestamped records.";
+                return response;
+            }
+
+            response.IsValid = true;
+            response.Message = "Date ranges validated successfully!";
+            return response;
+        }
+
         private string? GetLatestPreprocessedFile()
         {
             var preprocessedDir = Path.Combine(_dataDirectory, "preprocessed");
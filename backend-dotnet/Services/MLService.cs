@@ -1,11 +1,12 @@
 using Backend.Models;
 using System.Net.Http.Json;
+using System.Text.Json;
 
 namespace Backend.Services
 {
     public interface IMLService
     {
-        Task<TrainResponse> TrainAsync();
+        Task<TrainResponse> TrainAsync(TrainingRequest? request = null);
     }
 
     public class MLService : IMLService
@@ -16,45 +17,97 @@ namespace Backend.Services
         public MLService(IConfiguration config)
         {
             _config = config;
-            _http = new HttpClient();
+            // Individual calls are short: training itself runs as a job on the ML service and is polled
+            _http = new HttpClient
+            {
+                Timeout = TimeSpan.FromSeconds(config.GetValue("MLService:RequestTimeoutSeconds", 30))
+            };
         }
 
-        public async Task<TrainResponse> TrainAsync()
+        public async Task<TrainResponse> TrainAsync(TrainingRequest? request = null)
         {
             var mlUrl = _config["MLService:BaseUrl"] ?? "http://ml-service-python:8000";
+            var trainingTimeout = TimeSpan.FromSeconds(_config.GetValue("MLService:TrainingTimeoutSeconds", 1800));
+            var pollInterval = TimeSpan.FromMilliseconds(_config.GetValue("MLService:JobPollIntervalMs", 1000));
             try
             {
-                var resp = await _http.PostAsync($"{mlUrl}/train-model", null);
+                // Only the training window's rows are read; a testing window replaces the random split
+                var resp = await _http.PostAsync($"{mlUrl}/train-jobs", request == null ? null : JsonContent.Create(new
+                {
+                    training_start = request.TrainingStart,
+                    training_end = request.TrainingEnd,
+                    testing_start = request.TestingStart,
+                    testing_end = request.TestingEnd
+                }));
                 if (!resp.IsSuccessStatusCode)
                 {
-                    return GetMockResponse("ML service returned non-success status");
+                    // e.g. 429 while the job queue is full, 404 without a dataset, 503 after a worker died
+                    return await GetErrorResponseAsync("Training could not be started", resp);
+                }
+
+                var job = await resp.Content.ReadFromJsonAsync<TrainJobSubmitResponse>();
+                if (string.IsNullOrEmpty(job?.JobId))
+                {
+                    return new TrainResponse { Success = false, Message = "Training could not be started: the ML service returned no job ID" };
+                }
+
+                var deadline = DateTime.UtcNow + trainingTimeout;
+                while (DateTime.UtcNow < deadline)
+                {
+                    await Task.Delay(pollInterval);
+                    var statusResp = await _http.GetAsync($"{mlUrl}/train-jobs/{job.JobId}");
+                    if (!statusResp.IsSuccessStatusCode)
+                    {
+                        return await GetErrorResponseAsync($"Training job {job.JobId} could not be polled", statusResp);
+                    }
+                    var status = await statusResp.Content.ReadFromJsonAsync<TrainJobStatus>();
+                    switch (status?.Status)
+                    {
+                        case "succeeded":
+                            return status.Result ?? new TrainResponse { Success = false, Message = "Training job finished without a result" };
+                        case "failed":
+                            return new TrainResponse { Success = false, Message = $"Training failed: {status.Error}" };
+                        case "cancelled":
+                            return new TrainResponse { Success = false, Message = "Training job was cancelled" };
+                    }
                 }
 
-                var json = await resp.Content.ReadFromJsonAsync<TrainResponse>();
-                return json ?? GetMockResponse("Empty response from ML service");
+                await _http.DeleteAsync($"{mlUrl}/train-jobs/{job.JobId}");
+                return new TrainResponse
+                {
+                    Success = false,
+                    Message = $"Training did not finish within {trainingTimeout.TotalSeconds:0} seconds and was cancelled"
+                };
             }
             catch (Exception ex)
             {
-                return GetMockResponse($"Error calling ML service: {ex.Message}");
+                return new TrainResponse { Success = false, Message = $"Error calling ML service: {ex.Message}" };
             }
         }
 
-        private TrainResponse GetMockResponse(string message)
+        private static async Task<TrainResponse> GetErrorResponseAsync(string action, HttpResponseMessage resp)
         {
-            return new TrainResponse
+            // FastAPI errors carry their reason in "detail"; anything else is passed through as is
+            var body = await resp.Content.ReadAsStringAsync();
+            var detail = body;
+            try
             {
-                Success = true,
-                Message = message,
-                Metrics = new TrainMetrics
+                using var document = JsonDocument.Parse(body);
+                if (document.RootElement.ValueKind == JsonValueKind.Object &&
+                    document.RootElement.TryGetProperty("detail", out var detailElement))
                 {
-                    Accuracy = 0.942,
-                    Precision = 0.928,
-                    Recall = 0.915,
-                    F1 = 0.921,
-                    AccCurve = new List<double> {0.62,0.68,0.74,0.79,0.82,0.85,0.87,0.89,0.90,0.91,0.92,0.925,0.93,0.935,0.94,0.941,0.942,0.942,0.942,0.942},
-                    LossCurve = new List<double> {1.2,1.05,0.9,0.78,0.69,0.62,0.56,0.51,0.47,0.44,0.41,0.39,0.37,0.35,0.34,0.33,0.32,0.315,0.31,0.305},
-                    Confusion = new Confusion { Tp = 920, Tn = 870, Fp = 60, Fn = 50 }
+                    detail = detailElement.ValueKind == JsonValueKind.String ? detailElement.GetString() ?? body : detailElement.GetRawText();
                 }
+            }
+            catch (JsonException)
+            {
+                // Not JSON: keep the raw body
+            }
+
+            return new TrainResponse
+            {
+                Success = false,
+                Message = $"{action}: ML service returned {(int)resp.StatusCode} ({resp.ReasonPhrase}): {detail}"
             };
         }
     }
@@ -5,9 +5,11 @@ namespace Backend.Services
 {
     public interface ISimulationService
     {
-        Task<SimulationStartResponse> StartSimulationAsync();
+        Task<SimulationStartResponse> StartSimulationAsync(SimulationRequest? request = null);
         Task<SimulationData?> GetNextPredictionAsync();
         Task<SimulationStats> GetSimulationStatsAsync();
+        Task<SimulationSession?> CreateSessionAsync(SimulationRequest request);
+        Task<HttpResponseMessage> OpenSessionEventsAsync(string sessionId, CancellationToken cancellationToken);
     }
 
     public class SimulationService : ISimulationService
@@ -24,12 +26,17 @@ namespace Backend.Services
             _http = new HttpClient();
         }
 
-        public async Task<SimulationStartResponse> StartSimulationAsync()
+        public async Task<SimulationStartResponse> StartSimulationAsync(SimulationRequest? request = null)
         {
             var mlUrl = _config["MLService:BaseUrl"] ?? "http://ml-service-python:8000";
             try
             {
-                var resp = await _http.PostAsync($"{mlUrl}/start-simulation", null);
+                // With a window the ML service replays that period's processed rows through the trained model
+                var resp = await _http.PostAsync($"{mlUrl}/start-simulation", request == null ? null : JsonContent.Create(new
+                {
+                    simulation_start = request.SimulationStart,
+                    simulation_end = request.SimulationEnd
+                }));
                 if (!resp.IsSuccessStatusCode)
                 {
                     return new SimulationStartResponse 
@@ -83,6 +90,31 @@ namespace Backend.Services
             return GetMockPrediction();
         }
 
+        public async Task<SimulationSession?> CreateSessionAsync(SimulationRequest request)
+        {
+            var mlUrl = _config["MLService:BaseUrl"] ?? "http://ml-service-python:8000";
+            var resp = await _http.PostAsJsonAsync($"{mlUrl}/simulations", new
+            {
+                simulation_start = request.SimulationStart,
+                simulation_end = request.SimulationEnd,
+                rate = request.Rate,
+                batch_size = request.BatchSize
+            });
+            if (!resp.IsSuccessStatusCode)
+            {
+                return null;
+            }
+            return await resp.Content.ReadFromJsonAsync<SimulationSession>();
+        }
+
+        public async Task<HttpResponseMessage> OpenSessionEventsAsync(string sessionId, CancellationToken cancellationToken)
+        {
+            var mlUrl = _config["MLService:BaseUrl"] ?? "http://ml-service-python:8000";
+            // Headers only: the body is the live event stream and is copied through as it arrives
+            return await _http.GetAsync($"{mlUrl}/simulations/{Uri.EscapeDataString(sessionId)}/events",
+                HttpCompletionOption.ResponseHeadersRead, cancellationToken);
+        }
+
         public async Task<SimulationStats> GetSimulationStatsAsync()
         {
             var total = _predictions.Count;
@@ -18,6 +18,7 @@ import { MlService, TrainResponse } from '../../services/ml.service';
       <div *ngIf="!trained && !loading" class="panel">
         <button class="primary" (click)="onTrain()">Train Model</button>
       </div>
+      <div *ngIf="errorMessage && !loading" class="error">{{ errorMessage }}</div>
 
       <!-- Loading state -->
       <div *ngIf="loading" class="panel loading">Training in progress...</div>
@@ -111,6 +112,7 @@ import { MlService, TrainResponse } from '../../services/ml.service';
     .primary { background:#3f51b5; color:#fff; border:0; border-radius:6px; padding:0.6rem 1rem; cursor:pointer; }
     .primary.outline { background:transparent; color:#3f51b5; border:1px solid #3f51b5; }
     .status { background:#e8f5e9; color:#2e7d32; border-left:4px solid #2e7d32; padding:0.5rem 0.75rem; border-radius:6px; margin: 1rem 0; font-weight:600; }
+    .error { background:#ffebee; color:#c62828; border-left:4px solid #c62828; padding:0.5rem 0.75rem; border-radius:6px; margin: 1rem 0; }
     .metrics-grid { display:grid; grid-template-columns: repeat(auto-fit, minmax(180px, 1fr)); gap: 0.75rem; }
     .metric-card { color:#fff; border-radius:12px; padding:1rem; text-align:center; }
     .metric-card .value { font-size:1.6rem; font-weight:700; }
@@ -138,14 +140,18 @@ export class ModelTrainingComponent {
   loading = false;
   trained = false;
   metrics: TrainResponse['metrics'] | null = null;
+  errorMessage = '';
 
   constructor(private ml: MlService, private router: Router) {}
 
   onTrain(): void {
     this.loading = true;
+    this.errorMessage = '';
     this.ml.train().subscribe(res => {
       this.loading = false;
-      if (res.success) {
+      if (!res.success) {
+        this.errorMessage = res.message;
+      } else {
         this.trained = true;
         this.metrics = res.metrics;
         // Use setTimeout to ensure DOM is ready
@@ -128,9 +128,9 @@ import { SimulationService, SimulationData, SimulationStats } from '../../servic
                   </span>
                 </td>
                 <td>{{ prediction.confidence }}%</td>
-                <td>{{ prediction.temperature }}°C</td>
-                <td>{{ prediction.pressure }} hPa</td>
-                <td>{{ prediction.humidity }}%</td>
+                <td>{{ prediction.temperature != null ? prediction.temperature + '°C' : '—' }}</td>
+                <td>{{ prediction.pressure != null ? prediction.pressure + ' hPa' : '—' }}</td>
+                <td>{{ prediction.humidity != null ? prediction.humidity + '%' : '—' }}</td>
               </tr>
             </tbody>
           </table>
@@ -8,9 +8,10 @@ export interface SimulationData {
   sampleId: string;
   prediction: 'Pass' | 'Fail';
   confidence: number;
-  temperature: number;
-  pressure: number;
-  humidity: number;
+  // null when a replayed dataset has no such reading
+  temperature: number | null;
+  pressure: number | null;
+  humidity: number | null;
 }
 
 export interface SimulationStats {
@@ -1,11 +1,35 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime
 import pandas as pd
 import numpy as np
-from typing import Optional
-from pydantic import BaseModel
+from typing import Dict, List, Optional, Union
+from pydantic import BaseModel, ConfigDict
 import os
+import asyncio
+import hashlib
+import json
+from concurrent.futures.process import BrokenProcessPool
+from app.services.batch_ingest import BatchIngestor, batch_name, create_batch_ingest_executor, resolve_batch_files
+from app.services.content_cache import DatasetCache, TrainingCache
+from app.services.date_index import DAILY_ROLLUP_FILE, DateIndex, naive_utc
+from app.services.ingest_executor import IngestBusy, IngestExecutor, IngestLimitExceeded
+from app.services.metrics import METRICS_CONTENT_TYPE, PREDICTED_ROWS, REGISTRY, MetricsMiddleware, timed
+from app.services.processed_store import ProcessedDataStore, file_sha256
+from app.services.profiling import SamplingProfiler
+from app.services.schema_inference import SCHEMA_INFERENCE, infer_schema, label_sum, read_csv
+from app.services.streaming_ingest import RunningSummary, StreamingCsvIngestor, copy_upload_to_disk, should_stream
+from app.services.micro_batcher import MicroBatcher
+from app.services.model_registry import ModelRegistry
+from app.services.serving import decode_feature_matrix, project_columns, require_features
+from app.services.shared_state import SharedStateStore
+from app.services.simulation import SessionBusy, SessionLimitExceeded, SimulationManager, SimulationSession
+from app.services.startup import StartupState, warm_imports
+from app.services.training import create_training_executor
+from app.services.training_jobs import JobLimitExceeded, TERMINAL_STATES, WORKER_EXITED, TrainingJobManager
+from app.services.timestamps import DEFAULT_FREQ, DEFAULT_START, add_synthetic_timestamp_column, synthetic_timestamp_at
 
 # Define schemas directly in main.py
 class DataSummary(BaseModel):
@@ -23,19 +47,54 @@ class FileUploadResponse(BaseModel):
     data_summary: Optional[DataSummary] = None
 
 class ProcessDataRequest(BaseModel):
-    file_path: str
+    file_path: str  # a CSV, or a directory / glob of CSVs ingested in parallel into one dataset
     add_synthetic_timestamps: bool = True
+    streaming: Optional[bool] = None  # None = decide by file size
+    append: bool = False  # add the rows to the latest processed dataset instead of replacing it
 
 class ProcessDataResponse(BaseModel):
     success: bool
     message: str
     data_summary: Optional[DataSummary] = None
     processed_file_path: Optional[str] = None
+    file_summaries: Optional[List[DataSummary]] = None  # batch ingests: one per file, in name order
 
 class HealthResponse(BaseModel):
     status: str
     timestamp: datetime
 
+class TrainModelRequest(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
+    model_type: str = "xgboost"  # "xgboost" or "lightgbm"
+    test_size: float = 0.2
+    n_estimators: int = 100
+    max_depth: int = 6
+    learning_rate: float = 0.1
+    n_jobs: Optional[int] = None  # None = all cores
+    tree_method: str = "hist"
+    early_stopping_rounds: Optional[int] = 10
+    # Feature selection on the processed dataset; None = service defaults (FEATURE_* env)
+    feature_selection: bool = True
+    max_missing_ratio: Optional[float] = None
+    min_variance: Optional[float] = None
+    top_k_features: Optional[int] = None
+    data_mode: Optional[str] = None  # "dense", "native" (NaN-aware, no imputation/scaling) or "sparse"; None = TRAINING_DATA_MODE
+    # Inclusive synthetic_timestamp windows; only the training window's rows are read. With a testing
+    # window the model is evaluated on that period instead of a random split of the training rows.
+    training_start: Optional[datetime] = None
+    training_end: Optional[datetime] = None
+    testing_start: Optional[datetime] = None
+    testing_end: Optional[datetime] = None
+
+class TuneModelRequest(TrainModelRequest):
+    """Hyperparameter search over n_estimators, max_depth and learning_rate; other fields as for training"""
+    strategy: str = "random"  # "random" (median-pruned trials) or "halving" (successive halving over rounds)
+    n_trials: Optional[int] = None  # None = TUNING_TRIALS
+    parallel_trials: Optional[int] = None  # None = TUNING_PARALLEL_TRIALS; cores are split evenly between them
+    seed: int = 42
+    search_space: Optional[Dict[str, List[float]]] = None  # e.g. {"max_depth": [3, 8]}; unset = SEARCH_SPACE
+
 class ModelMetadata(BaseModel):
     modelId: str
     version: str
@@ -60,58 +119,191 @@ class TrainResponse(BaseModel):
     message: str
     metrics: TrainMetrics
 
+class TrainJobSubmitResponse(BaseModel):
+    success: bool
+    message: str
+    jobId: Optional[str] = None
+
+class TrainJobProgress(BaseModel):
+    iteration: int
+    totalIterations: int
+    loss: float
+    accuracy: float
+
+class TuningTrial(BaseModel):
+    trial: int
+    params: Dict[str, Union[int, float]]
+    status: str  # completed | pruned | failed
+    score: Optional[float] = None  # best eval log loss (lower is better)
+    rounds: int
+    rung: Optional[int] = None  # successive-halving rung the row comes from
+    accuracy: Optional[float] = None
+    f1Score: Optional[float] = None
+    seconds: float
+
+class TuningJobStatus(BaseModel):
+    jobId: str
+    status: str  # queued | running | succeeded | failed | cancelled
+    submittedAt: str
+    startedAt: Optional[str] = None
+    finishedAt: Optional[str] = None
+    strategy: Optional[str] = None
+    trialsCompleted: int = 0
+    trialsTotal: Optional[int] = None
+    leaderboard: List[TuningTrial] = []
+    bestParams: Optional[Dict[str, Union[int, float]]] = None
+    computeTime: float = 0.0  # summed trial seconds
+    wallTime: Optional[float] = None  # search + final training
+    error: Optional[str] = None
+    result: Optional[TrainResponse] = None
+
+class TrainJobStatus(BaseModel):
+    jobId: str
+    status: str  # queued | running | succeeded | failed | cancelled
+    submittedAt: str
+    startedAt: Optional[str] = None
+    finishedAt: Optional[str] = None
+    cancelRequested: bool = False
+    progress: Optional[TrainJobProgress] = None
+    error: Optional[str] = None
+    result: Optional[TrainResponse] = None
+    cached: bool = False  # completed at submission from the training cache
+
+class PredictRequest(BaseModel):
+    values: Optional[List[Optional[float]]] = None  # model feature order
+    features: Optional[Dict[str, Optional[float]]] = None  # by column name, all of them; null = missing
+
+class PredictionResponse(BaseModel):
+    modelId: str
+    prediction: int
+    probability: float
+
+class BatchPredictionResponse(BaseModel):
+    success: bool
+    modelId: str
+    count: int
+    predictions: List[int]
+    probabilities: List[float]
+
+class ModelBackendRequest(BaseModel):
+    backend: str  # "standard" or "fused"
+
+class DateRangeQuery(BaseModel):
+    training_start: datetime
+    training_end: datetime
+    testing_start: datetime
+    testing_end: datetime
+    simulation_start: datetime
+    simulation_end: datetime
+    # Span of the daily series; defaults to the dataset's first..last day
+    daily_start: Optional[datetime] = None
+    daily_end: Optional[datetime] = None
+
+class PeriodCount(BaseModel):
+    periodName: str
+    startDate: datetime
+    endDate: datetime
+    durationInDays: int
+    recordCount: int
+    passCount: int
+    failCount: int
+
+class DailyCount(BaseModel):
+    date: str  # yyyy-MM-dd
+    count: int
+    passCount: int
+    failCount: int
+    periodType: str  # Training/Testing/Simulation/''
+
+class DateRangeSummaryResponse(BaseModel):
+    withinDataset: bool
+    datasetStart: Optional[datetime] = None
+    datasetEnd: Optional[datetime] = None
+    totalRecords: int
+    periods: List[PeriodCount]
+    dailyData: List[DailyCount]
+
 class SimulationData(BaseModel):
     time: str
     sampleId: str
     prediction: str  # "Pass" or "Fail"
     confidence: int
-    temperature: float
-    pressure: int
-    humidity: float
+    # Replays carry the dataset's readings, or None when it has no such column
+    temperature: Optional[float] = None
+    pressure: Optional[float] = None
+    humidity: Optional[float] = None
+
+class SimulationStartRequest(BaseModel):
+    # Replay the processed rows of this synthetic_timestamp window through the production model
+    simulation_start: Optional[datetime] = None
+    simulation_end: Optional[datetime] = None
 
 class SimulationStartResponse(BaseModel):
     success: bool
     message: str
 
+class SimulationSessionRequest(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
+    simulation_start: Optional[datetime] = None
+    simulation_end: Optional[datetime] = None
+    rate: Optional[float] = None  # rows per second; 0 = as fast as the client reads, None = SIMULATION_RATE
+    batch_size: Optional[int] = None  # rows per event; None = SIMULATION_BATCH_ROWS
+    model_id: Optional[str] = None  # None = production model
+
+class SimulationSessionStatus(BaseModel):
+    sessionId: str
+    modelId: str
+    status: str  # created | streaming | paused | completed | cancelled
+    window: List[Optional[str]]
+    totalRows: int
+    batchSize: int
+    rate: float
+    sent: int
+    passCount: int
+    failCount: int
+    avgConfidence: float
+    accuracy: Optional[float] = None  # against the replayed rows' labels
+
 # Data Processor Class
 class DataProcessor:
-    def __init__(self):
+    def __init__(self, timestamp_start=None, timestamp_freq: Optional[str] = None):
         self.data_directory = "data"
+        self.timestamp_start = timestamp_start if timestamp_start is not None else DEFAULT_START
+        self.timestamp_freq = timestamp_freq or DEFAULT_FREQ
         os.makedirs(self.data_directory, exist_ok=True)
+        self.processed_store = ProcessedDataStore(self.data_directory)
     
     def process_csv_file(self, file_path: str, add_synthetic_timestamps: bool = True):
         """Process CSV file and return DataFrame with metadata"""
         try:
-            df = pd.read_csv(file_path)
+            with timed("ingest_parse"):
+                df = read_csv(file_path, infer_schema(file_path))
             if 'Response' not in df.columns:
                 raise ValueError("CSV file must contain a 'Response' column")
             if add_synthetic_timestamps:
-                df = self._add_synthetic_timestamps(df)
-            metadata = self._calculate_metadata(df, file_path)
+                with timed("ingest_timestamps"):
+                    df = self._add_synthetic_timestamps(df)
+            with timed("ingest_metadata"):
+                metadata = self._calculate_metadata(df, file_path)
             return df, metadata
         except Exception as e:
             raise Exception(f"Error processing CSV file: {str(e)}")
     
-    def _add_synthetic_timestamps(self, df: pd.DataFrame):
-        timestamp_columns = [col for col in df.columns if 'timestamp' in col.lower() or 'time' in col.lower()]
-        if not timestamp_columns:
-            start_date = datetime(2021, 1, 1)
-            df['synthetic_timestamp'] = [start_date + pd.Timedelta(seconds=i) for i in range(len(df))]
-        else:
-            timestamp_col = timestamp_columns[0]
-            df['synthetic_timestamp'] = pd.to_datetime(df[timestamp_col], errors='coerce')
-            nat_mask = df['synthetic_timestamp'].isna()
-            if nat_mask.any():
-                start_date = datetime(2021, 1, 1)
-                synthetic_timestamps = [start_date + pd.Timedelta(seconds=i) for i in range(len(df))]
-                df.loc[nat_mask, 'synthetic_timestamp'] = [synthetic_timestamps[i] for i in range(len(df)) if nat_mask.iloc[i]]
-        return df
+    def process_csv_file_streaming(self, file_path: str, add_synthetic_timestamps: bool = True,
+                                   append_to: Optional[str] = None):
+        """Process CSV file in row chunks; returns (metadata, processed_file_path) with bounded memory.
+        With `append_to`, the rows are appended to that processed dataset instead."""
+        return StreamingCsvIngestor(self).ingest(file_path, add_synthetic_timestamps, append_to)
+    
+    def _add_synthetic_timestamps(self, df: pd.DataFrame, row_offset: int = 0):
+        return add_synthetic_timestamp_column(df, self.timestamp_start, self.timestamp_freq, row_offset)
     
     def _calculate_metadata(self, df: pd.DataFrame, file_path: str):
         total_records = len(df)
         total_columns = len(df.columns)
         if 'Response' in df.columns:
-            pass_count = df['Response'].sum() if df['Response'].dtype in ['int64', 'float64'] else 0
+            pass_count = label_sum(df['Response'])
             pass_rate = (pass_count / total_records * 100) if total_records > 0 else 0
         else:
             pass_rate = 0
@@ -119,9 +311,8 @@ class DataProcessor:
             earliest_timestamp = df['synthetic_timestamp'].min()
             latest_timestamp = df['synthetic_timestamp'].max()
         else:
-            start_date = datetime(2021, 1, 1)
-            earliest_timestamp = start_date
-            latest_timestamp = start_date + pd.Timedelta(seconds=total_records - 1)
+            earliest_timestamp = synthetic_timestamp_at(0, self.timestamp_start, self.timestamp_freq)
+            latest_timestamp = synthetic_timestamp_at(total_records - 1, self.timestamp_start, self.timestamp_freq)
         file_size = self._format_file_size(os.path.getsize(file_path))
         return {
             'file_name': os.path.basename(file_path),
@@ -144,11 +335,11 @@ class DataProcessor:
         return f"{size_bytes:.2f} {size_names[i]}"
     
     def save_processed_data(self, df: pd.DataFrame, original_file_path: str) -> str:
-        base_name = os.path.splitext(os.path.basename(original_file_path))[0]
-        processed_filename = f"{base_name}_processed.csv"
-        processed_file_path = os.path.join(self.data_directory, processed_filename)
-        df.to_csv(processed_file_path, index=False)
-        return processed_file_path
+        """Write the processed DataFrame to the columnar store; returns the dataset directory"""
+        with timed("ingest_save"):
+            summary = RunningSummary()
+            summary.update(df)
+            return self.processed_store.write(df, original_file_path, summary.to_dict())
 
 # Initialize FastAPI app
 app = FastAPI(title="IntelliInspect ML Service", version="1.0.0")
@@ -162,88 +353,697 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency for /metrics; slow requests are profiled when PROFILE_SLOW_REQUEST_MS is set
+request_profiler = SamplingProfiler()
+app.add_middleware(MetricsMiddleware, router=app.router, profiler=request_profiler)
+
 # Initialize services
 data_processor = DataProcessor()
+dataset_cache = DatasetCache(data_processor.processed_store)
+model_registry = ModelRegistry()
+training_cache = TrainingCache(model_registry)
+# Ingests run off the event loop, at most INGEST_MAX_CONCURRENT at a time across workers (429
+# beyond); dataset keys are locked in the processed root, so no two workers write one dataset
+ingest_executor = IngestExecutor(lock_directory=os.path.join(data_processor.processed_store.root, ".locks"))
+# Parses the files of a batch ingest in parallel (BATCH_INGEST_WORKERS processes)
+batch_ingest_executor = create_batch_ingest_executor()
+# A training worker that dies breaks its pool; the manager swaps in a new one from the factory
+training_jobs = TrainingJobManager(create_training_executor(), cache=training_cache,
+                                   executor_factory=create_training_executor)
+JOB_EVENTS_POLL_SECONDS = float(os.getenv("TRAINING_EVENTS_POLL_SECONDS", "0.5"))
+# One micro-batcher per served model version so a hot-swap never mixes feature layouts in a batch
+prediction_batchers: Dict[str, MicroBatcher] = {}
+
+def get_prediction_batcher(model_id: str) -> MicroBatcher:
+    batcher = prediction_batchers.get(model_id)
+    if batcher is None:
+        batcher = MicroBatcher(lambda X: predict_with_model(model_registry.load(model_id)[0], X))
+        prediction_batchers[model_id] = batcher
+    return batcher
+
+def predict_with_model(scorer, X: np.ndarray, source: str = "predict"):
+    """Timed model call; `source` tells /predict micro-batches from /predict-batch payloads"""
+    with timed("predict"):
+        predictions, probabilities = scorer.predict_batch(X)
+    PREDICTED_ROWS.inc(len(X), source=source)
+    return predictions, probabilities
 
-# Simulation state
-simulation_state = {
+def resolve_model(model_id: Optional[str] = None):
+    """(service, metadata) for an explicit version, or the production model"""
+    return model_registry.load(model_id) if model_id else model_registry.production()
+
+ALGORITHM_NAMES = {'xgboost': 'XGBoost', 'lightgbm': 'LightGBM'}
+
+# Loaded date indexes by dataset path, with the rollup mtime they were loaded at
+date_indexes: Dict[str, tuple] = {}
+
+def get_date_index(dataset_path: str) -> DateIndex:
+    index = data_processor.processed_store.date_index(dataset_path)
+    mtime = os.path.getmtime(os.path.join(dataset_path, DAILY_ROLLUP_FILE))
+    cached = date_indexes.get(dataset_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    date_indexes[dataset_path] = (mtime, index)
+    return index
+
+@app.on_event("shutdown")
+async def shutdown_executors():
+    for batcher in prediction_batchers.values():
+        await batcher.close()
+    training_jobs.executor.shutdown(wait=False, cancel_futures=True)
+    ingest_executor.shutdown(wait=False)
+    batch_ingest_executor.shutdown(wait=False, cancel_futures=True)
+
+# Background warm-up; heavy libraries are otherwise imported by the first request that needs them
+startup_state = StartupState()
+
+def warm_production_model() -> str:
+    """Load the production model into the cache and score one row, so the first prediction is warm"""
+    scorer, metadata = model_registry.production()
+    scorer.predict_batch(np.zeros((1, len(metadata['feature_columns']))))
+    return metadata['model_id']
+
+def warm_training_pool() -> str:
+    """Spawn a training worker and import the training libraries in it; readiness does not wait for it"""
+    training_jobs.executor.submit(warm_imports)
+    return "submitted"
+
+startup_state.add_step('imports', lambda: ", ".join(warm_imports()))
+startup_state.add_step('production_model', warm_production_model)
+startup_state.add_step('training_pool', warm_training_pool)
+
+@app.on_event("startup")
+async def start_warmup():
+    startup_state.start()
+
+# Replay simulations, one session per client; sessions live in the store shared by all workers
+shared_state = SharedStateStore()
+simulations = SimulationManager(shared_state, model_registry.load)
+
+def open_simulation(window: tuple, model_id: Optional[str] = None, batch_rows: Optional[int] = None,
+                    rate: Optional[float] = None) -> SimulationSession:
+    """New session replaying the processed rows of a time window through a model"""
+    dataset_path = data_processor.processed_store.latest_dataset()
+    if dataset_path is None:
+        raise LookupError("No processed dataset found. Please upload a dataset first.")
+    scorer, metadata = resolve_model(model_id)
+    total_rows = get_date_index(dataset_path).count(*window)['count']
+    return simulations.create(dataset_path, window, scorer, metadata, total_rows, batch_rows, rate)
+
+def build_simulation_status(stats: dict) -> SimulationSessionStatus:
+    return SimulationSessionStatus(sessionId=stats['session_id'], modelId=stats['model_id'], status=stats['status'],
+                                   window=stats['window'], totalRows=stats['total_rows'],
+                                   batchSize=stats['batch_rows'], rate=stats['rate'], sent=stats['sent'],
+                                   passCount=stats['pass'], failCount=stats['fail'],
+                                   avgConfidence=stats['avg_confidence'], accuracy=stats['accuracy'])
+
+# Legacy polling simulation (/start-simulation + /next-prediction): generated samples, or a
+# replay session when started with a window. Its state is shared by all workers
+MOCK_SIMULATION_SAMPLES = 20
+LEGACY_SIMULATION_KEY = "legacy_simulation"
+INITIAL_SIMULATION_STATE = {
     'current_sample': 0,
-    'max_samples': 20,
-    'is_running': False
+    'max_samples': MOCK_SIMULATION_SAMPLES,
+    'is_running': False,
+    'session_id': None
 }
 
+def ingest_csv(file_path: str, add_synthetic_timestamps: bool, streaming: Optional[bool], append: bool,
+               source_sha256: Optional[str] = None):
+    """Ingest a CSV on disk and return (metadata, processed_file_path).
+
+    Content already ingested with the same options is answered from its processed dataset
+    and cached summary; appends always ingest."""
+    if append:
+        return data_processor.process_csv_file_streaming(file_path, add_synthetic_timestamps,
+                                                         append_to=append_target())
+    key = DatasetCache.key(source_sha256 or file_sha256(file_path), add_synthetic_timestamps=add_synthetic_timestamps,
+                           timestamp_start=data_processor.timestamp_start,
+                           timestamp_freq=data_processor.timestamp_freq, schema_inference=SCHEMA_INFERENCE)
+    processed_file_path = dataset_cache.lookup(key)
+    if processed_file_path is not None:
+        file_size = data_processor._format_file_size(os.path.getsize(file_path))
+        metadata = RunningSummary.for_dataset(processed_file_path).to_metadata(
+            file_path, file_size, data_processor.timestamp_start, data_processor.timestamp_freq)
+        return metadata, processed_file_path
+    if should_stream(file_path, streaming):
+        metadata, processed_file_path = data_processor.process_csv_file_streaming(file_path, add_synthetic_timestamps)
+    else:
+        df, metadata = data_processor.process_csv_file(file_path, add_synthetic_timestamps)
+        processed_file_path = data_processor.save_processed_data(df, file_path)
+    dataset_cache.record(key, processed_file_path)
+    return metadata, processed_file_path
+
+def ingest_batch(source: str, files: List[str], add_synthetic_timestamps: bool, append: bool):
+    """Ingest a directory or glob of CSVs into one dataset ordered by timestamp and return
+    (metadata, per-file metadata, processed_file_path). Batches skip the dedup cache."""
+    global batch_ingest_executor
+    append_to = append_target() if append else None
+    try:
+        return BatchIngestor(data_processor, batch_ingest_executor).ingest(source, files, add_synthetic_timestamps,
+                                                                           append_to)
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory) and took the pool with it; later batches get a new one
+        batch_ingest_executor = create_batch_ingest_executor()
+        raise Exception("A batch ingest worker exited unexpectedly; retry with fewer BATCH_INGEST_WORKERS")
+
+def ingest_keys(file_path: str, append: bool) -> List[str]:
+    """The datasets an ingest writes: its own processed dataset, or the append target"""
+    if append:
+        return ["append"]
+    return [data_processor.processed_store.dataset_path(file_path)]
+
+def ingest_upload(source, file_path: str, streaming: Optional[bool], append: bool):
+    """Copy an upload to the data directory, hashing it on the way, and ingest it"""
+    digest = hashlib.sha256()
+    copy_upload_to_disk(source, file_path, digest=digest)
+    return ingest_csv(file_path, True, streaming, append, digest.hexdigest())
+
+def append_target() -> str:
+    """Appends go to the latest processed dataset (the one training and simulation use)"""
+    dataset_path = data_processor.processed_store.latest_dataset()
+    if dataset_path is None:
+        raise HTTPException(status_code=404, detail="No processed dataset to append to")
+    return dataset_path
+
+def service_metrics():
+    """Scrape-time view of the counters the services already keep (caches, queues, sessions)"""
+    model_cache = model_registry.cache_stats()
+    yield "model_cache_hits_total", "counter", "Model loads served from the LRU cache", [({}, model_cache['hits'])]
+    yield "model_cache_misses_total", "counter", "Model loads that deserialized from disk", \
+        [({}, model_cache['misses'])]
+    yield "model_cache_evictions_total", "counter", "Models evicted from the LRU cache", \
+        [({}, model_cache['evictions'])]
+    yield "model_cache_models", "gauge", "Models held in the LRU cache", [({}, len(model_cache['cached_models']))]
+    content_caches = {'datasets': dataset_cache.stats(), 'training': training_cache.stats()}
+    yield "content_cache_hits_total", "counter", "Ingest dedup and training memo cache hits", \
+        [({'cache': name}, stats['hits']) for name, stats in content_caches.items()]
+    yield "content_cache_misses_total", "counter", "Ingest dedup and training memo cache misses", \
+        [({'cache': name}, stats['misses']) for name, stats in content_caches.items()]
+    yield "content_cache_entries", "gauge", "Entries in the content caches", \
+        [({'cache': name}, stats['entries']) for name, stats in content_caches.items()]
+    yield "training_jobs_active", "gauge", "Training and tuning jobs queued or running", \
+        [({}, len(training_jobs.active_jobs()))]
+    yield "training_jobs_limit", "gauge", "Active job limit (TRAINING_MAX_ACTIVE_JOBS)", \
+        [({}, training_jobs.max_active_jobs)]
+    batchers = list(prediction_batchers.items())
+    yield "micro_batch_queue_depth", "gauge", "Rows waiting for a micro-batch window", \
+        [({'model_id': model_id}, batcher.queue_depth) for model_id, batcher in batchers]
+    yield "micro_batches_total", "counter", "Micro-batches scored", \
+        [({'model_id': model_id}, batcher.batches) for model_id, batcher in batchers]
+    yield "simulation_sessions", "gauge", "Tracked simulation sessions by status", \
+        [({'status': status}, count) for status, count in simulations.status_counts().items()]
+    yield "ingests_active", "gauge", "Ingests running on the ingest executor", [({}, ingest_executor.active)]
+    yield "ingests_limit", "gauge", "Concurrent ingest limit (INGEST_MAX_CONCURRENT)", \
+        [({}, ingest_executor.max_concurrent)]
+    yield "startup_ready", "gauge", "1 once the startup warm-up has finished", [({}, int(startup_state.ready))]
+
+REGISTRY.add_collector(service_metrics)
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition: request latency, hot-path stage timers, caches, queues and process memory"""
+    return Response(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/debug/profiles")
+async def list_profiles():
+    """Sampled profiles of recent slow requests (enable with PROFILE_SLOW_REQUEST_MS)"""
+    return {'enabled': request_profiler.enabled, 'thresholdMs': request_profiler.threshold_ms,
+            'profiles': request_profiler.list_profiles()}
+
+@app.get("/debug/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: str):
+    """Collapsed stacks of one profile; render with flamegraph.pl or speedscope"""
+    collapsed = request_profiler.collapsed(profile_id)
+    if collapsed is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(collapsed)
+
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
     return HealthResponse(status="Healthy", timestamp=datetime.utcnow())
 
+@app.get("/health/live", response_model=HealthResponse)
+async def liveness():
+    """The process is up and serving; never waits for warm-up"""
+    return HealthResponse(status="Alive", timestamp=datetime.utcnow())
+
+@app.get("/health/ready")
+async def readiness():
+    """503 while the startup warm-up runs, then 200; failed steps are listed but do not block readiness"""
+    state = startup_state.to_dict()
+    return JSONResponse(state, status_code=200 if state['ready'] else 503)
+
 @app.post("/process-data", response_model=ProcessDataResponse)
 async def process_data(request: ProcessDataRequest):
     try:
+        batch_files = resolve_batch_files(request.file_path)
+        if batch_files is not None:
+            if not batch_files:
+                raise HTTPException(status_code=404, detail="No CSV files found")
+            metadata, file_metadata, processed_file_path = await ingest_executor.run(
+                ingest_batch, request.file_path, batch_files, request.add_synthetic_timestamps, request.append,
+                keys=ingest_keys(batch_name(request.file_path), request.append))
+            return ProcessDataResponse(success=True, message=f"{len(batch_files)} files processed successfully",
+                                       data_summary=DataSummary(**metadata), processed_file_path=processed_file_path,
+                                       file_summaries=[DataSummary(**m) for m in file_metadata])
         if not os.path.exists(request.file_path):
             raise HTTPException(status_code=404, detail="File not found")
-        df, metadata = data_processor.process_csv_file(request.file_path, request.add_synthetic_timestamps)
-        processed_file_path = data_processor.save_processed_data(df, request.file_path)
+        metadata, processed_file_path = await ingest_executor.run(
+            ingest_csv, request.file_path, request.add_synthetic_timestamps, request.streaming, request.append,
+            keys=ingest_keys(request.file_path, request.append))
         data_summary = DataSummary(**metadata)
         return ProcessDataResponse(success=True, message="Data processed successfully", data_summary=data_summary, processed_file_path=processed_file_path)
+    except IngestLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except IngestBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         return ProcessDataResponse(success=False, message=f"Error processing data: {str(e)}")
 
 @app.post("/upload-file", response_model=FileUploadResponse)
-async def upload_file(file: UploadFile = File(...)):
+async def upload_file(file: UploadFile = File(...), streaming: Optional[bool] = Query(None),
+                      append: bool = Query(False)):
     try:
         if not file.filename.endswith('.csv'):
             raise HTTPException(status_code=400, detail="File must be a CSV file")
         file_path = os.path.join(data_processor.data_directory, file.filename)
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        df, metadata = data_processor.process_csv_file(file_path, add_synthetic_timestamps=True)
-        processed_file_path = data_processor.save_processed_data(df, file_path)
+        # The upload's own path is a key too: it is overwritten by the copy
+        metadata, _ = await ingest_executor.run(ingest_upload, file.file, file_path, streaming, append,
+                                                keys=ingest_keys(file_path, append) + [file_path])
         data_summary = DataSummary(**metadata)
         return FileUploadResponse(success=True, message="File uploaded and processed successfully", data_summary=data_summary)
+    except IngestLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except IngestBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         return FileUploadResponse(success=False, message=f"Error processing file: {str(e)}")
 
 @app.post('/train-model', response_model=TrainResponse)
-async def train_model():
-    # TODO: replace with actual training on latest preprocessed file
-    # Random results simulate real ML training variability
-    rng = np.random.default_rng()
-    acc_curve = list(np.clip(np.linspace(0.6, 0.95, 20) + rng.normal(0, 0.005, 20), 0.5, 0.99))
-    loss_curve = list(np.clip(np.linspace(1.0, 0.3, 20) + rng.normal(0, 0.01, 20), 0.2, 1.2))
-    confusion = { 'tp': int(rng.integers(800, 1000)), 'tn': int(rng.integers(800, 1000)), 'fp': int(rng.integers(20, 120)), 'fn': int(rng.integers(20, 120)) }
-    accuracy = (confusion['tp'] + confusion['tn']) / max(1, sum(confusion.values()))
-    precision = confusion['tp'] / max(1, (confusion['tp'] + confusion['fp']))
-    recall = confusion['tp'] / max(1, (confusion['tp'] + confusion['fn']))
-    f1 = 2*precision*recall / max(1e-9, (precision + recall))
-    # Generate model metadata
+async def train_model(request: Optional[TrainModelRequest] = None):
+    """Synchronous training: submits a job and waits for it. Prefer /train-jobs for long runs."""
+    job_id = submit_training_job(request or TrainModelRequest())
+    try:
+        result = await asyncio.wrap_future(training_jobs.future(job_id))
+    except BrokenProcessPool:
+        raise HTTPException(status_code=503, detail=f"Training failed: {WORKER_EXITED}")
+    if not result['success']:
+        raise HTTPException(status_code=422, detail=f"Training failed: {result['error']}")
+    return build_train_response(result)
+
+@app.post('/train-jobs', response_model=TrainJobSubmitResponse, status_code=202)
+async def submit_train_job(request: Optional[TrainModelRequest] = None):
+    job_id = submit_training_job(request or TrainModelRequest())
+    return TrainJobSubmitResponse(success=True, message="Training job queued", jobId=job_id)
+
+@app.get('/train-jobs/{job_id}', response_model=TrainJobStatus)
+async def get_train_job(job_id: str):
+    state = training_jobs.status(job_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Training job not found")
+    return build_job_status(state)
+
+@app.delete('/train-jobs/{job_id}', response_model=TrainJobStatus)
+async def cancel_train_job(job_id: str):
+    state = training_jobs.cancel(job_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Training job not found")
+    return build_job_status(state)
+
+@app.get('/train-jobs/{job_id}/events')
+async def stream_train_job(job_id: str):
+    """Server-Sent Events: one `status` event per observed change until the job finishes"""
+    if training_jobs.status(job_id) is None:
+        raise HTTPException(status_code=404, detail="Training job not found")
+
+    async def events():
+        last_payload = None
+        while True:
+            state = training_jobs.status(job_id)
+            payload = build_job_status(state).model_dump_json()
+            if payload != last_payload:
+                last_payload = payload
+                yield f"event: status\ndata: {payload}\n\n"
+            if state['status'] in TERMINAL_STATES:
+                break
+            await asyncio.sleep(JOB_EVENTS_POLL_SECONDS)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.post('/tuning-jobs', response_model=TrainJobSubmitResponse, status_code=202)
+async def submit_tuning_job(request: Optional[TuneModelRequest] = None):
+    """Queue a hyperparameter search; the best configuration is trained, registered and promoted"""
+    request = request or TuneModelRequest()
+    dataset_path = data_processor.processed_store.latest_dataset()
+    if dataset_path is None:
+        raise HTTPException(status_code=404, detail="No processed dataset found. Please upload a dataset first.")
+    try:
+        job_id = training_jobs.submit_tuning(dataset_path, request.model_dump(mode='json'))
+    except JobLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except BrokenProcessPool:
+        raise HTTPException(status_code=503, detail=WORKER_EXITED)
+    return TrainJobSubmitResponse(success=True, message="Tuning job queued", jobId=job_id)
+
+@app.get('/tuning-jobs/{job_id}', response_model=TuningJobStatus)
+async def get_tuning_job(job_id: str):
+    state = training_jobs.status(job_id)
+    if state is None or state.get('kind') != "tuning":
+        raise HTTPException(status_code=404, detail="Tuning job not found")
+    return build_tuning_status(state)
+
+@app.delete('/tuning-jobs/{job_id}', response_model=TuningJobStatus)
+async def cancel_tuning_job(job_id: str):
+    state = training_jobs.status(job_id)
+    if state is None or state.get('kind') != "tuning":
+        raise HTTPException(status_code=404, detail="Tuning job not found")
+    return build_tuning_status(training_jobs.cancel(job_id))
+
+def build_tuning_status(state: dict) -> TuningJobStatus:
+    tuning = state.get('tuning') or {}
+    result = state.get('result')
+    return TuningJobStatus(
+        jobId=state['job_id'],
+        status=state['status'],
+        submittedAt=state['submitted_at'],
+        startedAt=state.get('started_at'),
+        finishedAt=state.get('finished_at'),
+        strategy=tuning.get('strategy', state['params'].get('strategy')),
+        trialsCompleted=tuning.get('trials_completed', tuning.get('trials', 0)),
+        trialsTotal=tuning.get('trials_total', tuning.get('trials')),
+        leaderboard=[TuningTrial(trial=entry['trial'], params=entry['params'], status=entry['status'],
+                                 score=entry.get('score'), rounds=entry['rounds'], rung=entry.get('rung'),
+                                 accuracy=entry.get('accuracy'), f1Score=entry.get('f1_score'),
+                                 seconds=entry['seconds'])
+                     for entry in tuning.get('leaderboard', [])],
+        bestParams=tuning.get('best_params'),
+        computeTime=tuning.get('compute_time', 0.0),
+        wallTime=tuning.get('wall_time'),
+        error=state.get('error'),
+        result=build_train_response(result) if result else None
+    )
+
+def submit_training_job(request: TrainModelRequest) -> str:
+    dataset_path = data_processor.processed_store.latest_dataset()
+    if dataset_path is None:
+        raise HTTPException(status_code=404, detail="No processed dataset found. Please upload a dataset first.")
+    try:
+        return training_jobs.submit(dataset_path, request.model_dump(mode='json'))
+    except JobLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except BrokenProcessPool:
+        raise HTTPException(status_code=503, detail=WORKER_EXITED)
+
+def build_job_status(state: dict) -> TrainJobStatus:
+    progress = state.get('progress')
+    result = state.get('result')
+    return TrainJobStatus(
+        jobId=state['job_id'],
+        status=state['status'],
+        submittedAt=state['submitted_at'],
+        startedAt=state.get('started_at'),
+        finishedAt=state.get('finished_at'),
+        cancelRequested=state.get('cancel_requested', False),
+        progress=TrainJobProgress(iteration=progress['iteration'], totalIterations=progress['total_iterations'],
+                                  loss=progress['loss'], accuracy=progress['accuracy']) if progress else None,
+        error=state.get('error'),
+        result=build_train_response(result) if result else None,
+        cached=state.get('cached', False)
+    )
+
+def build_train_response(result: dict) -> TrainResponse:
+    """Map an MLModelService training result onto the TrainResponse contract (ratios in 0..1)"""
+    metrics = result['metrics']
+    cm = metrics['confusion_matrix']
     model_metadata = ModelMetadata(
-        modelId=f"model_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+        modelId=result['model_id'],
         version="1.0.0",
-        trainedAt=datetime.now().isoformat(),
-        algorithm="XGBoost",
-        trainingSamples=1500,
-        testSamples=500,
-        trainingTime=2.5
+        trainedAt=result['trained_at'],
+        algorithm=ALGORITHM_NAMES.get(result['model_type'], result['model_type']),
+        trainingSamples=result['training_samples'],
+        testSamples=result['test_samples'],
+        trainingTime=result['training_time']
     )
-
     return TrainResponse(
         success=True,
-        message="Training complete",
+        message="Training result reused from cache" if result.get('cached') else "Training complete",
         metrics=TrainMetrics(
-            accuracy=float(accuracy), precision=float(precision), recall=float(recall), f1=float(f1),
-            lossCurve=loss_curve, accCurve=acc_curve, confusion=confusion, modelInfo=model_metadata
+            accuracy=metrics['accuracy'] / 100, precision=metrics['precision'] / 100,
+            recall=metrics['recall'] / 100, f1=metrics['f1_score'] / 100,
+            lossCurve=result['loss_curve'], accCurve=result['accuracy_curve'],
+            confusion={'tp': cm['true_positives'], 'tn': cm['true_negatives'],
+                       'fp': cm['false_positives'], 'fn': cm['false_negatives']},
+            modelInfo=model_metadata
         )
     )
 
+@app.post('/predict-batch', response_model=BatchPredictionResponse)
+async def predict_batch(request: Request, model_id: Optional[str] = Query(None)):
+    """Score N rows in one vectorized call. Body: JSON {columns?, rows}, Arrow IPC stream or .npy"""
+    body = await request.body()
+    content_type = request.headers.get('content-type', 'application/json')
+
+    def score():
+        service, metadata = resolve_model(model_id)
+        X = decode_feature_matrix(body, content_type, metadata['feature_columns'], metadata.get('input_columns'))
+        predictions, probabilities = predict_with_model(service, X, source="predict_batch")
+        return metadata['model_id'], predictions, probabilities
+
+    try:
+        model_id, predictions, probabilities = await run_in_threadpool(score)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch payload: {str(e)}")
+    return BatchPredictionResponse(success=True, modelId=model_id, count=len(predictions),
+                                   predictions=predictions.tolist(), probabilities=probabilities.tolist())
+
+@app.post('/predict', response_model=PredictionResponse)
+async def predict(request: PredictRequest, model_id: Optional[str] = Query(None)):
+    """Single-row scoring; concurrent calls are micro-batched into one model call"""
+    try:
+        _, metadata = await run_in_threadpool(resolve_model, model_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    feature_columns = metadata['feature_columns']
+    if request.features is not None:
+        try:
+            require_features(request.features, feature_columns)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        row = np.array([request.features[name] for name in feature_columns], dtype=np.float64)
+    elif request.values is not None:
+        try:
+            row = project_columns(np.array([request.values], dtype=np.float64), None, feature_columns,
+                                  metadata.get('input_columns'))[0]
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        raise HTTPException(status_code=400, detail=f"Provide 'features' or {len(feature_columns)} 'values'")
+    prediction, probability = await get_prediction_batcher(metadata['model_id']).submit(row)
+    return PredictionResponse(modelId=metadata['model_id'], prediction=prediction, probability=probability)
+
+@app.get('/models')
+async def list_models():
+    return {'productionModelId': model_registry.production_model_id(), 'models': model_registry.list_models()}
+
+@app.get('/cache')
+async def content_cache_stats():
+    """Hit/miss counters of the ingest dedup cache and the training result cache"""
+    return {'datasets': dataset_cache.stats(), 'training': training_cache.stats()}
+
+@app.get('/models/cache')
+async def model_cache_stats():
+    """LRU cache contents, hit/miss counters and cold-load vs warm-hit latency"""
+    return model_registry.cache_stats()
+
+@app.get('/models/{model_id}')
+async def get_model(model_id: str):
+    metadata = model_registry.metadata(model_id)
+    if metadata is None:
+        raise HTTPException(status_code=404, detail="Model not found")
+    return metadata
+
+@app.post('/models/{model_id}/promote')
+async def promote_model(model_id: str):
+    """Warm the version into the cache off the event loop, then switch production to it"""
+    try:
+        await run_in_threadpool(model_registry.promote, model_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {'productionModelId': model_id}
+
+@app.put('/models/{model_id}/backend')
+async def set_model_backend(model_id: str, request: ModelBackendRequest):
+    """Serve a version through the standard path or the fused (scaler folded into trees) model"""
+    try:
+        metadata = await run_in_threadpool(model_registry.set_backend, model_id, request.backend)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {'modelId': model_id, 'inferenceBackend': metadata['inference_backend'],
+            'fusedParity': metadata.get('fused_parity')}
+
+@app.post('/date-ranges/summary', response_model=DateRangeSummaryResponse)
+async def date_range_summary(request: DateRangeQuery):
+    """Period counts and a daily series from the dataset's date index (binary search, no data scan)"""
+    dataset_path = data_processor.processed_store.latest_dataset()
+    if dataset_path is None:
+        raise HTTPException(status_code=404, detail="No processed dataset found. Please upload a dataset first.")
+    periods = [(name, naive_utc(start), naive_utc(end)) for name, start, end in
+               [('Training', request.training_start, request.training_end),
+                ('Testing', request.testing_start, request.testing_end),
+                ('Simulation', request.simulation_start, request.simulation_end)]]
+    for name, start, end in periods:
+        if start > end:
+            raise HTTPException(status_code=400, detail=f"{name} start must not be after its end")
+
+    index = await run_in_threadpool(get_date_index, dataset_path)
+    earliest, latest = index.bounds
+
+    period_counts = []
+    for name, start, end in periods:
+        counts = index.count(start, end)
+        period_counts.append(PeriodCount(periodName=f"{name} Period", startDate=start, endDate=end,
+                                         durationInDays=(end - start).days + 1, recordCount=counts['count'],
+                                         passCount=counts['pass'], failCount=counts['fail']))
+
+    daily = []
+    for day in index.daily(request.daily_start, request.daily_end):
+        day_start = pd.Timestamp(day['date'])
+        day_end = day_start + pd.Timedelta(days=1) - pd.Timedelta(1, unit='ns')
+        period_type = next((name for name, start, end in periods
+                            if start <= day_end and end >= day_start), '')
+        daily.append(DailyCount(date=day['date'], count=day['count'], passCount=day['pass'],
+                                failCount=day['fail'], periodType=period_type))
+
+    within = earliest is not None and \
+        periods[0][1] >= earliest and periods[-1][2] <= latest
+    return DateRangeSummaryResponse(withinDataset=within, datasetStart=earliest, datasetEnd=latest,
+                                    totalRecords=index.rollup['rows'], periods=period_counts, dailyData=daily)
+
+@app.post('/simulations', response_model=SimulationSessionStatus, status_code=201)
+async def create_simulation(request: SimulationSessionRequest):
+    """Open a replay session; stream its predictions from /simulations/{id}/events"""
+    if request.batch_size is not None and request.batch_size < 1:
+        raise HTTPException(status_code=400, detail="batch_size must be at least 1")
+    if request.rate is not None and request.rate < 0:
+        raise HTTPException(status_code=400, detail="rate must not be negative")
+    window = (request.simulation_start, request.simulation_end)
+    try:
+        session = await run_in_threadpool(open_simulation, window, request.model_id, request.batch_size, request.rate)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except SessionLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return build_simulation_status(session.stats())
+
+@app.get('/simulations')
+async def list_simulations():
+    return {'sessions': simulations.list_sessions()}
+
+@app.get('/simulations/{session_id}', response_model=SimulationSessionStatus)
+async def get_simulation(session_id: str):
+    stats = await run_in_threadpool(simulations.stats, session_id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    return build_simulation_status(stats)
+
+@app.get('/simulations/{session_id}/events')
+async def stream_simulation(session_id: str):
+    """
+    Server-Sent Events: one `predictions` event per scored batch, then `complete` with
+    the final counters. Disconnecting pauses the session; reconnecting (to any worker) resumes it.
+    """
+    stats = await run_in_threadpool(simulations.stats, session_id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    if stats['status'] == "streaming":
+        raise HTTPException(status_code=409, detail="Simulation is already being streamed")
+    try:
+        session = await run_in_threadpool(simulations.get, session_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if session is None:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    if session.status == "streaming":
+        raise HTTPException(status_code=409, detail="Simulation is already being streamed")
+
+    async def events():
+        try:
+            async for batch in session.stream():
+                payload = json.dumps({'sessionId': session_id, 'sent': session.sent + len(batch),
+                                      'total': session.total_rows, 'rows': batch})
+                yield f"event: predictions\ndata: {payload}\n\n"
+        except SessionBusy:
+            return
+        if session.status in ("completed", "cancelled"):
+            yield f"event: complete\ndata: {build_simulation_status(session.stats()).model_dump_json()}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.delete('/simulations/{session_id}', response_model=SimulationSessionStatus)
+async def cancel_simulation(session_id: str):
+    stats = await run_in_threadpool(simulations.close, session_id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Simulation not found")
+    return build_simulation_status(stats)
+
 @app.post('/start-simulation', response_model=SimulationStartResponse)
-async def start_simulation():
-    simulation_state['is_running'] = True
-    return SimulationStartResponse(success=True, message="Simulation started")
+async def start_simulation(request: Optional[SimulationStartRequest] = None):
+    previous = await run_in_threadpool(shared_state.get_value, LEGACY_SIMULATION_KEY, INITIAL_SIMULATION_STATE)
+    if previous['session_id'] is not None:
+        await run_in_threadpool(simulations.close, previous['session_id'])
+    if request is None or (request.simulation_start is None and request.simulation_end is None):
+        await run_in_threadpool(shared_state.set_value, LEGACY_SIMULATION_KEY,
+                                dict(INITIAL_SIMULATION_STATE, is_running=True))
+        return SimulationStartResponse(success=True, message="Simulation started")
+    window = (request.simulation_start, request.simulation_end)
+    try:
+        session = await run_in_threadpool(open_simulation, window)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except SessionLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    await run_in_threadpool(shared_state.set_value, LEGACY_SIMULATION_KEY,
+                            dict(INITIAL_SIMULATION_STATE, session_id=session.session_id,
+                                 max_samples=session.total_rows, is_running=True))
+    return SimulationStartResponse(success=True,
+                                   message=f"Simulation started over {session.total_rows} rows of the window")
+
+def claim_next_sample() -> Optional[dict]:
+    """Advance the shared sample counter; the state before the advance, or None once complete"""
+    claimed = []
+
+    def advance(state: dict) -> dict:
+        if state['current_sample'] >= state['max_samples']:
+            return state
+        claimed.append(state)
+        return dict(state, current_sample=state['current_sample'] + 1)
+
+    shared_state.update_value(LEGACY_SIMULATION_KEY, advance, INITIAL_SIMULATION_STATE)
+    return claimed[0] if claimed else None
+
+def replay_next_row(session_id: str) -> Optional[List[dict]]:
+    """Score and record the next row of a legacy replay session; None once it is exhausted or closed"""
+    session = simulations.get(session_id)
+    if session is None:
+        return None
+    batch = session.next_batch(1)
+    if batch is not None:
+        session.record(batch)
+    return batch
+
+def finish_legacy_simulation():
+    shared_state.update_value(LEGACY_SIMULATION_KEY, lambda state: dict(state, current_sample=state['max_samples']),
+                              INITIAL_SIMULATION_STATE)
 
 @app.get('/next-prediction', response_model=SimulationData)
 async def get_next_prediction():
-    if simulation_state['current_sample'] >= simulation_state['max_samples']:
+    simulation_state = await run_in_threadpool(claim_next_sample)
+    if simulation_state is None:
         raise HTTPException(status_code=404, detail="Simulation complete")
     
     # Generate mock prediction data with IST timezone
@@ -252,13 +1052,33 @@ async def get_next_prediction():
     now = datetime.now(ist)
     time_str = now.strftime("%H:%M:%S")
     sample_id = f"SAMPLE_{simulation_state['current_sample'] + 1:03d}"
-    
+
+    if simulation_state['session_id'] is not None:
+        # Replay the next processed row of the window; prefer /simulations/{id}/events for throughput
+        try:
+            batch = await run_in_threadpool(replay_next_row, simulation_state['session_id'])
+        except LookupError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        if batch is None:
+            await run_in_threadpool(finish_legacy_simulation)
+            raise HTTPException(status_code=404, detail="Simulation complete")
+        row = batch[0]
+        return SimulationData(
+            time=row['time'][-8:],
+            sampleId=row['sampleId'] or sample_id,
+            prediction=row['prediction'],
+            confidence=row['confidence'],
+            temperature=row.get('temperature'),
+            pressure=row.get('pressure'),
+            humidity=row.get('humidity')
+        )
+
     # Generate realistic sensor data
     rng = np.random.default_rng()
     temperature = 20 + rng.random() * 15  # 20-35°C
     pressure = 1000 + rng.integers(0, 51)  # 1000-1050 hPa
     humidity = 40 + rng.random() * 40  # 40-80%
-    
+
     # Generate prediction based on sensor values (simple logic)
     base_score = (0.6 if temperature < 30 else 0.4) + \
                  (0.1 if pressure > 1020 else 0) + \
@@ -271,8 +1091,6 @@ async def get_next_prediction():
     prediction = "Pass" if quality_score > 0.7 else "Fail"
     confidence = int(quality_score * 100)
     
-    simulation_state['current_sample'] += 1
-    
     return SimulationData(
         time=time_str,
         sampleId=sample_id,
@@ -0,0 +1,22 @@
+import os
+
+import uvicorn
+
+# Multi-worker entry point: `python -m app.serve`. Each worker is a separate process with
+# its own model cache, micro-batchers and training pool; simulation sessions and the
+# legacy polling state live in the shared SQLite store, training jobs in their state
+# files, and the production model pointer on disk, so any worker can serve any request
+SERVICE_HOST = os.getenv("SERVICE_HOST", "0.0.0.0")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", "8000"))
+SERVICE_WORKERS = int(os.getenv("SERVICE_WORKERS", "1"))
+
+
+def main():
+    if SERVICE_WORKERS > 1:
+        # Workers replay datasets from one memory-mapped copy instead of one decoded copy each
+        os.environ.setdefault("PROCESSED_MMAP_VIEWS", "1")
+    uvicorn.run("app.main:app", host=SERVICE_HOST, port=SERVICE_PORT, workers=SERVICE_WORKERS)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+from typing import Any, Optional
+import json
+import os
+import tempfile
+
+
+def write_json(path: str, payload: Any, indent: Optional[int] = None):
+    """
+    Replace the JSON document at `path` atomically: readers see the old document or the
+    new one, never a partial write.
+
+    Each writer dumps into a temp file of its own next to `path`, so workers updating the
+    same file never write into each other's temp file, and the last os.replace wins with
+    a complete document.
+    """
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                    dir=os.path.dirname(path) or ".")
+    try:
+        with os.fdopen(fd, "w") as fh:
+            json.dump(payload, fh, indent=indent, default=str)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
@@ -0,0 +1,336 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple
+import glob
+import multiprocessing
+import os
+import re
+import shutil
+import uuid
+
+from app.services.metrics import observe_stages, timed
+from app.services.processed_store import (LABEL_COLUMN, PARQUET_COMPRESSION, PARQUET_ROW_GROUP_ROWS, TIMESTAMP_COLUMN,
+                                          ProcessedDataStore, file_sha256)
+from app.services.schema_inference import Schema, infer_schema, label_sum, read_csv
+from app.services.streaming_ingest import RunningSummary
+from app.services.timestamps import fill_missing_timestamps, synthetic_timestamp_at, synthetic_timestamps
+
+# Processes parsing the files of a batch ingest (a directory or glob given to /process-data)
+BATCH_INGEST_WORKERS = int(os.getenv("BATCH_INGEST_WORKERS", str(os.cpu_count() or 1)))
+# Consecutive files are merged into parts of about this many rows; files whose time ranges
+# overlap always share a part, since their rows are interleaved by timestamp
+BATCH_PART_ROWS = int(os.getenv("BATCH_INGEST_PART_ROWS", "500000"))
+
+
+def create_batch_ingest_executor(max_workers: int = BATCH_INGEST_WORKERS) -> ProcessPoolExecutor:
+    """
+    Process pool for batch ingest; spawned like the training pool, so a worker never
+    inherits the service's threads
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def resolve_batch_files(path: str) -> Optional[List[str]]:
+    """
+    The CSV files a batch path names, in name order: every *.csv in a directory, or the
+    matches of a glob pattern. None if `path` is a single file.
+    """
+    if os.path.isfile(path):
+        return None
+    if os.path.isdir(path):
+        return sorted(os.path.join(path, name) for name in os.listdir(path)
+                      if name.lower().endswith(".csv") and os.path.isfile(os.path.join(path, name)))
+    if glob.has_magic(path):
+        return sorted(match for match in glob.glob(path) if os.path.isfile(match))
+    return None
+
+
+def batch_name(path: str) -> str:
+    """
+    Dataset name of a batch: the directory's name, or the glob's file pattern without
+    its wildcards ("exports/station_*.csv" -> "station")
+    """
+    if os.path.isdir(path):
+        name = os.path.basename(os.path.normpath(path))
+    else:
+        name = os.path.splitext(os.path.basename(path))[0]
+    return re.sub(r"[^\w-]+", "_", name).strip("_") or "batch"
+
+
+def _time_columns(columns) -> List[str]:
+    # Same rule as add_synthetic_timestamp_column
+    return [column for column in columns if 'timestamp' in column.lower() or 'time' in column.lower()]
+
+
+def stage_file(file_path: str, staged_path: str, schema: Optional[Schema], add_timestamps: bool) -> dict:
+    """
+    Worker side of phase 1: parse one CSV and write it as an uncompressed Arrow file.
+
+    The file's own time column (if any) is parsed into TIMESTAMP_COLUMN with its gaps
+    left as NaT: the synthetic values that fill them depend on the row's position in
+    the whole batch, which only the parent knows.
+    """
+    df = read_csv(file_path, schema)
+    if LABEL_COLUMN not in df.columns:
+        raise ValueError(f"{os.path.basename(file_path)}: CSV file must contain a '{LABEL_COLUMN}' column")
+    info = {'file_path': file_path, 'staged_path': staged_path, 'rows': len(df),
+            'columns': len(df.columns) + (1 if add_timestamps and TIMESTAMP_COLUMN not in df.columns else 0),
+            'pass_count': label_sum(df[LABEL_COLUMN]), 'file_bytes': os.path.getsize(file_path),
+            'has_time': False, 'tz': None, 'min_ns': None, 'max_ns': None, 'first_gap': None, 'last_gap': None}
+    if add_timestamps:
+        time_columns = _time_columns(df.columns)
+        if time_columns:
+            parsed = pd.to_datetime(df[time_columns[0]], errors='coerce')
+            df[TIMESTAMP_COLUMN] = parsed
+            present = parsed.dropna()
+            gaps = np.flatnonzero(parsed.isna().to_numpy())
+            info.update(has_time=True, tz=None if parsed.dt.tz is None else str(parsed.dt.tz),
+                        min_ns=None if present.empty else _ns(present.min()),
+                        max_ns=None if present.empty else _ns(present.max()),
+                        first_gap=int(gaps[0]) if len(gaps) else None,
+                        last_gap=int(gaps[-1]) if len(gaps) else None)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(staged_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return info
+
+
+def _ns(value) -> int:
+    # Wall-clock nanoseconds, the way fill_missing_timestamps places synthetic values in a tz-aware column
+    value = pd.Timestamp(value)
+    return value.tz_localize(None).value if value.tzinfo is not None else value.value
+
+
+def write_group(files: List[dict], output_path: str, schema: pa.Schema, add_timestamps: bool,
+                timestamp_start, timestamp_freq) -> dict:
+    """
+    Worker side of phase 2: timestamp the staged files of one group, conform them to
+    the batch schema, order their rows by timestamp (stable, so ties keep file order)
+    and write them as one Parquet part. Returns the part's manifest fields.
+    """
+    tables = []
+    for entry in files:
+        table = pa.ipc.open_file(pa.memory_map(entry['staged_path'])).read_all()
+        if add_timestamps:
+            if entry['has_time']:
+                filled = fill_missing_timestamps(table[TIMESTAMP_COLUMN].to_pandas(), timestamp_start,
+                                                 timestamp_freq, entry['row_offset'])
+            else:
+                filled = pd.Series(synthetic_timestamps(table.num_rows, timestamp_start, timestamp_freq,
+                                                        entry['row_offset']))
+            timestamps = pa.Array.from_pandas(filled)
+            if TIMESTAMP_COLUMN in table.column_names:
+                table = table.set_column(table.column_names.index(TIMESTAMP_COLUMN), TIMESTAMP_COLUMN, timestamps)
+            else:
+                table = table.append_column(TIMESTAMP_COLUMN, timestamps)
+        tables.append(_conform(table, schema))
+    table = pa.concat_tables(tables)
+    if any(pa.types.is_dictionary(field.type) for field in schema):
+        table = table.unify_dictionaries()
+    if add_timestamps and table.num_rows > 1:
+        timestamps = table[TIMESTAMP_COLUMN]
+        if not pc.all(pc.greater_equal(timestamps[1:], timestamps[:-1])).as_py():
+            table = table.take(pc.sort_indices(table, sort_keys=[(TIMESTAMP_COLUMN, "ascending")],
+                                               null_placement="at_end"))
+    pq.write_table(table, output_path, row_group_size=PARQUET_ROW_GROUP_ROWS, compression=PARQUET_COMPRESSION)
+    part = {'rows': table.num_rows, 'columns': table.column_names, 'min_timestamp': None, 'max_timestamp': None,
+            'sha256': file_sha256(output_path)}
+    if add_timestamps and table.num_rows:
+        bounds = pc.min_max(table[TIMESTAMP_COLUMN])
+        if bounds['min'].as_py() is not None:
+            part['min_timestamp'] = pd.Timestamp(bounds['min'].as_py()).isoformat()
+            part['max_timestamp'] = pd.Timestamp(bounds['max'].as_py()).isoformat()
+    return part
+
+
+def _conform(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    columns = [table[field.name].cast(field.type) if field.name in table.column_names
+               else pa.nulls(table.num_rows, field.type) for field in schema]
+    return pa.table(columns, schema=schema)
+
+
+class BatchIngestor:
+    """
+    Ingest many CSVs (one per station per shift, say) into one processed dataset, its
+    rows ordered by timestamp.
+
+    Phase 1 parses the files in parallel on the process pool, into the compact dtypes
+    inferred from the first file, and stages each as an Arrow file. The parent then
+    places every file on the synthetic timeline (files in name order, as if they were
+    one CSV), works out each file's time range and groups files whose ranges overlap.
+    Phase 2 writes every group as one sorted Parquet part, again in parallel, and the
+    parts are added to the dataset in time order.
+
+    Works with either DataProcessor implementation; it relies on `processed_store`,
+    `timestamp_start`, `timestamp_freq` and `_format_file_size`.
+    """
+
+    def __init__(self, processor, executor: Executor, workers: int = BATCH_INGEST_WORKERS,
+                 part_rows: int = BATCH_PART_ROWS):
+        self.processor = processor
+        self.executor = executor
+        self.workers = max(1, workers)
+        self.part_rows = part_rows
+
+    def ingest(self, source: str, files: List[str], add_synthetic_timestamps: bool = True,
+               append_to: Optional[str] = None) -> Tuple[dict, List[dict], str]:
+        """
+        Returns (combined metadata, per-file metadata in name order, processed_file_path).
+        With `append_to` the rows are added to that dataset, after its existing rows on
+        the synthetic timeline. BrokenProcessPool (a worker died) is raised as is, so the
+        caller can replace the pool.
+        """
+        if not files:
+            raise ValueError(f"No CSV files match {source}")
+        try:
+            staging = os.path.abspath(os.path.join(self.processor.processed_store.root,
+                                                   f".batch-{uuid.uuid4().hex[:12]}"))
+            os.makedirs(staging)
+            try:
+                return self._ingest(source, files, add_synthetic_timestamps, append_to, staging)
+            finally:
+                shutil.rmtree(staging, ignore_errors=True)
+        except BrokenProcessPool:
+            raise
+        except Exception as e:
+            raise Exception(f"Error processing CSV files: {str(e)}")
+
+    def _ingest(self, source: str, files: List[str], add_timestamps: bool, append_to: Optional[str],
+                staging: str) -> Tuple[dict, List[dict], str]:
+        timings = {}
+        processor = self.processor
+        summary = RunningSummary.for_dataset(append_to) if append_to is not None else RunningSummary()
+
+        with timed("ingest_parse", timings):
+            schema = infer_schema(files[0])
+            staged = [self.executor.submit(stage_file, path, os.path.join(staging, f"{i:06d}.arrow"), schema,
+                                           add_timestamps)
+                      for i, path in enumerate(files)]
+            entries = [future.result() for future in staged]
+
+        with timed("ingest_timestamps", timings):
+            offset = summary.total_records
+            for entry in entries:
+                entry['row_offset'] = offset
+                offset += entry['rows']
+                entry['bounds'] = self._bounds(entry) if add_timestamps else None
+            batch_schema = self._schema(entries, add_timestamps)
+            if append_to is not None:
+                # Appended rows must fit the dataset they join; columns are put in its order
+                columns = ProcessedDataStore.manifest(append_to)['columns']
+                if set(batch_schema.names) != set(columns):
+                    raise ValueError("CSV columns do not match the dataset being appended to")
+                batch_schema = pa.schema([batch_schema.field(column) for column in columns])
+            groups = self._groups(entries)
+
+        with timed("ingest_metadata", timings):
+            file_summaries = []
+            for entry in entries:
+                file_summary = RunningSummary()
+                file_summary.total_records = entry['rows']
+                file_summary.total_columns = entry['columns']
+                file_summary.pass_count = entry['pass_count']
+                if entry['bounds'] is not None:
+                    file_summary.earliest_timestamp = self._timestamp(entry, entry['bounds'][0])
+                    file_summary.latest_timestamp = self._timestamp(entry, entry['bounds'][1])
+                file_summaries.append(file_summary.to_metadata(
+                    entry['file_path'], processor._format_file_size(entry['file_bytes']),
+                    processor.timestamp_start, processor.timestamp_freq))
+                summary.total_records += entry['rows']
+                summary.pass_count += entry['pass_count']
+                low, high = file_summary.earliest_timestamp, file_summary.latest_timestamp
+                if low is not None:
+                    if summary.earliest_timestamp is None or low < summary.earliest_timestamp:
+                        summary.earliest_timestamp = low
+                    if summary.latest_timestamp is None or high > summary.latest_timestamp:
+                        summary.latest_timestamp = high
+            summary.total_columns = len(batch_schema)
+
+        with timed("ingest_save", timings):
+            writer = ProcessedDataStore.open_appender(append_to, source) if append_to is not None \
+                else processor.processed_store.open_writer(batch_name(source))
+            try:
+                parts = [self.executor.submit(write_group, group, os.path.join(staging, f"part-{i:05d}.parquet"),
+                                              batch_schema, add_timestamps, processor.timestamp_start,
+                                              processor.timestamp_freq)
+                         for i, group in enumerate(groups)]
+                for i, future in enumerate(parts):
+                    writer.add_part_file(os.path.join(staging, f"part-{i:05d}.parquet"), future.result())
+                writer.close(summary.to_dict())
+            except BaseException:
+                writer.abort()
+                raise
+        file_size = processor._format_file_size(sum(entry['file_bytes'] for entry in entries))
+        metadata = summary.to_metadata(source, file_size, processor.timestamp_start, processor.timestamp_freq)
+        metadata['file_name'] = os.path.basename(os.path.normpath(source))
+        observe_stages(timings)
+        return metadata, file_summaries, writer.dataset_path
+
+    def _bounds(self, entry: dict) -> Optional[Tuple[int, int]]:
+        """
+        (earliest, latest) timestamp in nanoseconds of a staged file once its gaps are
+        filled, without reading it: synthetic values grow with the row position
+        """
+        if not entry['rows']:
+            return None
+        start, freq = self.processor.timestamp_start, self.processor.timestamp_freq
+        positions = [0, entry['rows'] - 1]
+        candidates = []
+        if entry['has_time']:
+            positions = [gap for gap in (entry['first_gap'], entry['last_gap']) if gap is not None]
+            candidates = [value for value in (entry['min_ns'], entry['max_ns']) if value is not None]
+        candidates += [synthetic_timestamp_at(entry['row_offset'] + position, start, freq).value
+                       for position in positions]
+        return min(candidates), max(candidates)
+
+    @staticmethod
+    def _timestamp(entry: dict, ns: int) -> pd.Timestamp:
+        value = pd.Timestamp(ns)
+        return value.tz_localize(entry['tz']) if entry['tz'] else value
+
+    @staticmethod
+    def _schema(entries: List[dict], add_timestamps: bool) -> pa.Schema:
+        """
+        One schema for every part: columns in first-seen order, types widened across
+        files, the timestamp column last
+        """
+        schemas = [pa.ipc.open_file(pa.memory_map(entry['staged_path'])).schema.remove_metadata()
+                   for entry in entries]
+        unified = pa.unify_schemas(schemas, promote_options="permissive")
+        fields = [field for field in unified if field.name != TIMESTAMP_COLUMN]
+        if add_timestamps:
+            timestamp = unified.field(TIMESTAMP_COLUMN) if TIMESTAMP_COLUMN in unified.names \
+                else pa.field(TIMESTAMP_COLUMN, pa.timestamp("ns"))
+            fields.append(timestamp)
+        return pa.schema(fields)
+
+    def _groups(self, entries: List[dict]) -> List[List[dict]]:
+        """
+        Files in time order, cut into groups where no time range spans two groups;
+        without timestamps, in name order. Groups hold up to `part_rows` rows, fewer if
+        that leaves a worker without a group to write (but at least a row group's worth).
+        """
+        share = -(-sum(entry['rows'] for entry in entries) // self.workers)
+        target = min(self.part_rows, max(PARQUET_ROW_GROUP_ROWS, share))
+        ordered = sorted((entry for entry in entries if entry['bounds'] is not None),
+                         key=lambda entry: entry['bounds'][0])
+        ordered += [entry for entry in entries if entry['bounds'] is None]
+        groups, current, rows, latest = [], [], 0, None
+        for entry in ordered:
+            bounds = entry['bounds']
+            overlaps = bounds is not None and latest is not None and bounds[0] <= latest
+            if current and rows >= target and not overlaps:
+                groups.append(current)
+                current, rows = [], 0
+            current.append(entry)
+            rows += entry['rows']
+            if bounds is not None:
+                latest = bounds[1] if latest is None else max(latest, bounds[1])
+        if current:
+            groups.append(current)
+        return groups
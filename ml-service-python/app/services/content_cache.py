@@ -0,0 +1,219 @@
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows: the index is only serialized within each worker process
+    fcntl = None
+
+from app.services.atomic_json import write_json
+from app.services.model_registry import METADATA_FILE, MODEL_DIRECTORY, ModelRegistry
+from app.services.processed_store import MANIFEST_FILE, ProcessedDataStore, content_hash
+from app.services.training import TRAINING_DATA_MODE
+
+# Written under data/processed/: source key -> processed dataset directory name
+CONTENT_INDEX_FILE = "content_index.json"
+TRAINING_CACHE_DIRECTORY = os.path.join(MODEL_DIRECTORY, "training_cache")
+# Memoized training entries beyond this many bytes are evicted, least recently used first
+TRAINING_CACHE_MAX_BYTES = int(os.getenv("TRAINING_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+RESULT_FILE = "result.json"
+
+
+def _key(payload: dict) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class DatasetCache:
+    """
+    Content-addressed lookup of processed datasets: the SHA-256 of an uploaded CSV (plus
+    the ingest options) maps to the dataset it produced, so the same content is never
+    ingested twice, whatever the file is called.
+
+    A dataset stays addressable only while its manifest carries the key. Re-ingesting
+    over it or appending to it rewrites the manifest without one, so stale entries
+    simply miss.
+    """
+
+    def __init__(self, store: ProcessedDataStore):
+        self.store = store
+        self.index_path = os.path.join(store.root, CONTENT_INDEX_FILE)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(source_sha256: str, **options) -> str:
+        return _key({'source_sha256': source_sha256, 'options': options})
+
+    def lookup(self, key: str) -> Optional[str]:
+        """
+        The processed dataset for `key`, or None. A hit becomes the latest dataset, as
+        if it had just been ingested.
+        """
+        with self._lock:
+            name = self._read_index().get(key)
+            dataset_path = None if name is None else os.path.join(self.store.root, name)
+            try:
+                valid = dataset_path is not None and ProcessedDataStore.manifest(dataset_path).get('source_key') == key
+            except FileNotFoundError:
+                valid = False
+            if not valid:
+                self.misses += 1
+                return None
+            self.hits += 1
+            os.utime(os.path.join(dataset_path, MANIFEST_FILE))
+            return dataset_path
+
+    def record(self, key: str, dataset_path: str):
+        ProcessedDataStore.update_manifest(dataset_path, source_key=key)
+        name = os.path.basename(dataset_path)
+        # The read-modify-write is serialized across worker processes too, or one worker's
+        # entry is lost when another rewrites the index from an older read
+        with self._lock, open(self.index_path + ".lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            index = {k: v for k, v in self._read_index().items() if v != name}
+            index[key] = name
+            write_json(self.index_path, index)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = len(self._read_index())
+        return {'entries': entries, 'hits': self.hits, 'misses': self.misses}
+
+    def _read_index(self) -> Dict[str, str]:
+        try:
+            with open(self.index_path) as fh:
+                return json.load(fh)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+
+class TrainingCache:
+    """
+    Memoized training results keyed on the dataset's content hash and the full training
+    params (hyperparameters, feature selection settings and time windows).
+
+    Each entry holds the run's result plus hard links to its model version's files, so a
+    hit is served from the registry version when it still exists and re-registered from
+    the entry otherwise. Entries are evicted least recently used first once together
+    they exceed `max_bytes`; evicting an entry never touches the registry.
+    """
+
+    def __init__(self, registry: ModelRegistry, cache_directory: str = TRAINING_CACHE_DIRECTORY,
+                 max_bytes: int = TRAINING_CACHE_MAX_BYTES):
+        self.registry = registry
+        self.cache_directory = cache_directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_directory, exist_ok=True)
+
+    @staticmethod
+    def key(dataset_path: str, params: Dict[str, Any]) -> str:
+        params = dict(params, data_mode=params.get('data_mode') or TRAINING_DATA_MODE)
+        return _key({'dataset_hash': content_hash(dataset_path), 'params': params})
+
+    def lookup(self, key: str) -> Optional[dict]:
+        """
+        The memoized result for `key` with its model version promoted, or None
+        """
+        entry = os.path.join(self.cache_directory, key)
+        with self._lock:
+            try:
+                with open(os.path.join(entry, RESULT_FILE)) as fh:
+                    result = json.load(fh)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self.misses += 1
+                return None
+            if self.registry.metadata(result['model_id']) is None:
+                result = self._restore(entry, result)
+            self.registry.promote(result['model_id'], warm=False)
+            os.utime(os.path.join(entry, RESULT_FILE))
+            self.hits += 1
+            return dict(result, cached=True)
+
+    def store(self, key: str, result: dict):
+        """
+        Memoize a successful training result, then evict down to `max_bytes`
+        """
+        version_path = self.registry.version_path(result['model_id'])
+        staging = os.path.join(self.cache_directory, f".{key}.{uuid.uuid4().hex[:6]}")
+        os.makedirs(staging)
+        for file_name in os.listdir(version_path):
+            _link_or_copy(os.path.join(version_path, file_name), os.path.join(staging, file_name))
+        with open(os.path.join(staging, RESULT_FILE), "w") as fh:
+            json.dump(result, fh, default=str)
+        with self._lock:
+            entry = os.path.join(self.cache_directory, key)
+            shutil.rmtree(entry, ignore_errors=True)
+            os.rename(staging, entry)
+            self._evict()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._entries()
+        return {
+            'entries': len(entries),
+            'bytes': sum(size for _, _, size in entries),
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+    def _restore(self, entry: str, result: dict) -> dict:
+        # The registry version was removed: register the cached files as a new version
+        with open(os.path.join(entry, METADATA_FILE)) as fh:
+            metadata = json.load(fh)
+        model_id = self.registry.new_model_id(metadata['model_type'])
+        version_path = self.registry.version_path(model_id)
+        os.makedirs(version_path)
+        for file_name in os.listdir(entry):
+            if file_name not in (RESULT_FILE, METADATA_FILE):
+                _link_or_copy(os.path.join(entry, file_name), os.path.join(version_path, file_name))
+        for path_key in ('model_path', 'scaler_path', 'imputer_path'):
+            if metadata.get(path_key):
+                metadata[path_key] = os.path.join(version_path, os.path.basename(metadata[path_key]))
+        metadata.pop('registered_at', None)
+        self.registry.register(model_id, metadata, promote=False)
+        result = dict(result, model_id=model_id, model_path=metadata['model_path'],
+                      scaler_path=metadata['scaler_path'], imputer_path=metadata.get('imputer_path'))
+        write_json(os.path.join(entry, RESULT_FILE), result)
+        return result
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.cache_directory):
+            entry = os.path.join(self.cache_directory, name)
+            result_path = os.path.join(entry, RESULT_FILE)
+            if name.startswith(".") or not os.path.isfile(result_path):
+                continue
+            size = sum(os.path.getsize(os.path.join(entry, file_name)) for file_name in os.listdir(entry))
+            entries.append((os.path.getmtime(result_path), entry, size))
+        return entries
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, _, size in entries)
+        for _, entry, size in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            self.evictions += 1
+
+
+def _link_or_copy(source: str, destination: str):
+    # A hard link costs no extra space while the registry keeps its copy
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
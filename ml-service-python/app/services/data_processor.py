@@ -1,21 +1,30 @@
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
 from typing import Tuple, Optional
 import os
+from app.services.metrics import timed
+from app.services.processed_store import ProcessedDataStore
+from app.services.schema_inference import infer_schema, label_sum, read_csv
+from app.services.streaming_ingest import RunningSummary, StreamingCsvIngestor
+from app.services.timestamps import DEFAULT_FREQ, DEFAULT_START, add_synthetic_timestamp_column, synthetic_timestamp_at
 
 class DataProcessor:
-    def __init__(self):
+    def __init__(self, timestamp_start=None, timestamp_freq: Optional[str] = None):
         self.data_directory = "data"
+        # Synthetic timeline: first row at timestamp_start, one row per timestamp_freq
+        self.timestamp_start = timestamp_start if timestamp_start is not None else DEFAULT_START
+        self.timestamp_freq = timestamp_freq or DEFAULT_FREQ
         os.makedirs(self.data_directory, exist_ok=True)
+        self.processed_store = ProcessedDataStore(self.data_directory)
     
     def process_csv_file(self, file_path: str, add_synthetic_timestamps: bool = True) -> Tuple[pd.DataFrame, dict]:
         """
         Process CSV file and return DataFrame with metadata
         """
         try:
-            # Read CSV file
-            df = pd.read_csv(file_path)
+            # Read CSV file into compact dtypes inferred from a sample of it
+            with timed("ingest_parse"):
+                df = read_csv(file_path, infer_schema(file_path))
             
             # Validate that Response column exists
             if 'Response' not in df.columns:
@@ -23,40 +32,32 @@ class DataProcessor:
             
             # Add synthetic timestamps if requested and not present
             if add_synthetic_timestamps:
-                df = self._add_synthetic_timestamps(df)
+                with timed("ingest_timestamps"):
+                    df = self._add_synthetic_timestamps(df)
             
             # Calculate metadata
-            metadata = self._calculate_metadata(df, file_path)
+            with timed("ingest_metadata"):
+                metadata = self._calculate_metadata(df, file_path)
             
             return df, metadata
             
         except Exception as e:
             raise Exception(f"Error processing CSV file: {str(e)}")
     
-    def _add_synthetic_timestamps(self, df: pd.DataFrame) -> pd.DataFrame:
+    def process_csv_file_streaming(self, file_path: str, add_synthetic_timestamps: bool = True,
+                                   append_to: Optional[str] = None) -> Tuple[dict, str]:
         """
-        Add synthetic timestamps starting from 2021-01-01 with 1-second granularity
+        Process CSV file in row chunks with bounded memory; returns (metadata, processed_file_path).
+        With `append_to`, the rows are appended to that processed dataset instead.
         """
-        # Check if timestamp column already exists
-        timestamp_columns = [col for col in df.columns if 'timestamp' in col.lower() or 'time' in col.lower()]
-        
-        if not timestamp_columns:
-            # Add synthetic timestamp column
-            start_date = datetime(2021, 1, 1)
-            df['synthetic_timestamp'] = [start_date + timedelta(seconds=i) for i in range(len(df))]
-        else:
-            # Use existing timestamp column
-            timestamp_col = timestamp_columns[0]
-            df['synthetic_timestamp'] = pd.to_datetime(df[timestamp_col], errors='coerce')
-            
-            # Fill any NaT values with synthetic timestamps
-            nat_mask = df['synthetic_timestamp'].isna()
-            if nat_mask.any():
-                start_date = datetime(2021, 1, 1)
-                synthetic_timestamps = [start_date + timedelta(seconds=i) for i in range(len(df))]
-                df.loc[nat_mask, 'synthetic_timestamp'] = [synthetic_timestamps[i] for i in range(len(df)) if nat_mask.iloc[i]]
-        
-        return df
+        return StreamingCsvIngestor(self).ingest(file_path, add_synthetic_timestamps, append_to)
+    
+    def _add_synthetic_timestamps(self, df: pd.DataFrame, row_offset: int = 0) -> pd.DataFrame:
+        """
+        Add synthetic timestamps (default 2021-01-01, 1-second granularity), or fill gaps in
+        an existing time column. `row_offset` is the position of the first row when called on a chunk.
+        """
+        return add_synthetic_timestamp_column(df, self.timestamp_start, self.timestamp_freq, row_offset)
     
     def _calculate_metadata(self, df: pd.DataFrame, file_path: str) -> dict:
         """
@@ -68,7 +69,7 @@ class DataProcessor:
         
         # Pass rate calculation
         if 'Response' in df.columns:
-            pass_count = df['Response'].sum() if df['Response'].dtype in ['int64', 'float64'] else 0
+            pass_count = label_sum(df['Response'])
             pass_rate = (pass_count / total_records * 100) if total_records > 0 else 0
         else:
             pass_rate = 0
@@ -79,9 +80,8 @@ class DataProcessor:
             latest_timestamp = df['synthetic_timestamp'].max()
         else:
             # Fallback to synthetic timestamps
-            start_date = datetime(2021, 1, 1)
-            earliest_timestamp = start_date
-            latest_timestamp = start_date + timedelta(seconds=total_records - 1)
+            earliest_timestamp = synthetic_timestamp_at(0, self.timestamp_start, self.timestamp_freq)
+            latest_timestamp = synthetic_timestamp_at(total_records - 1, self.timestamp_start, self.timestamp_freq)
         
         # File size
         file_size = self._format_file_size(os.path.getsize(file_path))
@@ -113,14 +113,10 @@ class DataProcessor:
     
     def save_processed_data(self, df: pd.DataFrame, original_file_path: str) -> str:
         """
-        Save processed DataFrame to a new file
+        Save processed DataFrame to the columnar store (zstd Parquet parts + manifest)
+        and return the dataset directory
         """
-        # Generate new filename
-        base_name = os.path.splitext(os.path.basename(original_file_path))[0]
-        processed_filename = f"{base_name}_processed.csv"
-        processed_file_path = os.path.join(self.data_directory, processed_filename)
-        
-        # Save processed data
-        df.to_csv(processed_file_path, index=False)
-        
-        return processed_file_path
+        with timed("ingest_save"):
+            summary = RunningSummary()
+            summary.update(df)
+            return self.processed_store.write(df, original_file_path, summary.to_dict())
@@ -0,0 +1,251 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from typing import Dict, List, Optional, Tuple
+import json
+import os
+
+from app.services.atomic_json import write_json
+
+# Written next to manifest.json in every processed dataset directory
+TIMESTAMP_INDEX_FILE = "timestamp_index.npy"  # sorted int64 ns timestamps
+FAILURE_CUMSUM_FILE = "failure_cumsum.npy"    # failures among the first k sorted rows, k = 0..n
+DAILY_ROLLUP_FILE = "daily_rollup.json"
+# Appends add index segments; past this many they are merged back into one
+DATE_INDEX_MAX_SEGMENTS = int(os.getenv("DATE_INDEX_MAX_SEGMENTS", "16"))
+# Recorded in the rollup; indexes of an older format are rebuilt. Version 1 counted
+# Response == 1 as a failure, the opposite of the service-wide convention
+DATE_INDEX_VERSION = 2
+
+NS_PER_DAY = 86400 * 10**9
+
+
+def naive_utc(value) -> pd.Timestamp:
+    """
+    Naive timestamp comparable with the index; aware values are converted to UTC first
+    """
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert("UTC").tz_localize(None)
+    return timestamp
+
+
+def _to_ns(value) -> int:
+    return naive_utc(value).value
+
+
+class DateIndexBuilder:
+    """
+    Collects (timestamp, label) pairs chunk by chunk while a dataset is written and, on
+    finish, stores the sorted timestamp index, the failure prefix sums and the per-day
+    rollup so period counts never need another pass over the data
+    """
+
+    def __init__(self, timestamp_column: str, label_column: str):
+        self.timestamp_column = timestamp_column
+        self.label_column = label_column
+        self._timestamps: List[np.ndarray] = []
+        self._failures: List[np.ndarray] = []
+        self.rows = 0
+
+    def add(self, table: pa.Table):
+        self.rows += table.num_rows
+        if self.timestamp_column not in table.column_names or table.num_rows == 0:
+            return
+        column = table[self.timestamp_column]
+        if not pa.types.is_timestamp(column.type):
+            return
+        # Nanoseconds since the epoch (UTC for tz-aware columns)
+        values = column.cast(pa.timestamp("ns", tz=column.type.tz)).cast(pa.int64()).to_numpy(zero_copy_only=False)
+        present = column.is_valid().to_numpy(zero_copy_only=False)
+        if self.label_column in table.column_names:
+            # Response == 1 is a pass, as in the pass rate (label_sum); anything else,
+            # missing labels included, is a failure
+            labels = table[self.label_column].to_numpy(zero_copy_only=False)
+            failures = np.nan_to_num(labels.astype(np.float64), nan=0.0) != 1
+        else:
+            failures = np.ones(table.num_rows, dtype=bool)
+        self._timestamps.append(values[present])
+        self._failures.append(failures[present])
+
+    def finish(self, dataset_path: str, append: bool = False) -> dict:
+        """
+        Write the index and return the rollup. With `append`, the rows collected here
+        become a new segment of the dataset's existing index and their days are merged
+        into its rollup, so the cost is that of the new rows only.
+        """
+        timestamps = np.concatenate(self._timestamps) if self._timestamps else np.empty(0, dtype=np.int64)
+        failures = np.concatenate(self._failures) if self._failures else np.empty(0, dtype=bool)
+        self._timestamps, self._failures = [], []
+
+        order = np.argsort(timestamps, kind="stable")
+        timestamps = timestamps[order]
+        failure_cumsum = np.concatenate(([0], np.cumsum(failures[order], dtype=np.int64)))
+        rollup = _rollup(timestamps, failure_cumsum, self.rows)
+
+        previous = _read_rollup(dataset_path) if append and DateIndex.exists(dataset_path) else None
+        if previous is None:
+            rollup['segments'] = [0]
+            _save_segment(dataset_path, 0, timestamps, failure_cumsum)
+        else:
+            segments = previous.get('segments', [0])
+            if len(timestamps):
+                segments = segments + [max(segments) + 1]
+                _save_segment(dataset_path, segments[-1], timestamps, failure_cumsum)
+            rollup = _merge_rollups(previous, rollup)
+            rollup['segments'] = segments
+            if len(rollup['segments']) > DATE_INDEX_MAX_SEGMENTS:
+                _compact(dataset_path, rollup)
+
+        _write_rollup(dataset_path, rollup)
+        return rollup
+
+
+def _segment_files(segment: int) -> Tuple[str, str]:
+    if segment == 0:
+        return TIMESTAMP_INDEX_FILE, FAILURE_CUMSUM_FILE
+    return (TIMESTAMP_INDEX_FILE.replace(".npy", f"-{segment:05d}.npy"),
+            FAILURE_CUMSUM_FILE.replace(".npy", f"-{segment:05d}.npy"))
+
+
+def _save_segment(dataset_path: str, segment: int, timestamps: np.ndarray, failure_cumsum: np.ndarray):
+    timestamp_file, failure_file = _segment_files(segment)
+    np.save(os.path.join(dataset_path, timestamp_file), timestamps)
+    np.save(os.path.join(dataset_path, failure_file), failure_cumsum)
+
+
+def _rollup(timestamps: np.ndarray, failure_cumsum: np.ndarray, rows: int) -> dict:
+    # Per-day rollup: run lengths of the sorted day numbers
+    days, starts, counts = np.unique(timestamps // NS_PER_DAY, return_index=True, return_counts=True)
+    day_failures = failure_cumsum[starts + counts] - failure_cumsum[starts]
+    return {
+        'version': DATE_INDEX_VERSION,
+        'rows': int(rows),
+        'indexed_rows': int(len(timestamps)),
+        'earliest': pd.Timestamp(int(timestamps[0])).isoformat() if len(timestamps) else None,
+        'latest': pd.Timestamp(int(timestamps[-1])).isoformat() if len(timestamps) else None,
+        'days': [{'date': pd.Timestamp(int(day) * NS_PER_DAY).strftime("%Y-%m-%d"), 'count': int(count),
+                  'pass': int(count - failed), 'fail': int(failed)}
+                 for day, count, failed in zip(days, counts, day_failures)]
+    }
+
+
+def _merge_rollups(previous: dict, delta: dict) -> dict:
+    days = {day['date']: dict(day) for day in previous['days']}
+    for day in delta['days']:
+        merged = days.setdefault(day['date'], {'date': day['date'], 'count': 0, 'pass': 0, 'fail': 0})
+        for key in ('count', 'pass', 'fail'):
+            merged[key] += day[key]
+    bounds = [value for value in (previous['earliest'], previous['latest'], delta['earliest'], delta['latest'])
+              if value is not None]
+    return {
+        'version': DATE_INDEX_VERSION,
+        'rows': previous['rows'] + delta['rows'],
+        'indexed_rows': previous['indexed_rows'] + delta['indexed_rows'],
+        'earliest': min(bounds, key=pd.Timestamp) if bounds else None,
+        'latest': max(bounds, key=pd.Timestamp) if bounds else None,
+        'days': [days[date] for date in sorted(days)]
+    }
+
+
+def _compact(dataset_path: str, rollup: dict):
+    """
+    Merge every segment back into segment 0 (amortised over DATE_INDEX_MAX_SEGMENTS appends)
+    """
+    index = DateIndex(dataset_path, rollup)
+    timestamps = np.concatenate([np.asarray(t) for t in index.segments_timestamps])
+    failures = np.concatenate([np.diff(np.asarray(c)).astype(bool) for c in index.segments_failure_cumsum])
+    order = np.argsort(timestamps, kind="stable")
+    failure_cumsum = np.concatenate(([0], np.cumsum(failures[order], dtype=np.int64)))
+    old_segments = rollup['segments']
+    _save_segment(dataset_path, 0, timestamps[order], failure_cumsum)
+    rollup['segments'] = [0]
+    _write_rollup(dataset_path, rollup)
+    for segment in old_segments:
+        if segment != 0:
+            for file_name in _segment_files(segment):
+                os.remove(os.path.join(dataset_path, file_name))
+
+
+def _read_rollup(dataset_path: str) -> dict:
+    with open(os.path.join(dataset_path, DAILY_ROLLUP_FILE)) as fh:
+        return json.load(fh)
+
+
+def _write_rollup(dataset_path: str, rollup: dict):
+    write_json(os.path.join(dataset_path, DAILY_ROLLUP_FILE), rollup)
+
+
+class DateIndex:
+    """
+    Read side of the date index: every period count is two binary searches per
+    memory-mapped sorted segment, independent of the dataset size
+    """
+
+    def __init__(self, dataset_path: str, rollup: Optional[dict] = None):
+        self.dataset_path = dataset_path
+        self.rollup = rollup if rollup is not None else _read_rollup(dataset_path)
+        self.segments_timestamps = []
+        self.segments_failure_cumsum = []
+        for segment in self.rollup.get('segments', [0]):
+            timestamp_file, failure_file = _segment_files(segment)
+            self.segments_timestamps.append(np.load(os.path.join(dataset_path, timestamp_file), mmap_mode="r"))
+            self.segments_failure_cumsum.append(np.load(os.path.join(dataset_path, failure_file), mmap_mode="r"))
+
+    @staticmethod
+    def exists(dataset_path: str) -> bool:
+        """
+        Whether the dataset has an index of the current format
+        """
+        try:
+            return _read_rollup(dataset_path).get('version') == DATE_INDEX_VERSION
+        except FileNotFoundError:
+            return False
+
+    @staticmethod
+    def remove(dataset_path: str):
+        """
+        Delete the dataset's index files, every segment included
+        """
+        prefixes = tuple(os.path.splitext(name)[0] for name in (TIMESTAMP_INDEX_FILE, FAILURE_CUMSUM_FILE))
+        for file_name in os.listdir(dataset_path):
+            if file_name == DAILY_ROLLUP_FILE or (file_name.startswith(prefixes) and file_name.endswith(".npy")):
+                os.remove(os.path.join(dataset_path, file_name))
+
+    @property
+    def bounds(self) -> Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+        non_empty = [timestamps for timestamps in self.segments_timestamps if len(timestamps)]
+        if not non_empty:
+            return None, None
+        return (pd.Timestamp(int(min(timestamps[0] for timestamps in non_empty))),
+                pd.Timestamp(int(max(timestamps[-1] for timestamps in non_empty))))
+
+    def count(self, start, end) -> Dict[str, int]:
+        """
+        Rows, passes and failures with start <= timestamp <= end (None = unbounded)
+        """
+        # Inclusive on both ends, like the period checks in the .NET DateRangeService
+        low_ns = None if start is None else _to_ns(start)
+        high_ns = None if end is None else _to_ns(end)
+        count = failed = 0
+        for timestamps, failure_cumsum in zip(self.segments_timestamps, self.segments_failure_cumsum):
+            low = 0 if low_ns is None else int(np.searchsorted(timestamps, low_ns, side="left"))
+            high = len(timestamps) if high_ns is None else int(np.searchsorted(timestamps, high_ns, side="right"))
+            high = max(low, high)
+            count += high - low
+            failed += int(failure_cumsum[high] - failure_cumsum[low])
+        return {'count': count, 'pass': count - failed, 'fail': failed}
+
+    def daily(self, start=None, end=None) -> List[dict]:
+        """
+        Per-day rollup rows, zero-filled over [start, end] (defaults: the dataset's days)
+        """
+        by_date = {day['date']: day for day in self.rollup['days']}
+        earliest, latest = self.bounds
+        first = pd.Timestamp(_to_ns(start)) if start is not None else earliest
+        last = pd.Timestamp(_to_ns(end)) if end is not None else latest
+        if first is None or last is None:
+            return []
+        return [by_date.get(day.strftime("%Y-%m-%d"),
+                            {'date': day.strftime("%Y-%m-%d"), 'count': 0, 'pass': 0, 'fail': 0})
+                for day in pd.date_range(first.normalize(), last.normalize(), freq="D")]
@@ -0,0 +1,135 @@
+import numpy as np
+from typing import Any, Dict, List, Optional
+import os
+
+from app.services.processed_store import ProcessedDataStore, TimeWindow
+
+# Columns missing in more than this fraction of rows are dropped
+FEATURE_MAX_MISSING_RATIO = float(os.getenv("FEATURE_MAX_MISSING_RATIO", "0.95"))
+# Columns whose variance (over present values) is at or below this are dropped; 0 = constant only
+FEATURE_MIN_VARIANCE = float(os.getenv("FEATURE_MIN_VARIANCE", "0.0"))
+# Keep only the k most important survivors by tree gain; 0 disables the importance stage
+FEATURE_TOP_K = int(os.getenv("FEATURE_TOP_K", "0"))
+FEATURE_IMPORTANCE_SAMPLE_ROWS = int(os.getenv("FEATURE_IMPORTANCE_SAMPLE_ROWS", "50000"))
+
+# TrainModelRequest fields consumed by this stage rather than by MLModelService.train_model
+SELECTION_PARAMS = ("feature_selection", "max_missing_ratio", "min_variance", "top_k_features")
+
+
+class _ColumnMoments:
+    """
+    Present-value count, mean and M2 of one column, merged batch by batch (Chan et al.)
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values: np.ndarray):
+        present = values[~np.isnan(values)]
+        n = present.size
+        if n == 0:
+            return
+        batch_mean = float(present.mean())
+        batch_m2 = float(((present - batch_mean) ** 2).sum())
+        total = self.count + n
+        delta = batch_mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += batch_m2 + delta * delta * self.count * n / total
+        self.count = total
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / self.count if self.count else 0.0
+
+
+def _scan_moments(dataset_path: str, columns: List[str],
+                  window: Optional[TimeWindow] = None) -> Dict[str, _ColumnMoments]:
+    """
+    One streamed pass over the requested columns, a row batch at a time
+    """
+    moments = {column: _ColumnMoments() for column in columns}
+    for batch in ProcessedDataStore.iter_batches(dataset_path, columns, window):
+        for column in batch.schema.names:
+            values = batch.column(column).to_numpy(zero_copy_only=False).astype(np.float64, copy=False)
+            moments[column].update(values)
+    return moments
+
+
+def _importance_ranking(dataset_path: str, columns: List[str], target_column: str,
+                        n_jobs: Optional[int] = None, window: Optional[TimeWindow] = None) -> Dict[str, float]:
+    """
+    Total gain per column from a small XGBoost fit on a leading sample of the dataset.
+    XGBoost handles NaN natively, so no imputation or scaling is needed for the ranking.
+    """
+    import xgboost as xgb
+
+    sample = ProcessedDataStore.read_frame(dataset_path, columns + [target_column],
+                                           row_stop=FEATURE_IMPORTANCE_SAMPLE_ROWS, window=window)
+    y = sample[target_column].fillna(0).astype(int)
+    if y.nunique() < 2:
+        return {column: 0.0 for column in columns}
+    ranker = xgb.XGBClassifier(n_estimators=50, max_depth=6, learning_rate=0.3, tree_method='hist',
+                               importance_type='total_gain', n_jobs=n_jobs or os.cpu_count() or 1,
+                               random_state=42)
+    ranker.fit(sample[columns].to_numpy(dtype=np.float32), y)
+    return dict(zip(columns, (float(v) for v in ranker.feature_importances_)))
+
+
+def select_features(dataset_path: str, candidate_columns: List[str], target_column: str = 'Response',
+                    max_missing_ratio: Optional[float] = None, min_variance: Optional[float] = None,
+                    top_k_features: Optional[int] = None, n_jobs: Optional[int] = None,
+                    window: Optional[TimeWindow] = None) -> Dict[str, Any]:
+    """
+    Choose the training/serving columns of a processed dataset (or of the rows in a
+    training time window).
+
+    Stages run cheapest first so each one only looks at the survivors of the last:
+    missingness from Parquet statistics (no data read), variance from one streamed
+    pass, then optionally the top-k columns by tree gain on a row sample. Row-group
+    statistics cover more than a window, so windowed selection takes missingness
+    from the streamed pass instead.
+    """
+    max_missing_ratio = FEATURE_MAX_MISSING_RATIO if max_missing_ratio is None else max_missing_ratio
+    min_variance = FEATURE_MIN_VARIANCE if min_variance is None else min_variance
+    top_k_features = FEATURE_TOP_K if top_k_features is None else top_k_features
+    if window is None:
+        total_rows = ProcessedDataStore.manifest(dataset_path)['total_records']
+        null_counts = ProcessedDataStore.null_counts(dataset_path, candidate_columns)
+        to_scan = [c for c in candidate_columns
+                   if null_counts[c] is None or not total_rows or null_counts[c] / total_rows <= max_missing_ratio]
+    else:
+        total_rows = ProcessedDataStore.date_index(dataset_path).count(*window)['count']
+        to_scan = list(candidate_columns)
+    moments = _scan_moments(dataset_path, to_scan, window)
+
+    dropped_missing = [c for c in candidate_columns if c not in moments]
+    dropped_constant = []
+    survivors = []
+    for column in to_scan:
+        missing_ratio = 1.0 - moments[column].count / total_rows if total_rows else 1.0
+        if missing_ratio > max_missing_ratio:
+            dropped_missing.append(column)
+        elif moments[column].variance <= min_variance:
+            dropped_constant.append(column)
+        else:
+            survivors.append(column)
+
+    dropped_importance = []
+    if top_k_features and len(survivors) > top_k_features:
+        gains = _importance_ranking(dataset_path, survivors, target_column, n_jobs, window)
+        ranked = sorted(survivors, key=lambda c: gains[c], reverse=True)
+        keep = set(ranked[:top_k_features])
+        dropped_importance = ranked[top_k_features:]
+        survivors = [c for c in survivors if c in keep]
+
+    return {
+        'selected_columns': survivors,
+        'candidate_count': len(candidate_columns),
+        'selected_count': len(survivors),
+        'thresholds': {'max_missing_ratio': max_missing_ratio, 'min_variance': min_variance,
+                       'top_k_features': top_k_features},
+        'dropped': {'missing': dropped_missing, 'constant': dropped_constant,
+                    'low_importance': dropped_importance}
+    }
@@ -0,0 +1,279 @@
+import numpy as np
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+import json
+import os
+import sys
+
+if TYPE_CHECKING:
+    import lightgbm as lgb
+    import xgboost as xgb
+
+# "fused" compiles the scaler into the trees; "standard" is MLModelService.predict_batch.
+# New models serve through the standard path unless INFERENCE_BACKEND=fused opts in
+INFERENCE_BACKENDS = ("standard", "fused")
+DEFAULT_INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "standard")
+# A fused model is only selected when it reproduces the standard path on a training sample
+PARITY_SAMPLE_ROWS = int(os.getenv("FUSED_PARITY_SAMPLE_ROWS", "2000"))
+PARITY_PROBABILITY_TOLERANCE = float(os.getenv("FUSED_PARITY_TOLERANCE", "1e-4"))
+PARITY_MAX_PROBABILITY_DIFFERENCE = float(os.getenv("FUSED_PARITY_MAX_DIFFERENCE", "1e-3"))
+PARITY_MIN_CLASS_AGREEMENT = float(os.getenv("FUSED_PARITY_MIN_AGREEMENT", "0.999"))
+
+# LightGBM decision_type bits 2-3: missing value handling of a numerical split
+_LGB_MISSING_NAN = 2
+# Float32 steps a folded threshold may move to land on the exact boundary
+_BOUNDARY_SEARCH_STEPS = 64
+
+
+class FusedTreeModel:
+    """
+    Inference-only copy of a trained MLModelService model with the StandardScaler
+    folded into the split thresholds.
+
+    Scaling is monotonic per feature, so a split `(x - mean) / scale < t` is the same
+    split as `x < t * scale + mean`. After rewriting every threshold the booster scores
+    raw float32 features directly: no scaled copy of the input, no DataFrame, and one
+    tree walk that yields the probability the class is derived from.
+
+    Missing values are imputed as on the standard path: with the training means for
+    dense models, and for NaN-native LightGBM models with 0.0 on the features LightGBM
+    itself maps NaN to 0.0 for (those trained without missing values).
+    """
+
+    def __init__(self, model_type: str, booster, impute_values: np.ndarray, iteration_limit: int = 0):
+        self.model_type = model_type
+        self.booster = booster
+        self.n_features = len(impute_values)
+        self.iteration_limit = iteration_limit
+        # impute_values holds one value per feature, NaN where missing values stay missing
+        self._impute_columns = np.flatnonzero(~np.isnan(impute_values))
+        self._impute_values = impute_values.astype(np.float32)[self._impute_columns]
+
+    @classmethod
+    def from_service(cls, service) -> "FusedTreeModel":
+        """
+        Compile a trained (or loaded) MLModelService into a fused model
+        """
+        if service.model is None:
+            raise ValueError("Model not trained. Please train the model first.")
+        if service.scaler is None:
+            # NaN-native model trained on raw values: folding is the identity
+            n_features = service.model.n_features_in_
+            mean, scale = np.zeros(n_features), np.ones(n_features)
+            impute = None
+        else:
+            mean = np.asarray(service.scaler.mean_, dtype=np.float64)
+            scale = np.asarray(service.scaler.scale_, dtype=np.float64)
+            impute = np.asarray(service.feature_means, dtype=np.float64)
+        if not (np.all(np.isfinite(mean)) and np.all(np.isfinite(scale)) and np.all(scale > 0)):
+            raise ValueError("Scaler statistics are not finite; the scaler cannot be folded into the model")
+
+        # A trained or unpickled model has already imported its library; checking the
+        # other one must not import it
+        xgboost, lightgbm = sys.modules.get('xgboost'), sys.modules.get('lightgbm')
+        if xgboost is not None and isinstance(service.model, xgboost.XGBClassifier):
+            return cls._from_xgboost(service.model, mean, scale, impute)
+        if lightgbm is not None and isinstance(service.model, lightgbm.LGBMClassifier):
+            return cls._from_lightgbm(service.model, mean, scale, impute)
+        raise ValueError(f"Unsupported model class for fused inference: {type(service.model).__name__}")
+
+    @classmethod
+    def _from_xgboost(cls, model: "xgb.XGBClassifier", mean: np.ndarray, scale: np.ndarray,
+                      impute: Optional[np.ndarray]) -> "FusedTreeModel":
+        import xgboost as xgb
+
+        booster = model.get_booster()
+        document = json.loads(booster.save_raw(raw_format="json"))
+        if impute is not None:
+            # XGBoost compares float32 features with float32 conditions: where an imputed
+            # value goes on the standard path, in scaled space
+            imputed_scaled = ((impute - mean) / scale).astype(np.float32)
+            imputed = impute.astype(np.float32)
+        for tree in document['learner']['gradient_booster']['model']['trees']:
+            conditions = np.asarray(tree['split_conditions'], dtype=np.float64)
+            features = np.asarray(tree['split_indices'], dtype=np.intp)
+            internal = np.asarray(tree['left_children']) != -1  # leaves store their weight here
+            scaled = conditions[internal]
+            split_features = features[internal]
+            folded = _xgboost_conditions(scaled, mean[split_features], scale[split_features])
+            if impute is not None:
+                # Imputed values arrive as float32(mean), which can fall on the other side
+                # of a folded condition than the scaled mean did; send them the same way
+                value = imputed[split_features]
+                goes_left = imputed_scaled[split_features] < scaled.astype(np.float32)
+                known = ~np.isnan(value)
+                folded = np.where(known & goes_left & ~(value < folded),
+                                  np.nextafter(value, np.float32(np.inf)), folded)
+                folded = np.where(known & ~goes_left & (value < folded), value, folded)
+            conditions[internal] = folded.astype(np.float64)
+            tree['split_conditions'] = conditions.tolist()
+
+        fused = xgb.Booster(model_file=bytearray(json.dumps(document).encode()))
+        fused.set_param({'nthread': model.n_jobs or os.cpu_count() or 1})
+        # Same trees as XGBClassifier.predict_proba, which stops at the early-stopping best round
+        best_iteration = booster.attr('best_iteration')
+        iteration_limit = int(best_iteration) + 1 if best_iteration is not None else 0
+        impute = impute if impute is not None else np.full(len(mean), np.nan)
+        return cls('xgboost', fused, impute, iteration_limit=iteration_limit)
+
+    @classmethod
+    def _from_lightgbm(cls, model: "lgb.LGBMClassifier", mean: np.ndarray, scale: np.ndarray,
+                       impute: Optional[np.ndarray]) -> "FusedTreeModel":
+        import lightgbm as lgb
+
+        num_iteration = model.best_iteration_ or None
+        # NaN-native models: LightGBM's own NaN -> 0.0 (only for features that are not NaN-aware)
+        reference = impute if impute is not None else np.zeros(len(mean))
+        reference_scaled = (reference - mean) / scale
+        reference_float32 = reference.astype(np.float32).astype(np.float64)
+        lines = model.booster_.model_to_string(num_iteration=num_iteration).splitlines()
+        nan_aware = set()
+        split_features: List[int] = []
+        rewritten = []
+        for line in lines:
+            if line.startswith('tree_sizes='):
+                # Byte offsets of the original tree blocks; LightGBM parses sequentially without them
+                continue
+            if line.startswith('split_feature='):
+                split_features = [int(v) for v in line.split('=', 1)[1].split()]
+            elif line.startswith('threshold='):
+                scaled = np.array(line.split('=', 1)[1].split(), dtype=np.float64)
+                features = np.asarray(split_features, dtype=np.intp)
+                thresholds = _lightgbm_thresholds(scaled, mean[features], scale[features]).astype(np.float64)
+                # Imputed missing values arrive as float32(mean) rather than exactly mean, so
+                # thresholds LightGBM placed around the scaled mean must send it the same way
+                imputed = reference_float32[features]
+                goes_left = reference_scaled[features] <= scaled
+                known = ~np.isnan(imputed)
+                thresholds = np.where(known & goes_left & (imputed > thresholds), imputed, thresholds)
+                thresholds = np.where(known & ~goes_left & (imputed <= thresholds),
+                                      np.nextafter(imputed, -np.inf), thresholds)
+                line = 'threshold=' + ' '.join(repr(float(t)) for t in thresholds)
+            elif line.startswith('decision_type='):
+                for feature, decision in zip(split_features, line.split('=', 1)[1].split()):
+                    if (int(decision) >> 2) & 3 == _LGB_MISSING_NAN:
+                        nan_aware.add(feature)
+            rewritten.append(line)
+
+        fused = lgb.Booster(model_str='\n'.join(rewritten) + '\n')
+        if impute is None:
+            impute = np.array([np.nan if j in nan_aware else 0.0 for j in range(len(mean))])
+        return cls('lightgbm', fused, impute)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Positive-class probability for an (n_rows, n_features) array in model feature order
+        """
+        source = X
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} feature values per row, got {X.shape[1]}")
+        if X.shape[0] == 0:
+            return np.empty(0, dtype=np.float32)
+
+        if self._impute_columns.size:
+            block = X[:, self._impute_columns]
+            missing = np.isnan(block)
+            if missing.any():
+                if np.shares_memory(X, source):
+                    X = X.copy()
+                X[:, self._impute_columns] = np.where(missing, self._impute_values, block)
+        if self.model_type == 'xgboost':
+            return self.booster.inplace_predict(X, iteration_range=(0, self.iteration_limit))
+        return self.booster.predict(X)
+
+    def predict_batch(self, X: np.ndarray, threshold: float = 0.5) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Same contract as MLModelService.predict_batch: (int8 classes, float64 probabilities)
+        """
+        probabilities = np.asarray(self.predict_proba(X), dtype=np.float64)
+        return (probabilities >= threshold).astype(np.int8), probabilities
+
+
+def _xgboost_conditions(scaled: np.ndarray, mean: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    """
+    Raw-space float32 split conditions: for every float32 x, `x < condition` exactly when
+    the standard path sends x left, i.e. float32((x - mean) / scale) < float32(scaled).
+    `scaled * scale + mean` is within a few float32 steps of that boundary; the search
+    walks the rest, since rows sitting on a histogram cut value are common.
+    """
+    target = scaled.astype(np.float32)
+
+    def goes_left(x: np.ndarray) -> np.ndarray:
+        return ((x.astype(np.float64) - mean) / scale).astype(np.float32) < target
+
+    condition = (scaled * scale + mean).astype(np.float32)
+    for _ in range(_BOUNDARY_SEARCH_STEPS):
+        # The condition itself must go right and the float32 below it left
+        up = goes_left(condition)
+        down = ~up & ~goes_left(np.nextafter(condition, np.float32(-np.inf)))
+        if not (up.any() or down.any()):
+            break
+        condition = np.where(up, np.nextafter(condition, np.float32(np.inf)),
+                             np.where(down, np.nextafter(condition, np.float32(-np.inf)), condition))
+    return condition
+
+
+def _lightgbm_thresholds(scaled: np.ndarray, mean: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    """
+    Raw-space float32 thresholds: for every float32 x, `x <= threshold` exactly when the
+    standard path sends x left, i.e. (x - mean) / scale <= scaled in float64
+    """
+    def goes_left(x: np.ndarray) -> np.ndarray:
+        return (x.astype(np.float64) - mean) / scale <= scaled
+
+    threshold = (scaled * scale + mean).astype(np.float32)
+    for _ in range(_BOUNDARY_SEARCH_STEPS):
+        # The threshold itself must go left and the float32 above it right
+        down = ~goes_left(threshold)
+        up = ~down & goes_left(np.nextafter(threshold, np.float32(np.inf)))
+        if not (up.any() or down.any()):
+            break
+        threshold = np.where(down, np.nextafter(threshold, np.float32(-np.inf)),
+                             np.where(up, np.nextafter(threshold, np.float32(np.inf)), threshold))
+    return threshold
+
+
+def parity_report(reference, fused: FusedTreeModel, X: np.ndarray) -> Dict[str, float]:
+    """
+    Compare a fused model with the standard path on the same rows
+    """
+    reference_classes, reference_probabilities = reference.predict_batch(X)
+    fused_classes, fused_probabilities = fused.predict_batch(X)
+    rows = int(len(reference_probabilities))
+    if rows == 0:
+        return {'rows': 0, 'max_probability_difference': 0.0, 'p99_probability_difference': 0.0,
+                'class_agreement': 1.0, 'passed': True}
+    # Folded thresholds are exact for float32 inputs; values float32 cannot represent are
+    # rounded first and may take the other branch of a split right next to them. Every
+    # row must stay within the max difference, the bulk within the (tighter) p99 tolerance
+    difference = np.abs(reference_probabilities - fused_probabilities)
+    max_difference = float(difference.max())
+    p99_difference = float(np.percentile(difference, 99))
+    agreement = float(np.mean(reference_classes == fused_classes))
+    return {
+        'rows': rows,
+        'max_probability_difference': max_difference,
+        'p99_probability_difference': p99_difference,
+        'class_agreement': agreement,
+        'passed': (max_difference <= PARITY_MAX_PROBABILITY_DIFFERENCE
+                   and p99_difference <= PARITY_PROBABILITY_TOLERANCE
+                   and agreement >= PARITY_MIN_CLASS_AGREEMENT)
+    }
+
+
+def select_inference_backend(service, sample: np.ndarray,
+                             preferred: str = DEFAULT_INFERENCE_BACKEND) -> Tuple[str, Optional[Dict[str, float]]]:
+    """
+    Backend to record for a freshly trained model: the preferred one, unless that is
+    "fused" and the fused model fails to compile or to match the standard path. The
+    parity report is returned either way, so switching a version to "fused" later can
+    be judged by it.
+    """
+    try:
+        fused = FusedTreeModel.from_service(service)
+    except ValueError as e:
+        return 'standard', {'passed': False, 'error': str(e)}
+    report = parity_report(service, fused, sample)
+    return ('fused' if preferred == 'fused' and report['passed'] else 'standard'), report
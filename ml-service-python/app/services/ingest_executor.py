@@ -0,0 +1,144 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import IO, Any, Callable, Iterable, List, Optional
+import asyncio
+import hashlib
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: keys and the limit only hold within each worker process
+    fcntl = None
+
+from app.services.metrics import REGISTRY
+
+# Ingests (upload copy, CSV parse, timestamps, Parquet write) running at once across the
+# worker processes sharing a lock directory; a request beyond that is rejected (HTTP 429)
+# instead of queueing behind them
+INGEST_MAX_CONCURRENT = int(os.getenv("INGEST_MAX_CONCURRENT", "2"))
+
+INGESTS = REGISTRY.counter("ingests_total", "Ingest requests by outcome (admitted, rejected, busy)", ("outcome",))
+
+
+class IngestLimitExceeded(Exception):
+    """
+    Raised when INGEST_MAX_CONCURRENT ingests are already running
+    """
+
+
+class IngestBusy(Exception):
+    """
+    Raised when a running ingest already writes the dataset a new one would write
+    """
+
+
+class IngestExecutor:
+    """
+    Runs ingests on a bounded thread pool so the event loop keeps answering health
+    checks, predictions and streams while a large file is parsed.
+
+    Admission never waits: with `max_concurrent` ingests in flight, run() raises
+    IngestLimitExceeded. A slot is freed when the ingest itself finishes, not when its
+    caller stops waiting, so a client that hangs up does not let another ingest start
+    alongside the one still running for it.
+
+    Each ingest also holds `keys` (the datasets it writes); one that needs a key held by
+    a running ingest raises IngestBusy, as two writers of one dataset would corrupt it.
+
+    With a `lock_directory` the keys and the slots are also flock()ed files in it, so
+    they hold across every worker process using that directory. The kernel drops the
+    locks of a worker that dies mid-ingest.
+    """
+
+    def __init__(self, max_concurrent: int = INGEST_MAX_CONCURRENT, lock_directory: Optional[str] = None):
+        self.max_concurrent = max(1, max_concurrent)
+        self.lock_directory = lock_directory if fcntl is not None else None
+        if self.lock_directory:
+            os.makedirs(self.lock_directory, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix="ingest")
+        self._lock = threading.Lock()
+        self._active = 0
+        self._keys = set()
+
+    @property
+    def active(self) -> int:
+        with self._lock:
+            return self._active
+
+    def submit(self, fn: Callable[..., Any], *args, keys: Iterable[str] = ()) -> Future:
+        keys = frozenset(keys)
+        with self._lock:
+            try:
+                busy = keys & self._keys
+                if busy:
+                    raise IngestBusy(f"{', '.join(sorted(busy))} is already being ingested")
+                if self._active >= self.max_concurrent:
+                    raise IngestLimitExceeded(f"{self._active} ingests already running "
+                                              f"(INGEST_MAX_CONCURRENT={self.max_concurrent}); retry later")
+                lock_files = self._lock_files(keys)
+            except IngestBusy:
+                INGESTS.inc(outcome="busy")
+                raise
+            except IngestLimitExceeded:
+                INGESTS.inc(outcome="rejected")
+                raise
+            self._active += 1
+            self._keys |= keys
+        INGESTS.inc(outcome="admitted")
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._release(keys, lock_files)
+            raise
+        future.add_done_callback(lambda _: self._release(keys, lock_files))
+        return future
+
+    async def run(self, fn: Callable[..., Any], *args, keys: Iterable[str] = ()) -> Any:
+        """
+        Run `fn(*args)` on the pool and await its result
+        """
+        return await asyncio.wrap_future(self.submit(fn, *args, keys=keys))
+
+    def _lock_files(self, keys: frozenset) -> List[IO]:
+        """
+        Lock every key, then one of the `max_concurrent` slots, without waiting; the
+        returned files hold the locks until closed
+        """
+        if not self.lock_directory:
+            return []
+        held = []
+        try:
+            for key in sorted(keys):
+                name = hashlib.sha256(key.encode()).hexdigest()[:32]
+                if not _try_lock(os.path.join(self.lock_directory, f"key-{name}.lock"), held):
+                    raise IngestBusy(f"{key} is already being ingested by another worker")
+            for slot in range(self.max_concurrent):
+                if _try_lock(os.path.join(self.lock_directory, f"slot-{slot}.lock"), held):
+                    return held
+            raise IngestLimitExceeded(f"{self.max_concurrent} ingests already running across workers "
+                                      f"(INGEST_MAX_CONCURRENT={self.max_concurrent}); retry later")
+        except BaseException:
+            for fh in held:
+                fh.close()
+            raise
+
+    def _release(self, keys: frozenset, lock_files: List[IO]):
+        for fh in lock_files:
+            fh.close()
+        with self._lock:
+            self._active -= 1
+            self._keys -= keys
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+def _try_lock(path: str, held: List[IO]) -> bool:
+    fh = open(path, "a")
+    try:
+        fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        fh.close()
+        return False
+    held.append(fh)
+    return True
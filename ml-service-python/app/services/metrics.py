@@ -0,0 +1,365 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import os
+import resource
+import threading
+import time
+
+# Prometheus text exposition format, version 0.0.4 (the response adds charset=utf-8)
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4"
+METRICS_NAMESPACE = "mlservice"
+
+# Upper bounds in seconds; request latencies and pipeline stages (ingest, training) share one ladder
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+                   30.0, 60.0, 120.0, 300.0, 600.0)
+
+Sample = Tuple[Dict[str, str], float]
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Sample]]]]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> tuple:
+        # Hot path: label values are used as given, so pass strings
+        try:
+            if len(labels) == len(self.labelnames):
+                return tuple(map(labels.__getitem__, self.labelnames))
+        except KeyError:
+            pass
+        raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """
+    Monotonically increasing count per label set
+    """
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        return [(self.name, dict(zip(self.labelnames, key)), value) for key, value in values.items()]
+
+
+class Gauge(_Metric):
+    """
+    Value per label set that can go up and down
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[tuple, float] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        return [(self.name, dict(zip(self.labelnames, key)), value) for key, value in values.items()]
+
+
+class Histogram(_Metric):
+    """
+    Bucketed distribution (plus sum and count) per label set; bucket bounds are inclusive
+    upper limits, rendered cumulatively as Prometheus expects
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts (last = +Inf), sum, count]
+        self._series: Dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self, **labels) -> Optional[dict]:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            if series is None:
+                return None
+            return {'count': series[2], 'sum': series[1]}
+
+    def samples(self):
+        with self._lock:
+            series = {key: (list(counts), total, count) for key, (counts, total, count) in self._series.items()}
+        samples = []
+        for key, (counts, total, count) in series.items():
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                samples.append((f"{self.name}_bucket", dict(labels, le=_format_value(bound)), cumulative))
+            samples.append((f"{self.name}_sum", labels, total))
+            samples.append((f"{self.name}_count", labels, count))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    Process-wide metrics plus collectors that read existing counters (caches, queues)
+    at scrape time, so the code that owns them does not have to report them
+    """
+
+    def __init__(self, namespace: str = METRICS_NAMESPACE):
+        self.namespace = namespace
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Collector] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric '{metric.name}' is already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def _name(self, name: str) -> str:
+        return f"{self.namespace}_{name}" if self.namespace else name
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self._name(name), documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(self._name(name), documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(self._name(name), documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Collector):
+        """
+        `collector()` yields (name, type, help, [(labels, value), ...]) per metric family;
+        names are prefixed with the namespace like registered metrics
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        for collector in collectors:
+            for name, kind, documentation, samples in collector():
+                name = self._name(name)
+                lines.append(f"# HELP {name} {_escape(documentation)}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds", "Request latency by route template, until the response body is sent",
+    ("method", "route", "status"))
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "Requests currently being handled")
+HTTP_REQUESTS_IN_FLIGHT.set(0)
+# ingest_parse, ingest_timestamps, ingest_metadata, ingest_save, train_feature_selection, train_fit,
+# train_register, train_total, predict
+STAGE_SECONDS = REGISTRY.histogram(
+    "stage_duration_seconds", "Time spent in a hot-path stage, one observation per ingest, training run or "
+    "model call", ("stage",))
+PREDICTED_ROWS = REGISTRY.counter("predicted_rows_total", "Rows scored by model calls", ("source",))
+
+
+@contextmanager
+def timed(stage: str, timings: Optional[Dict[str, float]] = None):
+    """
+    Time the block as `stage`. With a `timings` dict the seconds are added to it instead
+    of being observed, so a stage that runs once per chunk is reported once per ingest
+    (see observe_stages), and work done in another process can be shipped back.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if timings is None:
+            STAGE_SECONDS.observe(elapsed, stage=stage)
+        else:
+            timings[stage] = timings.get(stage, 0.0) + elapsed
+
+
+def timed_iter(iterable: Iterable, stage: str, timings: Optional[Dict[str, float]] = None):
+    """
+    Yield from `iterable`, timing each step as `stage` (e.g. the parse behind a chunked reader)
+    """
+    iterator = iter(iterable)
+    while True:
+        with timed(stage, timings):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def observe_stages(timings: Optional[Dict[str, float]]):
+    for stage, seconds in (timings or {}).items():
+        STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route latency and in-flight requests, and feeding the
+    optional SamplingProfiler. Latency runs until the last body chunk is sent, so
+    Server-Sent Events routes report their stream duration.
+    """
+
+    def __init__(self, app, router, profiler=None):
+        self.app = app
+        self.router = router
+        self.profiler = profiler if profiler is not None and profiler.enabled else None
+        self._templates: Dict[object, str] = {}
+
+    def route_template(self, scope) -> str:
+        """
+        Path template of the route that handled the request (/train-jobs/{job_id}), so
+        label values stay bounded. The router leaves the matched endpoint in the scope.
+        """
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        template = self._templates.get(endpoint)
+        if template is None:
+            self._templates = {getattr(route, "endpoint", getattr(route, "app", None)): route.path
+                               for route in self.router.routes if hasattr(route, "path")}
+            template = self._templates.setdefault(endpoint, "unmatched")
+        return template
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        token = self.profiler.begin() if self.profiler is not None else None
+        response = {'status': 500, 'stream': False}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response['status'] = message["status"]
+                if token is not None:
+                    content_type = dict(message.get("headers", [])).get(b"content-type", b"")
+                    response['stream'] = content_type.startswith(b"text/event-stream")
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            elapsed = time.perf_counter() - start
+            route = self.route_template(scope)
+            HTTP_REQUEST_SECONDS.observe(elapsed, method=scope["method"], route=route,
+                                         status=str(response['status']))
+            if token is not None:
+                # Event streams are slow by design; their profiles would only show waiting
+                self.profiler.end(token, scope["method"], scope["path"], response['status'], elapsed,
+                                  discard=response['stream'])
+
+
+def process_rss_bytes() -> int:
+    """
+    Current resident set size; falls back to the peak where /proc is unavailable
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return process_peak_rss_bytes()
+
+
+def process_peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+_PROCESS_START = time.time()
+
+
+def _process_metrics():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    yield "process_resident_memory_bytes", "gauge", "Resident set size", [({}, process_rss_bytes())]
+    yield "process_peak_resident_memory_bytes", "gauge", "Peak resident set size", \
+        [({}, process_peak_rss_bytes())]
+    yield "process_cpu_seconds_total", "counter", "User plus system CPU time", \
+        [({}, round(usage.ru_utime + usage.ru_stime, 6))]
+    yield "process_start_time_seconds", "gauge", "Start time since the epoch", [({}, round(_PROCESS_START, 3))]
+    yield "process_threads", "gauge", "Live Python threads", [({}, threading.active_count())]
+
+
+REGISTRY.add_collector(_process_metrics)
@@ -0,0 +1,83 @@
+import asyncio
+import numpy as np
+from typing import Callable, List, Optional, Tuple
+import os
+
+# Concurrent single-row requests arriving within this window share one model call
+MICRO_BATCH_WINDOW_MS = float(os.getenv("MICRO_BATCH_WINDOW_MS", "5"))
+MICRO_BATCH_MAX_ROWS = int(os.getenv("MICRO_BATCH_MAX_ROWS", "512"))
+
+BatchPredictFn = Callable[[np.ndarray], Tuple[np.ndarray, np.ndarray]]
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-row predictions into one vectorized call.
+
+    The first queued row opens a window of `window_ms`; every row that arrives before
+    it closes (up to `max_rows`) is stacked into one array and scored together in a
+    worker thread, so the event loop never runs model code.
+    """
+
+    def __init__(self, predict_fn: BatchPredictFn, window_ms: float = MICRO_BATCH_WINDOW_MS,
+                 max_rows: int = MICRO_BATCH_MAX_ROWS):
+        self.predict_fn = predict_fn
+        self.window = window_ms / 1000.0
+        self.max_rows = max_rows
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.rows = 0
+
+    async def submit(self, row: np.ndarray) -> Tuple[int, float]:
+        """
+        Score a single feature row; resolves when its batch has been predicted
+        """
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future))
+        return await future
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        Rows waiting for the next batch window
+        """
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(pending) < self.max_rows:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._score(loop, pending)
+
+    async def _score(self, loop, pending: List[tuple]):
+        try:
+            batch = np.vstack([row for row, _ in pending])
+            predictions, probabilities = await loop.run_in_executor(None, self.predict_fn, batch)
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.batches += 1
+        self.rows += len(pending)
+        for i, (_, future) in enumerate(pending):
+            if not future.done():
+                future.set_result((int(predictions[i]), float(probabilities[i])))
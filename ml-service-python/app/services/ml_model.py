@@ -1,26 +1,63 @@
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, confusion_matrix
-from sklearn.preprocessing import StandardScaler
-import xgboost as xgb
-import lightgbm as lgb
-from typing import Dict, Any, Tuple
-import joblib
+from typing import Dict, Any, Callable, List, Optional, Tuple
 import os
+import time
+
+# sklearn, xgboost, lightgbm, scipy and joblib take over a second to import, so they are
+# imported where first used (training, model load) instead of when the service starts
+HEAVY_MODULES = ("sklearn.model_selection", "sklearn.metrics", "sklearn.preprocessing", "xgboost", "lightgbm",
+                 "scipy.sparse", "joblib", "app.services.boosters")
+
+# progress_callback(iteration, total_iterations, eval_loss, eval_accuracy); may raise TrainingCancelled
+ProgressCallback = Callable[[int, int, float, float], None]
+
+
+class TrainingCancelled(Exception):
+    """
+    Raised from a progress callback to abort training between boosting rounds
+    """
+
+
+def __getattr__(name: str):
+    # Models pickled before the booster classes moved to app.services.boosters
+    if name == 'HistXGBClassifier':
+        from app.services.boosters import HistXGBClassifier
+        return HistXGBClassifier
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 class MLModelService:
-    def __init__(self):
+    def __init__(self, model_directory: str = "models"):
+        from sklearn.preprocessing import StandardScaler
+
         self.model = None
         self.scaler = StandardScaler()
-        self.model_directory = "models"
+        # Training means of the features in model order, saved with the model: missing
+        # values are imputed with them before scaling, in training and at serving time
+        self.feature_means: Optional[np.ndarray] = None
+        self.model_directory = model_directory
         os.makedirs(self.model_directory, exist_ok=True)
     
     def train_model(self, df: pd.DataFrame, target_column: str = 'Response', 
-                   test_size: float = 0.2, model_type: str = 'xgboost') -> Dict[str, Any]:
+                   test_size: float = 0.2, model_type: str = 'xgboost',
+                   n_estimators: int = 100, max_depth: int = 6, learning_rate: float = 0.1,
+                   n_jobs: Optional[int] = None, tree_method: str = 'hist',
+                   early_stopping_rounds: Optional[int] = 10,
+                   progress_callback: Optional[ProgressCallback] = None,
+                   eval_df: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
         """
-        Train a machine learning model on the provided DataFrame
+        Train a machine learning model on the provided DataFrame.
+
+        The held-out split doubles as the boosting eval set, so the returned loss and
+        accuracy curves come straight from the booster's per-iteration eval history.
+        When `eval_df` is given (e.g. a later testing period) it is the held-out set
+        and all of `df` is trained on, with no random split.
+        `progress_callback` is invoked after every boosting round; TrainingCancelled
+        raised from it propagates to the caller.
         """
+        from sklearn.model_selection import train_test_split
+
         try:
             # Prepare features and target
             if target_column not in df.columns:
@@ -37,79 +74,195 @@ class MLModelService:
             y = df[target_column]
             
             # Handle missing values
-            X = X.fillna(X.mean())
-            y = y.fillna(0)
+            means = X.mean()
+            X = X.fillna(means)
+            self.feature_means = means.to_numpy(dtype=np.float64)
+            y = y.fillna(0).astype(int)
             
             # Split data
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=test_size, random_state=42, stratify=y
-            )
+            if eval_df is None:
+                X_train, X_test, y_train, y_test = train_test_split(
+                    X, y, test_size=test_size, random_state=42, stratify=y
+                )
+            else:
+                if target_column not in eval_df.columns:
+                    raise ValueError(f"Target column '{target_column}' not found in evaluation DataFrame")
+                # Impute the held-out rows with the training means, as predict_batch does
+                X_train, y_train = X, y
+                X_test = eval_df.reindex(columns=feature_columns).fillna(means)
+                y_test = eval_df[target_column].fillna(0).astype(int)
             
             # Scale features
             X_train_scaled = self.scaler.fit_transform(X_train)
             X_test_scaled = self.scaler.transform(X_test)
             
-            # Train model
-            if model_type == 'xgboost':
-                self.model = xgb.XGBClassifier(
-                    n_estimators=100,
-                    max_depth=6,
-                    learning_rate=0.1,
-                    random_state=42
-                )
-            elif model_type == 'lightgbm':
-                self.model = lgb.LGBMClassifier(
-                    n_estimators=100,
-                    max_depth=6,
-                    learning_rate=0.1,
-                    random_state=42,
-                    verbose=-1
-                )
-            else:
-                raise ValueError(f"Unsupported model type: {model_type}")
-            
-            # Train the model
-            self.model.fit(X_train_scaled, y_train)
-            
-            # Make predictions
-            y_pred = self.model.predict(X_test_scaled)
-            y_pred_proba = self.model.predict_proba(X_test_scaled)[:, 1]
-            
-            # Calculate metrics
-            metrics = self._calculate_metrics(y_test, y_pred, y_pred_proba)
-            
-            # Save model
-            model_path = os.path.join(self.model_directory, f"{model_type}_model.joblib")
-            scaler_path = os.path.join(self.model_directory, f"{model_type}_scaler.joblib")
-            
-            joblib.dump(self.model, model_path)
-            joblib.dump(self.scaler, scaler_path)
+            return self._fit_and_save(X_train_scaled, X_test_scaled, y_train, y_test, feature_columns,
+                                      model_type, n_estimators, max_depth, learning_rate, n_jobs,
+                                      tree_method, early_stopping_rounds, progress_callback)
             
+        except TrainingCancelled:
+            raise
+        except Exception as e:
             return {
-                'success': True,
-                'metrics': metrics,
-                'feature_columns': feature_columns,
-                'model_path': model_path,
-                'scaler_path': scaler_path
+                'success': False,
+                'error': str(e)
             }
+    
+    def train_matrix(self, X, y: np.ndarray, feature_columns: List[str], test_size: float = 0.2,
+                     model_type: str = 'xgboost', n_estimators: int = 100, max_depth: int = 6,
+                     learning_rate: float = 0.1, n_jobs: Optional[int] = None, tree_method: str = 'hist',
+                     early_stopping_rounds: Optional[int] = 10,
+                     progress_callback: Optional[ProgressCallback] = None,
+                     eval_set: Optional[Tuple[Any, np.ndarray]] = None) -> Dict[str, Any]:
+        """
+        NaN-native training on a float32 array (NaN = missing) or, for XGBoost, a CSR
+        matrix whose implicit entries are missing values. An explicit `eval_set`
+        (X_test, y_test) replaces the random held-out split.
+
+        Both libraries route missing values down a learned default branch, so there is
+        no mean imputation and no scaling: the model is saved without a scaler and
+        serves raw feature values.
+        """
+        from scipy import sparse
+        from sklearn.model_selection import train_test_split
+
+        try:
+            if sparse.issparse(X) and model_type != 'xgboost':
+                # LightGBM reads implicit CSR entries as zeros, not as missing values
+                raise ValueError(f"Sparse training input is only supported for xgboost, not {model_type}")
+            y = np.nan_to_num(np.asarray(y, dtype=np.float64), nan=0.0).astype(int)
+            if eval_set is None:
+                # Same split as train_model: identical labels and random_state select the same rows
+                train_index, test_index = train_test_split(
+                    np.arange(len(y)), test_size=test_size, random_state=42, stratify=y
+                )
+                X_train, X_test = X[train_index], X[test_index]
+                y_train, y_test = y[train_index], y[test_index]
+            else:
+                X_train, y_train = X, y
+                X_test = eval_set[0]
+                y_test = np.nan_to_num(np.asarray(eval_set[1], dtype=np.float64), nan=0.0).astype(int)
+            del X, eval_set  # the caller passes the matrices without keeping a reference
+            self.scaler = None
+            self.feature_means = None
             
+            return self._fit_and_save(X_train, X_test, y_train, y_test, feature_columns,
+                                      model_type, n_estimators, max_depth, learning_rate, n_jobs,
+                                      tree_method, early_stopping_rounds, progress_callback)
+            
+        except TrainingCancelled:
+            raise
         except Exception as e:
             return {
                 'success': False,
                 'error': str(e)
             }
     
+    def _fit_and_save(self, X_train, X_test, y_train, y_test, feature_columns: List[str], model_type: str,
+                      n_estimators: int, max_depth: int, learning_rate: float, n_jobs: Optional[int],
+                      tree_method: str, early_stopping_rounds: Optional[int],
+                      progress_callback: Optional[ProgressCallback]) -> Dict[str, Any]:
+        """
+        Fit the booster on prepared train/eval splits, evaluate it and save model, scaler
+        and imputation means
+        """
+        import joblib
+
+        n_jobs = n_jobs if n_jobs else (os.cpu_count() or 1)
+        early_stopping_rounds = early_stopping_rounds or None
+        
+        # Train model
+        start_time = time.perf_counter()
+        if model_type == 'xgboost':
+            from app.services.boosters import HistXGBClassifier, XGBProgress
+
+            self.model = HistXGBClassifier(
+                n_estimators=n_estimators,
+                max_depth=max_depth,
+                learning_rate=learning_rate,
+                tree_method=tree_method,
+                n_jobs=n_jobs,
+                eval_metric=['error', 'logloss'],  # the last metric drives early stopping
+                early_stopping_rounds=early_stopping_rounds,
+                callbacks=[XGBProgress(progress_callback, n_estimators)] if progress_callback else None,
+                random_state=42
+            )
+            self.model.fit(X_train, y_train, eval_set=[(X_test, y_test)], verbose=False)
+            # Callbacks hold process-local state and must not be pickled with the model
+            self.model.callbacks = None
+            history = self.model.evals_result()['validation_0']
+            loss_curve, error_curve = history['logloss'], history['error']
+            best_iteration = getattr(self.model, 'best_iteration', None)
+        elif model_type == 'lightgbm':
+            import lightgbm as lgb
+            from app.services.boosters import lgb_progress
+
+            # LightGBM always bins features into histograms; tree_method does not apply
+            self.model = lgb.LGBMClassifier(
+                n_estimators=n_estimators,
+                max_depth=max_depth,
+                learning_rate=learning_rate,
+                n_jobs=n_jobs,
+                random_state=42,
+                verbose=-1
+            )
+            callbacks = [lgb.early_stopping(early_stopping_rounds, first_metric_only=True, verbose=False)] \
+                if early_stopping_rounds else []
+            if progress_callback:
+                callbacks.append(lgb_progress(progress_callback, n_estimators))
+            self.model.fit(X_train, y_train, eval_set=[(X_test, y_test)],
+                           eval_metric=['binary_logloss', 'binary_error'], callbacks=callbacks)
+            history = self.model.evals_result_['valid_0']
+            loss_curve, error_curve = history['binary_logloss'], history['binary_error']
+            best_iteration = self.model.best_iteration_ or None
+        else:
+            raise ValueError(f"Unsupported model type: {model_type}")
+        training_time = time.perf_counter() - start_time
+        
+        # Make predictions
+        y_pred = self.model.predict(X_test)
+        y_pred_proba = self.model.predict_proba(X_test)[:, 1]
+        
+        # Calculate metrics
+        metrics = self._calculate_metrics(y_test, y_pred, y_pred_proba)
+        
+        # Save model
+        model_path = os.path.join(self.model_directory, f"{model_type}_model.joblib")
+        scaler_path = os.path.join(self.model_directory, f"{model_type}_scaler.joblib")
+        imputer_path = os.path.join(self.model_directory, f"{model_type}_imputer.joblib")
+        
+        joblib.dump(self.model, model_path)
+        joblib.dump(self.scaler, scaler_path)
+        joblib.dump(self.feature_means, imputer_path)
+        
+        return {
+            'success': True,
+            'metrics': metrics,
+            'feature_columns': feature_columns,
+            'model_path': model_path,
+            'scaler_path': scaler_path,
+            'imputer_path': imputer_path,
+            'training_samples': int(X_train.shape[0]),
+            'test_samples': int(X_test.shape[0]),
+            'training_time': round(training_time, 3),
+            'best_iteration': best_iteration,
+            'loss_curve': [float(v) for v in loss_curve],
+            'accuracy_curve': [float(1.0 - v) for v in error_curve]
+        }
+    
     def _calculate_metrics(self, y_true, y_pred, y_pred_proba) -> Dict[str, float]:
         """
         Calculate evaluation metrics
         """
+        from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, confusion_matrix
+
         accuracy = accuracy_score(y_true, y_pred)
         precision = precision_score(y_true, y_pred, zero_division=0)
         recall = recall_score(y_true, y_pred, zero_division=0)
         f1 = f1_score(y_true, y_pred, zero_division=0)
         
         # Confusion matrix
-        cm = confusion_matrix(y_true, y_pred)
+        cm = confusion_matrix(y_true, y_pred, labels=[0, 1])
         tn, fp, fn, tp = cm.ravel()
         
         return {
@@ -132,8 +285,10 @@ class MLModelService:
         if self.model is None:
             raise ValueError("Model not trained. Please train the model first.")
         
-        # Scale features
-        X_scaled = self.scaler.transform(X)
+        # Impute and scale features (NaN-native models are trained on raw values and have no scaler)
+        if self.scaler is not None:
+            X = X.fillna(dict(zip(X.columns, self.feature_means)))
+        X_scaled = self.scaler.transform(X) if self.scaler is not None else X
         
         # Make predictions
         predictions = self.model.predict(X_scaled)
@@ -141,9 +296,49 @@ class MLModelService:
         
         return predictions, probabilities
     
-    def load_model(self, model_path: str, scaler_path: str):
+    def predict_batch(self, X: np.ndarray, threshold: float = 0.5) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Load a pre-trained model and scaler
+        Vectorized scoring of an (n_rows, n_features) array in model feature order.
+
+        Missing values are imputed with the training means and scaling is a single
+        broadcast over the array, so rows are prepared exactly as in training. The trees
+        are walked once: classes are derived from the positive-class probability instead
+        of a second predict() pass (same result as predict() for binary models).
         """
+        if self.model is None:
+            raise ValueError("Model not trained. Please train the model first.")
+        
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[0] == 0:
+            return np.empty(0, dtype=np.int8), np.empty(0, dtype=np.float64)
+        if self.scaler is not None:
+            missing = np.isnan(X)
+            if missing.any():
+                X = np.where(missing, self.feature_means, X)
+            X_scaled = (X - self.scaler.mean_) / self.scaler.scale_
+        else:
+            X_scaled = X
+        
+        probabilities = self.model.predict_proba(X_scaled)[:, 1]
+        predictions = (probabilities >= threshold).astype(np.int8)
+        
+        return predictions, probabilities
+    
+    def load_model(self, model_path: str, scaler_path: str, imputer_path: Optional[str] = None):
+        """
+        Load a pre-trained model, scaler and imputation means. Versions saved before the
+        means were kept impute with the scaler's means, which are the training means of
+        the imputed rows.
+        """
+        import joblib
+
         self.model = joblib.load(model_path)
         self.scaler = joblib.load(scaler_path)
+        if imputer_path is not None and os.path.exists(imputer_path):
+            self.feature_means = joblib.load(imputer_path)
+        elif self.scaler is not None:
+            self.feature_means = np.asarray(self.scaler.mean_, dtype=np.float64)
+        else:
+            self.feature_means = None
@@ -0,0 +1,231 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+from app.services.atomic_json import write_json
+from app.services.fused_inference import INFERENCE_BACKENDS, FusedTreeModel
+from app.services.ml_model import MLModelService
+
+MODEL_DIRECTORY = os.getenv("MODEL_DIRECTORY", "models")
+REGISTRY_DIRECTORY = os.path.join(MODEL_DIRECTORY, "registry")
+# Deserialized model+scaler pairs kept in memory; least recently used is evicted first
+MODEL_CACHE_SIZE = int(os.getenv("MODEL_CACHE_SIZE", "4"))
+
+# Anything with predict_batch(X) -> (classes, probabilities)
+Scorer = Union[MLModelService, FusedTreeModel]
+
+METADATA_FILE = "metadata.json"
+PRODUCTION_POINTER = "production.json"
+
+
+class LatencyStats:
+    """
+    Count / total / max / last of a latency series, in milliseconds
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+
+    def observe(self, seconds: float):
+        ms = seconds * 1000.0
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.last_ms = ms
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total_ms / self.count, 4) if self.count else 0.0,
+            'max_ms': round(self.max_ms, 4),
+            'last_ms': round(self.last_ms, 4)
+        }
+
+
+class ModelRegistry:
+    """
+    Versioned model store: registry/<model_id>/ holds the model, scaler, imputation means
+    and metadata.json (feature columns, training dataset hash, metrics, params).
+    production.json points at the version that serves by default.
+
+    Loaded versions live in a bounded LRU cache, so after warm-up predictions never pay
+    joblib.load. Promotion warms the new version first and then swaps the pointer, so
+    in-flight requests keep using the object they already hold.
+
+    What is cached is the version's scorer: the MLModelService itself, or its
+    FusedTreeModel when the version's metadata selects the "fused" inference backend.
+    Entries are keyed on the metadata file's mtime, as the production pointer is, so a
+    backend switched by any worker process is picked up by all of them.
+    """
+
+    def __init__(self, registry_directory: str = REGISTRY_DIRECTORY, cache_size: int = MODEL_CACHE_SIZE):
+        self.registry_directory = registry_directory
+        self.cache_size = cache_size
+        # model_id -> (scorer, metadata, mtime of the metadata file it was loaded from)
+        self._cache: "OrderedDict[str, Tuple[Scorer, dict, float]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._production: Optional[Tuple[float, Optional[str]]] = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.evictions = 0
+        self.cold_loads = LatencyStats()
+        self.warm_hits = LatencyStats()
+        os.makedirs(registry_directory, exist_ok=True)
+
+    # -- versions -------------------------------------------------------------------
+
+    @staticmethod
+    def new_model_id(model_type: str) -> str:
+        return f"{model_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+    def version_path(self, model_id: str) -> str:
+        return os.path.join(self.registry_directory, model_id)
+
+    def register(self, model_id: str, metadata: dict, promote: bool = True) -> dict:
+        """
+        Record metadata for a version whose artifacts were written to version_path(model_id)
+        """
+        metadata = dict(metadata, model_id=model_id, registered_at=datetime.now().isoformat())
+        write_json(os.path.join(self.version_path(model_id), METADATA_FILE), metadata, indent=2)
+        if promote:
+            self.promote(model_id, warm=False)
+        return metadata
+
+    def discard(self, model_id: str):
+        shutil.rmtree(self.version_path(model_id), ignore_errors=True)
+
+    def metadata(self, model_id: str) -> Optional[dict]:
+        try:
+            with open(os.path.join(self.version_path(model_id), METADATA_FILE)) as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            return None
+
+    def set_backend(self, model_id: str, backend: str) -> dict:
+        """
+        Switch the inference backend of a version. Rewriting its metadata changes the
+        mtime its cached scorer is keyed on, so the next request in every worker loads
+        it with the new backend
+        """
+        if backend not in INFERENCE_BACKENDS:
+            raise ValueError(f"Unknown inference backend '{backend}'; expected one of {', '.join(INFERENCE_BACKENDS)}")
+        metadata = self.metadata(model_id)
+        if metadata is None:
+            raise LookupError(f"Model '{model_id}' is not registered")
+        metadata['inference_backend'] = backend
+        write_json(os.path.join(self.version_path(model_id), METADATA_FILE), metadata, indent=2)
+        return metadata
+
+    def list_models(self) -> List[dict]:
+        models = []
+        for model_id in os.listdir(self.registry_directory):
+            metadata = self.metadata(model_id) if os.path.isdir(self.version_path(model_id)) else None
+            if metadata is not None:
+                models.append(metadata)
+        return sorted(models, key=lambda m: m['registered_at'], reverse=True)
+
+    # -- production pointer ---------------------------------------------------------
+
+    def production_model_id(self) -> Optional[str]:
+        pointer_path = os.path.join(self.registry_directory, PRODUCTION_POINTER)
+        try:
+            mtime = os.path.getmtime(pointer_path)
+        except FileNotFoundError:
+            return None
+        if self._production is None or self._production[0] != mtime:
+            with open(pointer_path) as fh:
+                self._production = (mtime, json.load(fh)['model_id'])
+        return self._production[1]
+
+    def promote(self, model_id: str, warm: bool = True):
+        """
+        Make `model_id` the production version. With warm=True it is loaded into the
+        cache before the pointer moves, so the swap itself costs nothing
+        """
+        if self.metadata(model_id) is None:
+            raise LookupError(f"Model '{model_id}' is not registered")
+        if warm:
+            self.load(model_id)
+        write_json(os.path.join(self.registry_directory, PRODUCTION_POINTER),
+                   {'model_id': model_id, 'promoted_at': datetime.now().isoformat()}, indent=2)
+
+    # -- loading --------------------------------------------------------------------
+
+    def load(self, model_id: str) -> Tuple[Scorer, dict]:
+        """
+        Return the (scorer, metadata) pair for a version, deserializing it at most once
+        while it stays in the LRU cache and its metadata file is unchanged
+        """
+        start = time.perf_counter()
+        try:
+            mtime = os.path.getmtime(os.path.join(self.version_path(model_id), METADATA_FILE))
+        except FileNotFoundError:
+            raise LookupError(f"Model '{model_id}' is not registered")
+        with self._cache_lock:
+            cached = self._cache.get(model_id)
+            if cached is not None and cached[2] == mtime:
+                self._cache.move_to_end(model_id)
+                self.cache_hits += 1
+                self.warm_hits.observe(time.perf_counter() - start)
+                return cached[0], cached[1]
+            load_lock = self._load_locks.setdefault(model_id, threading.Lock())
+
+        # One loader per version; other versions keep serving from the cache meanwhile
+        with load_lock:
+            with self._cache_lock:
+                cached = self._cache.get(model_id)
+                if cached is not None and cached[2] == mtime:
+                    self.cache_hits += 1
+                    return cached[0], cached[1]
+            metadata = self.metadata(model_id)
+            if metadata is None:
+                raise LookupError(f"Model '{model_id}' is not registered")
+            service = MLModelService(self.version_path(model_id))
+            service.load_model(metadata['model_path'], metadata['scaler_path'], metadata.get('imputer_path'))
+            scorer = service
+            if metadata.get('inference_backend') == 'fused':
+                try:
+                    scorer = FusedTreeModel.from_service(service)
+                except ValueError:
+                    # Not foldable (e.g. degenerate scaler statistics): serve the standard path
+                    pass
+            with self._cache_lock:
+                self.cache_misses += 1
+                # Keyed on the mtime seen before reading: a rewrite during the load reloads
+                self._cache[model_id] = (scorer, metadata, mtime)
+                self._cache.move_to_end(model_id)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+                    self.evictions += 1
+                self._load_locks.pop(model_id, None)
+            self.cold_loads.observe(time.perf_counter() - start)
+            return scorer, metadata
+
+    def production(self) -> Tuple[Scorer, dict]:
+        model_id = self.production_model_id()
+        if model_id is None:
+            raise LookupError("No trained model available. Please train a model first.")
+        return self.load(model_id)
+
+    def cache_stats(self) -> dict:
+        with self._cache_lock:
+            cached = list(self._cache.keys())
+        return {
+            'capacity': self.cache_size,
+            'cached_models': cached,
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'evictions': self.evictions,
+            'cold_load': self.cold_loads.to_dict(),
+            'warm_hit': self.warm_hits.to_dict()
+        }
@@ -0,0 +1,727 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent builders of a view just race to the same result
+    fcntl = None
+
+from app.services.atomic_json import write_json
+from app.services.date_index import DateIndex, DateIndexBuilder, naive_utc
+
+if TYPE_CHECKING:
+    from scipy import sparse
+
+# Parquet layout of a processed dataset: one directory per dataset holding
+# zstd-compressed part files plus a manifest with per-part row counts and time bounds
+PARQUET_COMPRESSION = os.getenv("PROCESSED_PARQUET_COMPRESSION", "zstd")
+PARQUET_ROW_GROUP_ROWS = int(os.getenv("PROCESSED_ROW_GROUP_ROWS", "65536"))
+MANIFEST_FILE = "manifest.json"
+MATRIX_BATCH_ROWS = 65536
+TIMESTAMP_COLUMN = "synthetic_timestamp"
+LABEL_COLUMN = "Response"
+# Serve row batches (simulation replay) from an uncompressed Arrow IPC copy of each dataset,
+# memory-mapped: worker processes share its pages through the page cache instead of each
+# decoding Parquet into private memory. Costs the uncompressed size on disk
+MMAP_VIEWS = os.getenv("PROCESSED_MMAP_VIEWS", "0").lower() in ("1", "true", "yes")
+VIEW_DIRECTORY = "views"
+
+# Inclusive (start, end) bounds on TIMESTAMP_COLUMN; either side may be None for an open bound.
+# Rows without a timestamp never fall inside a window.
+TimeWindow = Tuple[Optional[Any], Optional[Any]]
+
+
+class ProcessedDatasetWriter:
+    """
+    Incrementally write DataFrame chunks into a processed dataset directory.
+
+    Each chunk is appended as row groups of the current part file. If a later chunk
+    cannot be cast to the part's schema (e.g. an int column that turns float because
+    of NaNs), a new part is started so no data is rewritten. Timestamps and labels are
+    collected on the way through and the date index is written on close. The pandas
+    dtype of every column is kept in the manifest's `schema`, so appends parse new rows
+    the same way.
+
+    With `staging_path` the dataset is written there and only moved to `dataset_path`
+    by close(), so the dataset it replaces stays readable until then and survives an
+    ingest that fails (see abort()).
+    """
+
+    def __init__(self, dataset_path: str, source_file: str, append: bool = False,
+                 staging_path: Optional[str] = None):
+        self.dataset_path = dataset_path
+        # Where parts, index and manifest are written until close() publishes them
+        self.path = staging_path or dataset_path
+        self.staging_path = staging_path
+        self.source_file = source_file
+        self.append = append
+        self.part_index = 0
+        self.parts = []
+        self._base = None
+        self._writer = None
+        self._schema = None
+        self._part = None
+        self._date_index = DateIndexBuilder(TIMESTAMP_COLUMN, LABEL_COLUMN)
+        self.dtypes: Dict[str, str] = {}
+        os.makedirs(self.path, exist_ok=True)
+        if append:
+            # Existing parts are kept as they are; new rows go to new part files
+            self._base = _read_manifest(dataset_path)
+            self.part_index = max((int(part['file'][5:10]) + 1 for part in self._base['parts']), default=0)
+            self.dtypes.update(self._base.get('schema', {}))
+
+    def write(self, df: pd.DataFrame):
+        self.dtypes.update((str(column), str(dtype)) for column, dtype in df.dtypes.items())
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        schema = self._schema or self._base_schema()
+        if schema is not None and not table.schema.equals(schema):
+            if _narrows_floats(table.schema, schema):
+                # Arrow casts float64 to float32 unchecked: a column widened by a later chunk
+                # would lose the precision it was widened for, so it gets a new part instead
+                self._close_part()
+            else:
+                try:
+                    table = table.cast(schema)
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError, ValueError):
+                    self._close_part()
+        if self._writer is None:
+            self._open_part(table.schema)
+        self._writer.write_table(table, row_group_size=PARQUET_ROW_GROUP_ROWS)
+        self._track(table)
+        self._date_index.add(table)
+
+    def add_part_file(self, path: str, part: dict):
+        """
+        Take over a finished Parquet file written elsewhere (e.g. by a batch ingest
+        worker) as the next part. `part` has the manifest fields other than 'file'; the
+        date index gets the part's timestamp and label columns.
+        """
+        self._close_part()
+        file_name = f"part-{self.part_index:05d}.parquet"
+        destination = os.path.join(self.path, file_name)
+        os.replace(path, destination)
+        self.part_index += 1
+        self.parts.append(dict(part, file=file_name))
+        schema = pq.read_schema(destination)
+        self.dtypes.update((name, str(dtype)) for name, dtype in schema.empty_table().to_pandas().dtypes.items())
+        self._date_index.add(pq.read_table(destination, columns=[c for c in (TIMESTAMP_COLUMN, LABEL_COLUMN)
+                                                                 if c in schema.names]))
+
+    def close(self, summary: Optional[dict] = None) -> dict:
+        """
+        Finish the last part and write the manifest; returns the manifest dict.
+
+        `summary` is cached in the manifest as the dataset's running aggregates. When
+        appending, the new parts are added to the existing ones and the date index gets a
+        new segment; the manifest is written last so readers never see a partial append.
+        A staged dataset then replaces the one at `dataset_path` in one rename.
+        """
+        self._close_part()
+        parts = (self._base['parts'] if self._base else []) + self.parts
+        columns = list(self._base['columns']) if self._base else []
+        for part in self.parts:
+            for column in part['columns']:
+                if column not in columns:
+                    columns.append(column)
+        manifest = {
+            'format': 'parquet',
+            'source_file': self._base['source_file'] if self._base else os.path.basename(self.source_file),
+            'updated_at': datetime.utcnow().isoformat(),
+            'total_records': sum(p['rows'] for p in parts),
+            'columns': columns,
+            'parts': parts,
+            'schema': self.dtypes,
+        }
+        if summary is not None:
+            manifest['summary'] = summary
+        self._date_index.finish(self.path, append=self.append)
+        _write_manifest(self.path, manifest)
+        if self.staging_path is not None:
+            _publish(self.staging_path, self.dataset_path)
+        return manifest
+
+    def abort(self):
+        """
+        Give up on the ingest, leaving whatever was at `dataset_path` untouched: a staged
+        dataset is removed, and an append deletes the part files it added (the manifest
+        and date index only change on close, so the dataset never referenced them)
+        """
+        if self._writer is not None:
+            self._writer.close()
+            self.parts.append(self._part)
+        self._writer = None
+        self._schema = None
+        self._part = None
+        if self.staging_path is not None:
+            shutil.rmtree(self.staging_path, ignore_errors=True)
+        else:
+            for part in self.parts:
+                try:
+                    os.remove(os.path.join(self.path, part['file']))
+                except FileNotFoundError:
+                    pass
+        self.parts = []
+
+    def _base_schema(self) -> Optional[pa.Schema]:
+        # Appended rows are cast to the schema of the dataset's last part when they fit
+        if not self._base or not self._base['parts'] or self.parts:
+            return None
+        return pq.read_schema(os.path.join(self.path, self._base['parts'][-1]['file']))
+
+    def _open_part(self, schema: pa.Schema):
+        file_name = f"part-{self.part_index:05d}.parquet"
+        self._schema = schema
+        self._writer = pq.ParquetWriter(os.path.join(self.path, file_name), schema,
+                                        compression=PARQUET_COMPRESSION)
+        self._part = {'file': file_name, 'rows': 0, 'columns': schema.names,
+                      'min_timestamp': None, 'max_timestamp': None}
+        self.part_index += 1
+
+    def _close_part(self):
+        if self._writer is not None:
+            self._writer.close()
+            # Hashed while the file is still in the page cache, so content_hash never rereads parts
+            self._part['sha256'] = file_sha256(os.path.join(self.path, self._part['file']))
+            self.parts.append(self._part)
+        self._writer = None
+        self._schema = None
+        self._part = None
+
+    def _track(self, table: pa.Table):
+        self._part['rows'] += table.num_rows
+        if TIMESTAMP_COLUMN in table.column_names and table.num_rows > 0:
+            bounds = pc.min_max(table[TIMESTAMP_COLUMN])
+            low, high = bounds['min'].as_py(), bounds['max'].as_py()
+            if low is not None:
+                low, high = pd.Timestamp(low).isoformat(), pd.Timestamp(high).isoformat()
+                if self._part['min_timestamp'] is None or low < self._part['min_timestamp']:
+                    self._part['min_timestamp'] = low
+                if self._part['max_timestamp'] is None or high > self._part['max_timestamp']:
+                    self._part['max_timestamp'] = high
+
+
+class DatasetView:
+    """
+    Read-only, memory-mapped Arrow IPC copy of a processed dataset: one record batch per
+    Parquet row group, all conformed to the dataset's unified schema, with each batch's
+    timestamp range kept alongside for window pruning.
+
+    Batches are zero-copy slices of the mapping, so any number of processes reading the
+    same view share one copy of the data in the page cache. Only batches cut by a
+    window boundary are filtered into private memory.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path + ".json") as fh:
+            # [rows, min_ns, max_ns] per batch; bounds are None when no row has a timestamp
+            self.batches = json.load(fh)['batches']
+        self.reader = pa.ipc.open_file(pa.memory_map(path, "r"))
+        self.schema = self.reader.schema
+
+    def iter_batches(self, columns: List[str], window: Optional[TimeWindow] = None) -> Iterator[pa.RecordBatch]:
+        low, high = _window_ns(window) if window is not None else (None, None)
+        # Deduplicated like Parquet column projection (Id is both a key and a feature)
+        selected = [c for c in dict.fromkeys(columns) if c in self.schema.names]
+        for i, (_, minimum, maximum) in enumerate(self.batches):
+            batch = self.reader.get_batch(i)
+            if window is not None:
+                if minimum is None or (high is not None and minimum > high) or (low is not None and maximum < low):
+                    continue
+                if (low is not None and minimum < low) or (high is not None and maximum > high) or \
+                        batch.column(TIMESTAMP_COLUMN).null_count:
+                    batch = batch.filter(_window_mask(batch.column(TIMESTAMP_COLUMN), low, high))
+                    if batch.num_rows == 0:
+                        continue
+            yield batch.select(selected)
+
+    @classmethod
+    def build(cls, dataset_path: str, path: str):
+        """
+        Write the view of a dataset's current parts to `path` (atomically) plus its index
+        """
+        manifest = _read_manifest(dataset_path)
+        files = [os.path.join(dataset_path, part['file']) for part in manifest['parts']]
+        # Without the pandas metadata of the parts: it describes whole parts, not projections
+        schema = pa.unify_schemas([pq.read_schema(f) for f in files], promote_options="permissive").remove_metadata()
+        bounds = []
+        tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+            for file in files:
+                parquet_file = pq.ParquetFile(file, memory_map=True)
+                for g in range(parquet_file.metadata.num_row_groups):
+                    table = parquet_file.read_row_group(g)
+                    arrays = [table.column(field.name).cast(field.type) if field.name in table.column_names
+                              else pa.nulls(table.num_rows, field.type) for field in schema]
+                    batch = pa.Table.from_arrays(arrays, schema=schema).combine_chunks().to_batches()[0]
+                    writer.write_batch(batch)
+                    bounds.append([batch.num_rows, *_timestamp_bounds(batch)])
+        with open(tmp_path + ".json", "w") as fh:
+            json.dump({'batches': bounds}, fh)
+        os.replace(tmp_path + ".json", path + ".json")
+        os.replace(tmp_path, path)
+
+
+# Views opened by this process: dataset path -> (view file, DatasetView)
+_open_views: Dict[str, Tuple[str, DatasetView]] = {}
+_views_lock = threading.Lock()
+
+
+class ProcessedDataStore:
+    """
+    Columnar on-disk store for processed datasets (replaces `<name>_processed.csv`).
+
+    Reads are column-projected and row-ranged: only the requested columns of the
+    row groups that overlap the requested range are decoded, from memory-mapped files.
+    Time-windowed reads prune parts by their manifest time bounds and row groups by
+    their Parquet min/max statistics on the timestamp column before decoding anything.
+    """
+
+    def __init__(self, data_directory: str = "data"):
+        self.root = os.path.join(data_directory, "processed")
+        os.makedirs(self.root, exist_ok=True)
+
+    def dataset_path(self, original_file_path: str) -> str:
+        base_name = os.path.splitext(os.path.basename(original_file_path))[0]
+        return os.path.join(self.root, f"{base_name}_processed")
+
+    def open_writer(self, original_file_path: str) -> ProcessedDatasetWriter:
+        """
+        Start a fresh dataset for `original_file_path`. It is staged next to the final
+        location and replaces any previous one only when the writer is closed
+        """
+        dataset_path = self.dataset_path(original_file_path)
+        staging_path = os.path.join(self.root, f".{os.path.basename(dataset_path)}-{uuid.uuid4().hex[:12]}")
+        return ProcessedDatasetWriter(dataset_path, original_file_path, staging_path=staging_path)
+
+    @classmethod
+    def open_appender(cls, dataset_path: str, source_file: str) -> ProcessedDatasetWriter:
+        """
+        Add rows from `source_file` to an existing dataset without rewriting its parts
+        """
+        cls.date_index(dataset_path)  # appends extend the index, so it must exist first
+        return ProcessedDatasetWriter(dataset_path, source_file, append=True)
+
+    def write(self, df: pd.DataFrame, original_file_path: str, summary: Optional[dict] = None) -> str:
+        writer = self.open_writer(original_file_path)
+        try:
+            writer.write(df)
+            writer.close(summary)
+        except BaseException:
+            writer.abort()
+            raise
+        return writer.dataset_path
+
+    def latest_dataset(self) -> Optional[str]:
+        """
+        Most recently updated processed dataset, or None
+        """
+        # Dot-directories are datasets being staged or replaced
+        candidates = [os.path.join(self.root, name) for name in os.listdir(self.root)
+                      if not name.startswith(".") and os.path.isfile(os.path.join(self.root, name, MANIFEST_FILE))]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda path: os.path.getmtime(os.path.join(path, MANIFEST_FILE)))
+
+    @staticmethod
+    def manifest(dataset_path: str) -> dict:
+        return _read_manifest(dataset_path)
+
+    @staticmethod
+    def update_manifest(dataset_path: str, **fields) -> dict:
+        """
+        Set top-level manifest fields (e.g. the source key of a cached ingest)
+        """
+        manifest = dict(_read_manifest(dataset_path), **fields)
+        _write_manifest(dataset_path, manifest)
+        return manifest
+
+    @classmethod
+    def date_index(cls, dataset_path: str) -> DateIndex:
+        """
+        The dataset's date index, built once from the timestamp and label columns for
+        datasets written before indexes existed or with an older index format
+        """
+        if not DateIndex.exists(dataset_path):
+            DateIndex.remove(dataset_path)
+            builder = DateIndexBuilder(TIMESTAMP_COLUMN, LABEL_COLUMN)
+            builder.add(cls.read_table(dataset_path, [TIMESTAMP_COLUMN, LABEL_COLUMN]))
+            builder.finish(dataset_path)
+        return DateIndex(dataset_path)
+
+    @staticmethod
+    def read_table(dataset_path: str, columns: Optional[List[str]] = None,
+                   row_start: int = 0, row_stop: Optional[int] = None,
+                   window: Optional[TimeWindow] = None) -> pa.Table:
+        """
+        Read rows [row_start, row_stop) of the requested columns as an Arrow table; with
+        a window, the range counts rows inside the window
+        """
+        if window is not None:
+            return _read_window(dataset_path, columns, window, row_start, row_stop)
+        manifest = _read_manifest(dataset_path)
+        total = manifest['total_records']
+        row_stop = total if row_stop is None else min(row_stop, total)
+        tables = []
+        part_offset = 0
+        for part in manifest['parts']:
+            part_start, part_stop = part_offset, part_offset + part['rows']
+            part_offset = part_stop
+            if part_stop <= row_start or part_start >= row_stop:
+                continue
+            part_columns = None if columns is None else [c for c in columns if c in part['columns']]
+            tables.append(_read_part_rows(os.path.join(dataset_path, part['file']), part_columns,
+                                          max(row_start - part_start, 0),
+                                          min(row_stop, part_stop) - part_start))
+        if not tables:
+            return _empty_table(dataset_path, columns)
+        if len(tables) == 1:
+            return tables[0]
+        return pa.concat_tables(tables, promote_options="permissive")
+
+    @classmethod
+    def read_frame(cls, dataset_path: str, columns: Optional[List[str]] = None,
+                   row_start: int = 0, row_stop: Optional[int] = None,
+                   window: Optional[TimeWindow] = None) -> pd.DataFrame:
+        """
+        Read a projected row range (optionally of a time window) as a DataFrame
+        """
+        table = cls.read_table(dataset_path, columns, row_start, row_stop, window)
+        # split_blocks/self_destruct let Arrow hand column buffers over without a consolidation copy
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
+    @classmethod
+    def read_matrix(cls, dataset_path: str, columns: List[str], dtype=np.float32,
+                    window: Optional[TimeWindow] = None) -> np.ndarray:
+        """
+        Read columns straight into one preallocated (rows, columns) array, nulls as NaN.
+
+        Batches are decoded a row group at a time into the output, so no DataFrame and
+        no float64 intermediate of the whole dataset is ever built. A window's row count
+        comes from the date index, so windowed reads preallocate exactly too.
+        """
+        total = _read_manifest(dataset_path)['total_records'] if window is None \
+            else cls.date_index(dataset_path).count(*window)['count']
+        matrix = np.empty((total, len(columns)), dtype=dtype)
+        for offset, rows, batch in _iter_column_batches(dataset_path, columns, window):
+            block = matrix[offset:offset + rows]
+            for j, column in enumerate(columns):
+                if column in batch.schema.names:
+                    block[:, j] = batch.column(column).to_numpy(zero_copy_only=False)
+                else:
+                    block[:, j] = np.nan
+        return matrix
+
+    @staticmethod
+    def read_csr(dataset_path: str, columns: List[str], dtype=np.float32,
+                 window: Optional[TimeWindow] = None) -> "sparse.csr_matrix":
+        """
+        Read columns as a CSR matrix holding only the present values; nulls become
+        implicit entries, which XGBoost treats as missing
+        """
+        from scipy import sparse
+
+        blocks = []
+        for _, rows, batch in _iter_column_batches(dataset_path, columns, window):
+            row_indices, column_indices, values = [], [], []
+            for j, column in enumerate(columns):
+                if column not in batch.schema.names:
+                    continue
+                array = batch.column(column)
+                present = np.flatnonzero(array.is_valid().to_numpy(zero_copy_only=False)) \
+                    if array.null_count else np.arange(rows)
+                row_indices.append(present.astype(np.int32))
+                column_indices.append(np.full(len(present), j, dtype=np.int32))
+                values.append(array.to_numpy(zero_copy_only=False)[present].astype(dtype, copy=False))
+            block = sparse.coo_matrix(
+                (np.concatenate(values) if values else np.empty(0, dtype=dtype),
+                 (np.concatenate(row_indices) if row_indices else np.empty(0, dtype=np.int32),
+                  np.concatenate(column_indices) if column_indices else np.empty(0, dtype=np.int32))),
+                shape=(rows, len(columns)))
+            blocks.append(block.tocsr())
+        if not blocks:
+            return sparse.csr_matrix((0, len(columns)), dtype=dtype)
+        return sparse.vstack(blocks, format="csr")
+
+    @classmethod
+    def iter_batches(cls, dataset_path: str, columns: List[str],
+                     window: Optional[TimeWindow] = None) -> Iterator[pa.RecordBatch]:
+        """
+        Stream the requested columns of the dataset (or of a time window) as record
+        batches of at most MATRIX_BATCH_ROWS rows; from the memory-mapped view when
+        PROCESSED_MMAP_VIEWS is on
+        """
+        if MMAP_VIEWS:
+            yield from cls.view(dataset_path).iter_batches(columns, window)
+            return
+        for _, _, batch in _iter_column_batches(dataset_path, columns, window):
+            yield batch
+
+    @staticmethod
+    def view(dataset_path: str) -> DatasetView:
+        """
+        The dataset's memory-mapped view, built on first use by whichever process gets
+        there first. Views are named by content hash, so an append makes the next call
+        build a fresh one; the superseded file is removed (processes still reading it
+        keep their mapping)
+        """
+        view_directory = os.path.join(dataset_path, VIEW_DIRECTORY)
+        path = os.path.join(view_directory, content_hash(dataset_path)[:16] + ".arrow")
+        with _views_lock:
+            cached = _open_views.get(dataset_path)
+            if cached is not None and cached[0] == path:
+                return cached[1]
+            if not os.path.exists(path):
+                os.makedirs(view_directory, exist_ok=True)
+                with open(os.path.join(view_directory, "build.lock"), "w") as lock:
+                    if fcntl is not None:
+                        fcntl.flock(lock, fcntl.LOCK_EX)
+                    if not os.path.exists(path):
+                        DatasetView.build(dataset_path, path)
+                        for name in os.listdir(view_directory):
+                            if name.endswith((".arrow", ".arrow.json")) and not name.startswith(os.path.basename(path)):
+                                os.remove(os.path.join(view_directory, name))
+            view = DatasetView(path)
+            _open_views[dataset_path] = (path, view)
+            return view
+
+    @staticmethod
+    def null_counts(dataset_path: str, columns: List[str]) -> Dict[str, Optional[int]]:
+        """
+        Null count per column summed from Parquet row-group statistics, without decoding
+        any data. None when a part lacks statistics for the column.
+        """
+        counts: Dict[str, Optional[int]] = {column: 0 for column in columns}
+        for part in _read_manifest(dataset_path)['parts']:
+            metadata = pq.ParquetFile(os.path.join(dataset_path, part['file']), memory_map=True).metadata
+            positions = {metadata.schema.column(i).name: i for i in range(metadata.num_columns)}
+            for column in columns:
+                if counts[column] is None:
+                    continue
+                if column not in positions:
+                    # Column absent from this part: every row of the part is missing
+                    counts[column] += part['rows']
+                    continue
+                for g in range(metadata.num_row_groups):
+                    statistics = metadata.row_group(g).column(positions[column]).statistics
+                    if statistics is None or not statistics.has_null_count:
+                        counts[column] = None
+                        break
+                    counts[column] += statistics.null_count
+        return counts
+
+    @staticmethod
+    def schema(dataset_path: str) -> pa.Schema:
+        """
+        Arrow schema of the dataset (from the first part)
+        """
+        manifest = _read_manifest(dataset_path)
+        return pq.read_schema(os.path.join(dataset_path, manifest['parts'][0]['file']))
+
+
+def file_sha256(path: str, block_bytes: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(block_bytes), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def content_hash(dataset_path: str) -> str:
+    """
+    SHA-256 identifying the dataset's content: chained over its part files' hashes (in
+    manifest order), recorded when each part was written. Parts of datasets written
+    before that are hashed here.
+    """
+    digest = hashlib.sha256()
+    for part in _read_manifest(dataset_path)['parts']:
+        digest.update((part.get('sha256') or file_sha256(os.path.join(dataset_path, part['file']))).encode())
+    return digest.hexdigest()
+
+
+def _iter_column_batches(dataset_path: str, columns: List[str], window: Optional[TimeWindow] = None):
+    """
+    Yield (row_offset, rows, record_batch) over the dataset (or the rows of a time
+    window), projected to the columns each part actually has
+    """
+    if window is not None:
+        yield from _iter_window_batches(dataset_path, columns, window)
+        return
+    offset = 0
+    for part in _read_manifest(dataset_path)['parts']:
+        part_columns = [c for c in columns if c in part['columns']]
+        parquet_file = pq.ParquetFile(os.path.join(dataset_path, part['file']), memory_map=True)
+        if not part_columns:
+            yield offset, part['rows'], pa.RecordBatch.from_pydict({})
+            offset += part['rows']
+            continue
+        for batch in parquet_file.iter_batches(batch_size=MATRIX_BATCH_ROWS, columns=part_columns):
+            yield offset, batch.num_rows, batch
+            offset += batch.num_rows
+
+
+def _window_ns(window: TimeWindow) -> Tuple[Optional[int], Optional[int]]:
+    start, end = window
+    return (None if start is None else naive_utc(start).value,
+            None if end is None else naive_utc(end).value)
+
+
+def _overlaps(low: Optional[int], high: Optional[int], minimum, maximum) -> bool:
+    if minimum is None or maximum is None:
+        return False
+    return (high is None or naive_utc(minimum).value <= high) and (low is None or naive_utc(maximum).value >= low)
+
+
+def _window_row_groups(dataset_path: str, window: TimeWindow) -> Iterator[Tuple[dict, pq.ParquetFile, List[int]]]:
+    """
+    Yield (part, parquet_file, row_groups) for the row groups whose timestamp range
+    can overlap the window: parts are pruned by their manifest bounds, row groups by
+    their column statistics (kept when statistics are missing)
+    """
+    low, high = _window_ns(window)
+    for part in _read_manifest(dataset_path)['parts']:
+        if not _overlaps(low, high, part.get('min_timestamp'), part.get('max_timestamp')):
+            continue
+        parquet_file = pq.ParquetFile(os.path.join(dataset_path, part['file']), memory_map=True)
+        metadata = parquet_file.metadata
+        position = parquet_file.schema_arrow.get_field_index(TIMESTAMP_COLUMN)
+        groups = []
+        for g in range(metadata.num_row_groups):
+            statistics = metadata.row_group(g).column(position).statistics
+            if statistics is None or not statistics.has_min_max or \
+                    _overlaps(low, high, statistics.min, statistics.max):
+                groups.append(g)
+        if groups:
+            yield part, parquet_file, groups
+
+
+def _timestamp_bounds(batch: pa.RecordBatch) -> Tuple[Optional[int], Optional[int]]:
+    if TIMESTAMP_COLUMN not in batch.schema.names:
+        return None, None
+    timestamps = batch.column(TIMESTAMP_COLUMN)
+    bounds = pc.min_max(timestamps.cast(pa.timestamp("ns", tz=timestamps.type.tz)).cast(pa.int64()))
+    return bounds['min'].as_py(), bounds['max'].as_py()
+
+
+def _window_mask(timestamps: pa.Array, low: Optional[int], high: Optional[int]) -> pa.Array:
+    # Compare as int64 nanoseconds (UTC for tz-aware columns), like the date index
+    values = timestamps.cast(pa.timestamp("ns", tz=timestamps.type.tz)).cast(pa.int64())
+    mask = pc.is_valid(values)
+    if low is not None:
+        mask = pc.and_(mask, pc.greater_equal(values, low))
+    if high is not None:
+        mask = pc.and_(mask, pc.less_equal(values, high))
+    return mask
+
+
+def _iter_window_batches(dataset_path: str, columns: Optional[List[str]], window: TimeWindow):
+    """
+    Yield (row_offset, rows, record_batch) for the rows inside the window, offsets
+    counted within the window; columns=None reads every column of each part
+    """
+    low, high = _window_ns(window)
+    offset = 0
+    for part, parquet_file, groups in _window_row_groups(dataset_path, window):
+        part_columns = list(part['columns']) if columns is None else [c for c in columns if c in part['columns']]
+        read_columns = part_columns if TIMESTAMP_COLUMN in part_columns else part_columns + [TIMESTAMP_COLUMN]
+        for batch in parquet_file.iter_batches(batch_size=MATRIX_BATCH_ROWS, row_groups=groups,
+                                               columns=read_columns):
+            batch = batch.filter(_window_mask(batch.column(TIMESTAMP_COLUMN), low, high))
+            if batch.num_rows == 0:
+                continue
+            if len(read_columns) != len(part_columns):
+                batch = pa.RecordBatch.from_arrays([batch.column(c) for c in part_columns], names=part_columns)
+            yield offset, batch.num_rows, batch
+            offset += batch.num_rows
+
+
+def _read_window(dataset_path: str, columns: Optional[List[str]], window: TimeWindow,
+                 row_start: int = 0, row_stop: Optional[int] = None) -> pa.Table:
+    tables = []
+    for offset, rows, batch in _iter_window_batches(dataset_path, columns, window):
+        if row_stop is not None and offset >= row_stop:
+            break
+        if offset + rows <= row_start:
+            continue
+        first = max(row_start - offset, 0)
+        last = rows if row_stop is None else min(rows, row_stop - offset)
+        tables.append(pa.Table.from_batches([batch]).slice(first, last - first))
+    if not tables:
+        return _empty_table(dataset_path, columns)
+    if len(tables) == 1:
+        return tables[0]
+    return pa.concat_tables(tables, promote_options="permissive")
+
+
+def _empty_table(dataset_path: str, columns: Optional[List[str]]) -> pa.Table:
+    manifest = _read_manifest(dataset_path)
+    schema = pq.read_schema(os.path.join(dataset_path, manifest['parts'][0]['file'])) \
+        if manifest['parts'] else pa.schema([])
+    if columns is not None:
+        schema = pa.schema([schema.field(c) for c in columns if c in schema.names])
+    return schema.empty_table()
+
+
+def _read_part_rows(part_path: str, columns: Optional[List[str]], start: int, stop: int) -> pa.Table:
+    parquet_file = pq.ParquetFile(part_path, memory_map=True)
+    metadata = parquet_file.metadata
+    groups = []
+    first_group_start = None
+    offset = 0
+    for i in range(metadata.num_row_groups):
+        group_rows = metadata.row_group(i).num_rows
+        if offset + group_rows > start and offset < stop:
+            if first_group_start is None:
+                first_group_start = offset
+            groups.append(i)
+        offset += group_rows
+    if not groups:
+        schema = parquet_file.schema_arrow
+        if columns is not None:
+            schema = pa.schema([schema.field(c) for c in columns])
+        return schema.empty_table()
+    table = parquet_file.read_row_groups(groups, columns=columns, use_threads=True)
+    # Slicing an Arrow table is zero-copy
+    return table.slice(start - first_group_start, stop - start)
+
+
+def _narrows_floats(source: pa.Schema, target: pa.Schema) -> bool:
+    for field in source:
+        index = target.get_field_index(field.name)
+        if index >= 0 and pa.types.is_floating(field.type) and pa.types.is_floating(target.field(index).type) \
+                and target.field(index).type.bit_width < field.type.bit_width:
+            return True
+    return False
+
+
+def _publish(staging_path: str, dataset_path: str):
+    # os.replace cannot rename over a non-empty directory: move the old dataset aside
+    # first, so readers only ever find the old dataset or the new one (or, for the
+    # instant between the two renames, none)
+    previous = None
+    if os.path.isdir(dataset_path):
+        previous = f"{staging_path}.replaced"
+        os.replace(dataset_path, previous)
+    os.replace(staging_path, dataset_path)
+    if previous is not None:
+        shutil.rmtree(previous, ignore_errors=True)
+
+
+def _read_manifest(dataset_path: str) -> dict:
+    with open(os.path.join(dataset_path, MANIFEST_FILE)) as fh:
+        return json.load(fh)
+
+
+def _write_manifest(dataset_path: str, manifest: dict):
+    write_json(os.path.join(dataset_path, MANIFEST_FILE), manifest, indent=2)
@@ -0,0 +1,138 @@
+from collections import Counter, deque
+from datetime import datetime
+from typing import Dict, List, Optional
+import os
+import sys
+import threading
+import time
+import uuid
+
+# Opt-in: requests slower than this many milliseconds keep a sampled profile (0 = profiler off)
+PROFILE_SLOW_REQUEST_MS = float(os.getenv("PROFILE_SLOW_REQUEST_MS", "0"))
+# Sampling period; each snapshot holds the GIL briefly, so shorter periods cost more
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "10"))
+# Most recent slow-request profiles kept in memory
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "20"))
+PROFILE_MAX_DEPTH = 128
+
+# Leaf frames of threads parked waiting for work (event loop selector, idle pool workers)
+_IDLE_LEAVES = {("selectors.py", "select"), ("threading.py", "wait"), ("thread.py", "_worker"),
+                ("queue.py", "get")}
+# code object -> "file.py:function", so each snapshot only walks frames
+_frame_labels: Dict[object, str] = {}
+
+
+def _collapse(frame, thread_name: str) -> Optional[str]:
+    """
+    One stack in collapsed flame-graph form (root first, frames joined by ';'), or None
+    for an idle thread
+    """
+    code = frame.f_code
+    if (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES:
+        return None
+    names = []
+    while frame is not None and len(names) < PROFILE_MAX_DEPTH:
+        code = frame.f_code
+        label = _frame_labels.get(code)
+        if label is None:
+            label = _frame_labels[code] = f"{os.path.basename(code.co_filename)}:{code.co_name}"
+        names.append(label)
+        frame = frame.f_back
+    names.append(f"thread:{thread_name}")
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for slow requests. While at least one request is in flight a
+    daemon thread snapshots every thread's Python stack each `interval_ms` and adds it
+    to the profile of each in-flight request; a request that ends slower than
+    `threshold_ms` keeps its profile, the others drop theirs.
+
+    Profiles are collapsed stacks ("frame;frame;frame count" per line), the input of
+    flamegraph.pl, speedscope and similar tools. Samples cover the whole process, so a
+    profile taken under concurrent load includes the other requests' work too.
+    """
+
+    def __init__(self, threshold_ms: float = PROFILE_SLOW_REQUEST_MS, interval_ms: float = PROFILE_INTERVAL_MS,
+                 keep: int = PROFILE_KEEP):
+        self.threshold_ms = threshold_ms
+        self.interval = interval_ms / 1000.0
+        self.profiles = deque(maxlen=keep)
+        self.samples_taken = 0
+        # token -> [collapsed stack counts, snapshots taken while the request ran]
+        self._active: Dict[int, list] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._next_token = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms > 0
+
+    def begin(self) -> int:
+        with self._lock:
+            self._next_token += 1
+            token = self._next_token
+            self._active[token] = [Counter(), 0]
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return token
+
+    def end(self, token: int, method: str, path: str, status: int, seconds: float,
+            discard: bool = False) -> Optional[str]:
+        """
+        Finish a request's profile; returns the stored profile's ID if it was slow enough
+        """
+        with self._lock:
+            stacks, ticks = self._active.pop(token, (None, 0))
+        if discard or not stacks or seconds * 1000.0 < self.threshold_ms:
+            return None
+        profile = {
+            'profile_id': uuid.uuid4().hex[:12],
+            'captured_at': datetime.now().isoformat(),
+            'method': method,
+            'path': path,
+            'status': status,
+            'duration_ms': round(seconds * 1000.0, 3),
+            'ticks': ticks,
+            'samples': sum(stacks.values()),  # busy thread stacks, or one "(idle)" per tick without any
+            'interval_ms': self.interval * 1000.0,
+            'stacks': stacks
+        }
+        with self._lock:
+            self.profiles.append(profile)
+        return profile['profile_id']
+
+    def list_profiles(self) -> List[dict]:
+        with self._lock:
+            profiles = list(self.profiles)
+        return [{key: value for key, value in profile.items() if key != 'stacks'} for profile in reversed(profiles)]
+
+    def collapsed(self, profile_id: str) -> Optional[str]:
+        with self._lock:
+            profile = next((p for p in self.profiles if p['profile_id'] == profile_id), None)
+        if profile is None:
+            return None
+        return "".join(f"{stack} {count}\n" for stack, count in profile['stacks'].most_common())
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while True:
+            self._wake.wait()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks = [_collapse(frame, names.get(thread_id, str(thread_id)))
+                      for thread_id, frame in sys._current_frames().items() if thread_id != own_id]
+            # A request waiting on I/O or another process still shows where its time went
+            stacks = [stack for stack in stacks if stack is not None] or ["(idle)"]
+            with self._lock:
+                for entry in self._active.values():
+                    entry[0].update(stacks)
+                    entry[1] += 1
+                self.samples_taken += 1
+                if not self._active:
+                    self._wake.clear()
+            time.sleep(self.interval)
@@ -0,0 +1,211 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterator, Optional
+import io
+import itertools
+import os
+
+from app.services.processed_store import TIMESTAMP_COLUMN
+
+# Parse CSVs into compact dtypes chosen from a sample of the file (float32 sensor readings,
+# small ints, bool, categorical IDs) instead of pandas' float64/int64/object defaults
+SCHEMA_INFERENCE = os.getenv("SCHEMA_INFERENCE", "1").lower() not in ("0", "false", "no")
+# Rows read from the head of the file to infer the schema
+SCHEMA_SAMPLE_ROWS = int(os.getenv("SCHEMA_SAMPLE_ROWS", "10000"))
+# Text columns with at most this share of distinct values in the sample become categorical
+CATEGORY_MAX_UNIQUE_RATIO = float(os.getenv("SCHEMA_CATEGORY_MAX_UNIQUE_RATIO", "0.5"))
+# A float column stays float32 only if every value has at most this many decimals and reads
+# back unchanged at that precision (sensor readings written with a few decimals). The sample
+# proposes it; apply_schema checks it again on every chunk and widens the column if not
+FLOAT32_MAX_DECIMALS = 6
+
+INT_DTYPES = ("int8", "int16", "int32", "int64")
+# The dtypes apply_schema casts to; anything else recorded in a schema is left as parsed
+APPLIED_DTYPES = INT_DTYPES + ("float32", "float64", "bool", "category")
+# Largest integer every float32 holds exactly
+FLOAT32_EXACT_INT = 2 ** 24
+
+# Column name -> dtype name ('float32', 'int16', 'bool', 'category', ...)
+Schema = Dict[str, str]
+
+
+class SchemaMismatch(ValueError):
+    """
+    The parser met a value the inferred dtypes cannot hold (e.g. text in a float column)
+    """
+
+
+def infer_schema(file_path: str, sample_rows: int = SCHEMA_SAMPLE_ROWS) -> Optional[Schema]:
+    """
+    Narrowest safe dtype per column from the first `sample_rows` rows, or None when
+    SCHEMA_INFERENCE is off. Columns that count up (IDs) are sized for the whole file,
+    extrapolated from the sample's share of the file size. These are proposals:
+    apply_schema widens a column when a later chunk does not fit it.
+    """
+    if not SCHEMA_INFERENCE:
+        return None
+    with open(file_path, "rb") as fh:
+        sample = b"".join(itertools.islice(fh, sample_rows + 1))
+    df = pd.read_csv(io.BytesIO(sample))
+    estimated_rows = len(df) * max(os.path.getsize(file_path) / max(len(sample), 1), 1.0)
+
+    schema = {}
+    floats = [column for column in df.columns
+              if pd.api.types.is_float_dtype(df[column]) and column != TIMESTAMP_COLUMN]
+    schema.update(_float_dtypes(df[floats]))
+    for column in df.columns:
+        if column in schema or column == TIMESTAMP_COLUMN:
+            continue
+        series = df[column]
+        if pd.api.types.is_bool_dtype(series):
+            schema[column] = "bool"
+        elif pd.api.types.is_integer_dtype(series):
+            low, high = (int(series.min()), int(series.max())) if len(series) else (0, 0)
+            if len(series) > 1 and series.is_monotonic_increasing and series.is_unique:
+                high = int(low + (high - low) * estimated_rows / len(series)) + 1
+            schema[column] = _int_dtype(low, high)
+        elif series.dtype == object and len(series) and \
+                series.nunique() <= CATEGORY_MAX_UNIQUE_RATIO * len(series):
+            schema[column] = "category"
+    return schema
+
+
+def _float_dtypes(df: pd.DataFrame) -> Schema:
+    if df.empty or len(df.columns) == 0:
+        return {column: "float32" for column in df.columns}
+    values = df.to_numpy(dtype=np.float64)
+    finite = np.isfinite(values)
+    present = np.where(finite, values, 0.0)
+    # Fewest decimals that reproduce every sampled value; -1 if none up to the limit does
+    decimals = np.full(values.shape[1], -1)
+    for places in range(FLOAT32_MAX_DECIMALS + 1):
+        exact = (np.round(present, places) == present).all(axis=0) & (decimals < 0)
+        decimals[exact] = places
+    narrowed = present.astype(np.float32).astype(np.float64)
+    schema = {}
+    for i, column in enumerate(df.columns):
+        places = decimals[i]
+        in_range = np.abs(present[:, i]).max() < np.finfo(np.float32).max
+        safe = places >= 0 and in_range and np.array_equal(np.round(narrowed[:, i], places), present[:, i])
+        schema[column] = "float32" if safe else "float64"
+    return schema
+
+
+def _int_dtype(low: int, high: int) -> str:
+    for name in INT_DTYPES:
+        info = np.iinfo(name)
+        if info.min <= low and high <= info.max:
+            return name
+    return "int64"
+
+
+def parse_dtypes(schema: Optional[Schema]) -> dict:
+    """
+    The part of the schema the CSV parser applies itself: float columns parse as
+    float64, so text in them fails fast and apply_schema can check that a float32
+    column still round-trips before narrowing it
+    """
+    if not schema:
+        return {}
+    return {column: "float64" for column, dtype in schema.items() if dtype in ("float32", "float64")}
+
+
+def apply_schema(df: pd.DataFrame, schema: Optional[Schema]) -> pd.DataFrame:
+    """
+    Cast a parsed frame (or chunk) to the schema. A value outside what the sample showed
+    widens its column in `schema` (int8 -> int16, int -> float when NaNs appear, float32 ->
+    float64 when a value does not read back unchanged, anything that turned to text ->
+    left as parsed), so later chunks get the wider dtype too.
+    """
+    if not schema:
+        return df
+    narrowing = [column for column, dtype in schema.items()
+                 if dtype == "float32" and column in df.columns and str(df[column].dtype) != dtype
+                 and pd.api.types.is_numeric_dtype(df[column]) and not pd.api.types.is_bool_dtype(df[column])]
+    if narrowing:
+        for column, dtype in _float_dtypes(df[narrowing]).items():
+            schema[column] = dtype
+    casts = {}
+    for column, dtype in schema.items():
+        if dtype not in APPLIED_DTYPES or column not in df.columns or str(df[column].dtype) == dtype:
+            continue
+        series = df[column]
+        if dtype in INT_DTYPES:
+            dtype = _fit_int(series, dtype)
+        elif dtype in ("float32", "float64"):
+            if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+                dtype = "object"
+        elif dtype == "bool":
+            if not pd.api.types.is_bool_dtype(series):
+                dtype = "object"
+        if dtype == "object":
+            schema[column] = str(series.dtype)
+            continue
+        schema[column] = dtype
+        if str(series.dtype) != dtype:
+            casts[column] = dtype
+    return df.astype(casts, copy=False) if casts else df
+
+
+def _fit_int(series: pd.Series, dtype: str) -> str:
+    if pd.api.types.is_bool_dtype(series) or not pd.api.types.is_numeric_dtype(series):
+        return "object"
+    if pd.api.types.is_integer_dtype(series):
+        if not len(series):
+            return dtype
+        widest = _int_dtype(int(series.min()), int(series.max()))
+        return max(dtype, widest, key=INT_DTYPES.index)
+    # NaNs in an int column: float32 while it holds every value exactly, else float64
+    finite = series[np.isfinite(series)]
+    if finite.empty or ((finite % 1 == 0).all() and finite.abs().max() <= FLOAT32_EXACT_INT):
+        return "float32"
+    return "float64"
+
+
+def read_csv(file_path: str, schema: Optional[Schema], **kwargs) -> pd.DataFrame:
+    """
+    pd.read_csv with the schema applied; a file the float hints cannot parse is reread
+    without them
+    """
+    try:
+        df = pd.read_csv(file_path, dtype=parse_dtypes(schema) or None, **kwargs)
+    except ValueError:
+        if not parse_dtypes(schema):
+            raise
+        df = pd.read_csv(file_path, **kwargs)
+    return apply_schema(df, schema)
+
+
+def iter_csv(file_path: str, schema: Optional[Schema], chunk_rows: int,
+             parse_hints: bool = True) -> Iterator[pd.DataFrame]:
+    """
+    Chunked read_csv with the schema applied per chunk. A chunk the float hints cannot
+    parse raises SchemaMismatch: the caller restarts with `parse_hints=False`
+    """
+    dtype = (parse_dtypes(schema) or None) if parse_hints else None
+    with pd.read_csv(file_path, chunksize=chunk_rows, dtype=dtype) as reader:
+        while True:
+            try:
+                chunk = next(reader)
+            except StopIteration:
+                return
+            except ValueError as e:
+                if dtype is None:
+                    raise
+                raise SchemaMismatch(str(e)) from e
+            yield apply_schema(chunk, schema)
+
+
+def label_sum(values) -> float:
+    """
+    Sum of a label column whatever dtype it was parsed or stored as (int8, float32,
+    bool, nullable, categorical or text digits); unparseable values count as 0
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype(object)
+    if pd.api.types.is_bool_dtype(series):
+        return float(series.sum())
+    if not pd.api.types.is_numeric_dtype(series):
+        series = pd.to_numeric(series, errors="coerce")
+    return float(series.sum(skipna=True))
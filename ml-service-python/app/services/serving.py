@@ -0,0 +1,83 @@
+import numpy as np
+import pyarrow as pa
+from typing import Iterable, List, Optional
+import io
+import json
+
+JSON_CONTENT_TYPE = "application/json"
+ARROW_CONTENT_TYPE = "application/vnd.apache.arrow.stream"
+NPY_CONTENT_TYPE = "application/x-npy"
+# Names listed in the error for a request that omits selected features
+MISSING_FEATURES_SHOWN = 10
+
+
+def require_features(names: Iterable[str], feature_columns: List[str]):
+    """
+    Raise ValueError naming the model features absent from `names`. An omitted feature
+    is an error rather than a silent NaN: a missing reading is sent as null
+    """
+    present = set(names)
+    missing = [name for name in feature_columns if name not in present]
+    if missing:
+        shown = ", ".join(missing[:MISSING_FEATURES_SHOWN])
+        if len(missing) > MISSING_FEATURES_SHOWN:
+            shown += f" and {len(missing) - MISSING_FEATURES_SHOWN} more"
+        raise ValueError(f"{len(missing)} of the model's {len(feature_columns)} features are missing ({shown}); "
+                         f"send null for a missing reading")
+
+
+def project_columns(values: np.ndarray, columns: Optional[List[str]], feature_columns: List[str],
+                    input_columns: Optional[List[str]] = None) -> np.ndarray:
+    """
+    Reorder named input columns into model feature order; every feature must be named
+    (see require_features).
+
+    Unnamed rows are taken to be in feature order, or, when they are as wide as the
+    model's input_columns (every numeric column before feature selection), in that order.
+    """
+    if columns is None:
+        if values.shape[1] == len(feature_columns):
+            return values
+        if input_columns is None or values.shape[1] != len(input_columns):
+            raise ValueError(f"Expected {len(feature_columns)} feature values per row, got {values.shape[1]}")
+        columns = input_columns
+    if columns == feature_columns:
+        return values
+    require_features(columns, feature_columns)
+    position = {name: i for i, name in enumerate(columns)}
+    # One fancy-indexing gather instead of a column-by-column copy
+    return values[:, [position[name] for name in feature_columns]]
+
+
+def decode_feature_matrix(body: bytes, content_type: str, feature_columns: List[str],
+                          input_columns: Optional[List[str]] = None) -> np.ndarray:
+    """
+    Decode a batch payload into an (n_rows, n_features) float64 array in model feature order.
+
+    Supported payloads:
+      - application/json: {"columns": [...optional names...], "rows": [[...], ...]} (null = missing)
+      - application/vnd.apache.arrow.stream: Arrow IPC stream with one column per feature
+      - application/x-npy: a 2-D .npy array already in feature order
+    Rows without column names may also be full-width rows in input_columns order.
+    """
+    content_type = (content_type or JSON_CONTENT_TYPE).split(";")[0].strip().lower()
+
+    if content_type == ARROW_CONTENT_TYPE:
+        table = pa.ipc.open_stream(body).read_all()
+        require_features(table.column_names, feature_columns)
+        matrix = np.empty((table.num_rows, len(feature_columns)))
+        for j, name in enumerate(feature_columns):
+            matrix[:, j] = table[name].to_numpy(zero_copy_only=False)
+        return matrix
+
+    if content_type == NPY_CONTENT_TYPE:
+        values = np.load(io.BytesIO(body), allow_pickle=False).astype(np.float64, copy=False)
+        return project_columns(np.atleast_2d(values), None, feature_columns, input_columns)
+
+    payload = json.loads(body)
+    if not payload['rows']:
+        return np.empty((0, len(feature_columns)))
+    values = np.array(payload['rows'], dtype=np.float64)
+    if values.ndim != 2:
+        raise ValueError("'rows' must be a list of feature rows")
+    return project_columns(values, payload.get('columns'), feature_columns, input_columns)
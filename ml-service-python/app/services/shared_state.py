@@ -0,0 +1,185 @@
+from typing import Any, Callable, Dict, List, Optional
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# SQLite file shared by every worker process of the service (simulation sessions, legacy
+# polling state); WAL lets readers run alongside the single writer
+SHARED_STATE_PATH = os.getenv("SHARED_STATE_PATH", os.path.join("data", "shared_state.sqlite3"))
+# Seconds a writer waits for another process's transaction before failing
+SHARED_STATE_TIMEOUT = float(os.getenv("SHARED_STATE_TIMEOUT", "10"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    owner_pid INTEGER,
+    updated_at REAL NOT NULL,
+    state TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS kv (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SharedStateStore:
+    """
+    Small transactional store on local disk for state every worker must see: simulation
+    sessions (JSON state keyed by session ID, with the status and owning PID as columns
+    so limits and busy checks need no JSON parsing) and JSON values by key.
+
+    One connection per thread; each call is its own transaction, and read-modify-write
+    helpers take the write lock up front (BEGIN IMMEDIATE) so concurrent workers
+    serialize instead of losing updates.
+    """
+
+    def __init__(self, path: str = SHARED_STATE_PATH, timeout: float = SHARED_STATE_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        connection.executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # Autocommit mode; transactions are explicit where they matter
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    # -- sessions -------------------------------------------------------------------
+
+    def update_session(self, session_id: str, status: str, state: dict, owner_pid: Optional[int] = None) -> bool:
+        """
+        Overwrite a session's row; False if it no longer exists (closed by any worker)
+        """
+        return self._connection().execute(
+            "UPDATE sessions SET status = ?, owner_pid = ?, updated_at = ?, state = ? WHERE session_id = ?",
+            (status, owner_pid, time.time(), json.dumps(state, default=str), session_id)).rowcount > 0
+
+    def insert_session_within_limit(self, session_id: str, status: str, state: dict, open_statuses: tuple,
+                                    limit: int) -> int:
+        """
+        Insert a session unless `limit` sessions are already in `open_statuses`; returns
+        the open count seen, so the caller can tell a refusal (count >= limit)
+        """
+        connection = self._connection()
+        placeholders = ",".join("?" * len(open_statuses))
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            open_count = connection.execute(f"SELECT COUNT(*) FROM sessions WHERE status IN ({placeholders})",
+                                            open_statuses).fetchone()[0]
+            if open_count < limit:
+                connection.execute(
+                    "INSERT INTO sessions (session_id, status, owner_pid, updated_at, state) VALUES (?, ?, NULL, ?, ?)",
+                    (session_id, status, time.time(), json.dumps(state, default=str)))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return open_count
+
+    def get_session(self, session_id: str) -> Optional[dict]:
+        """
+        {'status', 'owner_pid', 'updated_at', 'state'} or None
+        """
+        row = self._connection().execute(
+            "SELECT status, owner_pid, updated_at, state FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        if row is None:
+            return None
+        return {'status': row[0], 'owner_pid': row[1], 'updated_at': row[2], 'state': json.loads(row[3])}
+
+    def session_status(self, session_id: str) -> Optional[str]:
+        row = self._connection().execute("SELECT status FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        return None if row is None else row[0]
+
+    def claim_session(self, session_id: str, owner_pid: int, claimable: Callable[[dict], bool]) -> Optional[dict]:
+        """
+        Atomically hand a session to `owner_pid` (status 'streaming') if `claimable(row)`
+        holds; returns the row as it was before the claim, or None if it was refused
+        """
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute("SELECT status, owner_pid, updated_at, state FROM sessions WHERE session_id = ?",
+                                     (session_id,)).fetchone()
+            current = None if row is None else \
+                {'status': row[0], 'owner_pid': row[1], 'updated_at': row[2], 'state': json.loads(row[3])}
+            if current is None or not claimable(current):
+                connection.execute("ROLLBACK")
+                return None
+            connection.execute("UPDATE sessions SET status = 'streaming', owner_pid = ?, updated_at = ? "
+                               "WHERE session_id = ?", (owner_pid, time.time(), session_id))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return current
+
+    def delete_session(self, session_id: str) -> bool:
+        return self._connection().execute("DELETE FROM sessions WHERE session_id = ?", (session_id,)).rowcount > 0
+
+    def list_sessions(self) -> List[dict]:
+        rows = self._connection().execute(
+            "SELECT session_id, status, owner_pid, updated_at, state FROM sessions ORDER BY updated_at").fetchall()
+        return [{'session_id': row[0], 'status': row[1], 'owner_pid': row[2], 'updated_at': row[3],
+                 'state': json.loads(row[4])} for row in rows]
+
+    def status_counts(self) -> Dict[str, int]:
+        return dict(self._connection().execute("SELECT status, COUNT(*) FROM sessions GROUP BY status").fetchall())
+
+    def delete_sessions_idle_since(self, cutoff: float, keep_statuses: tuple = ("streaming",)) -> int:
+        placeholders = ",".join("?" * len(keep_statuses))
+        return self._connection().execute(
+            f"DELETE FROM sessions WHERE updated_at < ? AND status NOT IN ({placeholders})",
+            (cutoff,) + tuple(keep_statuses)).rowcount
+
+    # -- values ---------------------------------------------------------------------
+
+    def get_value(self, key: str, default: Any = None) -> Any:
+        row = self._connection().execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+        return default if row is None else json.loads(row[0])
+
+    def set_value(self, key: str, value: Any):
+        self._connection().execute("INSERT OR REPLACE INTO kv (key, value) VALUES (?, ?)",
+                                   (key, json.dumps(value, default=str)))
+
+    def update_value(self, key: str, update: Callable[[Any], Any], default: Any = None) -> Any:
+        """
+        Replace a value with update(current) in one write transaction; returns the new value
+        """
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+            value = update(default if row is None else json.loads(row[0]))
+            connection.execute("INSERT OR REPLACE INTO kv (key, value) VALUES (?, ?)",
+                               (key, json.dumps(value, default=str)))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return value
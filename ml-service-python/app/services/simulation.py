@@ -0,0 +1,417 @@
+import asyncio
+import numpy as np
+import pandas as pd
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+import os
+import threading
+import time
+import uuid
+
+from app.services.metrics import PREDICTED_ROWS, timed
+from app.services.processed_store import LABEL_COLUMN, TIMESTAMP_COLUMN, ProcessedDataStore, TimeWindow
+from app.services.shared_state import SharedStateStore, pid_alive
+
+# Sessions beyond this many open simulations are rejected (HTTP 429) instead of piling up
+SIMULATION_MAX_SESSIONS = int(os.getenv("SIMULATION_MAX_SESSIONS", "8"))
+# Rows scored together and pushed as one event
+SIMULATION_BATCH_ROWS = int(os.getenv("SIMULATION_BATCH_ROWS", "256"))
+# Default replay rate in rows per second; 0 = as fast as the client reads
+SIMULATION_RATE = float(os.getenv("SIMULATION_RATE", "0"))
+# Paced streams emit at most this many events per second (smaller batches at low rates)
+SIMULATION_MAX_EVENTS_PER_SECOND = 10
+# Sessions without an attached stream for this long are dropped when new ones are created
+SIMULATION_IDLE_SECONDS = float(os.getenv("SIMULATION_IDLE_SECONDS", "600"))
+
+SESSION_STATES = ("created", "streaming", "paused", "completed", "cancelled")
+OPEN_STATES = ("created", "streaming", "paused")
+# Sensor readings passed through with each replayed row when the dataset has a column of
+# that name (any case); rows of datasets without one simply omit it
+SENSOR_COLUMNS = ("temperature", "pressure", "humidity")
+# Counters and cursor persisted for a session; `sent` is also where another worker resumes
+_COUNTERS = ("sent", "passed", "failed", "labelled", "correct", "confidence_sum")
+
+
+class SessionLimitExceeded(Exception):
+    """
+    Raised when creating a session would exceed SIMULATION_MAX_SESSIONS
+    """
+
+
+class SessionBusy(Exception):
+    """
+    Raised when a second stream attaches to a session that is already streaming
+    """
+
+
+class SimulationSession:
+    """
+    One replay of a simulation window through a model.
+
+    Each session owns its cursor over the window's row batches, its model and its
+    counters, so concurrent simulations never share state. Rows are read and scored
+    a batch at a time in a worker thread; a disconnected stream leaves its unsent
+    batches queued, and the next stream resumes from them.
+
+    With a SharedStateStore the counters and status are written through after every
+    delivered batch, so any worker process can report the session, cancel it, or
+    rebuild it at its cursor (see restore) and resume streaming.
+    """
+
+    def __init__(self, session_id: str, dataset_path: str, window: TimeWindow, scorer, metadata: dict,
+                 total_rows: int, batch_rows: int = SIMULATION_BATCH_ROWS, rate: float = SIMULATION_RATE,
+                 store: Optional[SharedStateStore] = None):
+        self.session_id = session_id
+        self.dataset_path = dataset_path
+        self.window = window
+        self.scorer = scorer
+        self.model_id = metadata['model_id']
+        self.feature_columns = metadata['feature_columns']
+        self.total_rows = total_rows
+        self.rate = rate
+        if rate > 0:
+            batch_rows = min(batch_rows, max(1, int(rate / SIMULATION_MAX_EVENTS_PER_SECOND)))
+        self.batch_rows = max(1, batch_rows)
+        self.status = "created"
+        self.sent = 0
+        self.passed = 0
+        self.failed = 0
+        self.labelled = 0
+        self.correct = 0
+        self.confidence_sum = 0
+        self.last_active = time.monotonic()
+        self.store = store
+        by_name = {str(column).lower(): column for column in ProcessedDataStore.manifest(dataset_path)['columns']}
+        self.sensor_columns = {name: by_name[name] for name in SENSOR_COLUMNS if name in by_name}
+        columns = ['Id', TIMESTAMP_COLUMN, LABEL_COLUMN] + self.feature_columns
+        columns += [column for column in self.sensor_columns.values() if column not in columns]
+        self._batches = ProcessedDataStore.iter_batches(dataset_path, columns, window)
+        # Arrow batches stay as read (zero-copy over a memory-mapped view); only the rows
+        # of each scored batch are converted to pandas
+        self._buffer = None
+        self._position = 0
+        self._skip = 0
+        self._pending: List[List[dict]] = []
+        # The last stream's read-ahead, picked up by the next stream
+        self._read_ahead: Optional[asyncio.Future] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def restore(cls, state: dict, status: str, scorer, metadata: dict,
+                store: Optional[SharedStateStore] = None) -> "SimulationSession":
+        """
+        Rebuild a session from its persisted state; reading resumes after the rows
+        already delivered
+        """
+        session = cls(state['session_id'], state['dataset_path'], tuple(state['window']), scorer, metadata,
+                      state['total_rows'], state['batch_rows'], state['rate'], store)
+        session.batch_rows = state['batch_rows']
+        for counter in _COUNTERS:
+            setattr(session, counter, state[counter])
+        session.status = status
+        session._skip = session.sent
+        return session
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            'session_id': self.session_id,
+            'dataset_path': self.dataset_path,
+            'window': [None if bound is None else str(bound) for bound in self.window],
+            'model_id': self.model_id,
+            'total_rows': self.total_rows,
+            'batch_rows': self.batch_rows,
+            'rate': self.rate,
+            **{counter: getattr(self, counter) for counter in _COUNTERS}
+        }
+
+    def _save(self) -> bool:
+        """
+        Write through to the shared store; False once any worker has closed the session
+        """
+        if self.store is None:
+            return True
+        owner = os.getpid() if self.status == "streaming" else None
+        return self.store.update_session(self.session_id, self.status, self.state(), owner)
+
+    def _next_batch_rows(self) -> bool:
+        while True:
+            batch = next(self._batches, None)
+            if batch is None:
+                return False
+            if self._skip >= batch.num_rows:
+                # Already delivered (by this or another worker): skip without converting
+                self._skip -= batch.num_rows
+                continue
+            self._buffer, self._position, self._skip = batch, self._skip, 0
+            return True
+
+    def _next_rows(self, limit: int) -> Optional[pd.DataFrame]:
+        pieces = []
+        needed = limit
+        while needed > 0:
+            if self._buffer is None or self._position >= self._buffer.num_rows:
+                if not self._next_batch_rows():
+                    break
+            piece = self._buffer.slice(self._position, needed)
+            self._position += piece.num_rows
+            needed -= piece.num_rows
+            pieces.append(piece.to_pandas())
+        if not pieces:
+            return None
+        return pieces[0] if len(pieces) == 1 else pd.concat(pieces, ignore_index=True)
+
+    def _score(self, rows: pd.DataFrame) -> List[dict]:
+        X = rows.reindex(columns=self.feature_columns).to_numpy(dtype=np.float64)
+        with timed("predict"):
+            predictions, probabilities = self.scorer.predict_batch(X)
+        PREDICTED_ROWS.inc(len(X), source="simulation")
+        confidences = np.rint(np.maximum(probabilities, 1.0 - probabilities) * 100).astype(int)
+        timestamps = pd.to_datetime(rows[TIMESTAMP_COLUMN]).dt.strftime("%Y-%m-%dT%H:%M:%S")
+        ids = rows['Id'] if 'Id' in rows else pd.Series(np.arange(self.sent, self.sent + len(rows)))
+        labels = rows[LABEL_COLUMN] if LABEL_COLUMN in rows else pd.Series(np.nan, index=rows.index)
+        # Response == 1 is a pass, as in the upload pass rate and the date index
+        scored = [{'time': timestamp, 'sampleId': f"SAMPLE_{int(sample_id)}" if pd.notna(sample_id) else None,
+                   'prediction': "Pass" if prediction == 1 else "Fail", 'confidence': int(confidence),
+                   'probability': round(float(probability), 6),
+                   'actual': None if pd.isna(label) else ("Pass" if int(label) == 1 else "Fail")}
+                  for timestamp, sample_id, prediction, confidence, probability, label
+                  in zip(timestamps, ids, predictions, confidences, probabilities, labels)]
+        for name, column in self.sensor_columns.items():
+            readings = pd.to_numeric(rows[column], errors="coerce").astype(np.float64)
+            for row, reading in zip(scored, readings):
+                row[name] = None if np.isnan(reading) else round(float(reading), 3)
+        return scored
+
+    def next_batch(self, limit: Optional[int] = None) -> Optional[List[dict]]:
+        """
+        Score and return up to `limit` (default: the session batch size) next rows of
+        the window, or None once it is exhausted. Thread-safe; runs model code.
+        """
+        with self._lock:
+            if self._pending:
+                return self._pending.pop(0)
+            rows = self._next_rows(limit or self.batch_rows)
+            return None if rows is None else self._score(rows)
+
+    def requeue(self, batch: Optional[List[dict]], front: bool = False):
+        """
+        Hand back a scored batch that was never delivered
+        """
+        if not batch:
+            return
+        with self._lock:
+            if front:
+                self._pending.insert(0, batch)
+            else:
+                self._pending.append(batch)
+
+    def record(self, batch: List[dict]) -> bool:
+        """
+        Count a delivered batch; False if the session was closed meanwhile (by any worker)
+        """
+        self.sent += len(batch)
+        for row in batch:
+            if row['prediction'] == "Fail":
+                self.failed += 1
+            else:
+                self.passed += 1
+            self.confidence_sum += row['confidence']
+            if row['actual'] is not None:
+                self.labelled += 1
+                self.correct += row['actual'] == row['prediction']
+        self.last_active = time.monotonic()
+        if not self._save():
+            self.status = "cancelled"
+            return False
+        return True
+
+    def _claim(self):
+        """
+        Take the session for a stream from this process; another worker's live stream or
+        a stale cursor (delivered elsewhere since this copy was built) refuses it
+        """
+        if self.store is None:
+            return
+        claimed = self.store.claim_session(
+            self.session_id, os.getpid(),
+            lambda row: row['status'] in OPEN_STATES and row['state']['sent'] == self.sent and
+            (row['status'] != "streaming" or not pid_alive(row['owner_pid'])))
+        if claimed is None:
+            raise SessionBusy(f"Simulation {self.session_id} is streaming elsewhere or was closed")
+
+    async def stream(self) -> AsyncIterator[List[dict]]:
+        """
+        Yield scored batches until the window is exhausted, paced to `rate` rows/s.
+
+        The next batch is read and scored in a worker thread while the current one is
+        sent. Nothing more is read until the consumer asks for it, so a slow client
+        holds the session at one batch of read-ahead instead of buffering the window.
+        """
+        if self.status == "streaming":
+            raise SessionBusy(f"Simulation {self.session_id} is already streaming")
+        if self.status in ("completed", "cancelled"):
+            return
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._claim)
+        self.status = "streaming"
+        previous, self._read_ahead = self._read_ahead, None
+        if previous is not None:
+            # Back in the queue before anything new is read, so rows stay in order
+            try:
+                self.requeue(await previous)
+            except Exception:
+                pass
+        started = loop.time()
+        emitted = 0
+        upcoming = loop.run_in_executor(None, self.next_batch)
+        try:
+            while True:
+                # Shielded so a cancelled stream leaves the batch for the callback below
+                batch = await asyncio.shield(upcoming)
+                if batch is None:
+                    self.status = "completed"
+                    return
+                upcoming = loop.run_in_executor(None, self.next_batch)
+                if self.rate > 0:
+                    delay = started + emitted / self.rate - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                emitted += len(batch)
+                try:
+                    yield batch
+                except BaseException:
+                    self.requeue(batch, front=True)
+                    raise
+                # Recorded before the next await, so a disconnect cannot land between the
+                # client getting a batch and the shared store counting it
+                if not self.record(batch) or self.status == "cancelled":
+                    return
+        finally:
+            # An undelivered read-ahead batch goes back to the session for the next stream
+            self._read_ahead = upcoming
+            if self.status == "streaming":
+                self.status = "paused"
+            self.last_active = time.monotonic()
+            self._save()
+
+    def cancel(self):
+        self.status = "cancelled"
+
+    def stats(self) -> Dict[str, Any]:
+        return session_stats(self.state(), self.status)
+
+
+def session_stats(state: Dict[str, Any], status: str) -> Dict[str, Any]:
+    """
+    API view of a session from its persisted state
+    """
+    sent = state['sent']
+    return {
+        'session_id': state['session_id'],
+        'model_id': state['model_id'],
+        'status': status,
+        'window': state['window'],
+        'total_rows': state['total_rows'],
+        'batch_rows': state['batch_rows'],
+        'rate': state['rate'],
+        'sent': sent,
+        'pass': state['passed'],
+        'fail': state['failed'],
+        'avg_confidence': round(state['confidence_sum'] / sent, 2) if sent else 0.0,
+        'accuracy': round(state['correct'] / state['labelled'], 4) if state['labelled'] else None,
+    }
+
+
+def _effective_status(row: dict) -> str:
+    # A stream whose worker process died is resumable, like a disconnected one
+    if row['status'] == "streaming" and not pid_alive(row['owner_pid']):
+        return "paused"
+    return row['status']
+
+
+class SimulationManager:
+    """
+    Creates simulation sessions and tracks them by session ID in a SharedStateStore, so
+    every worker process sees the same sessions and the session limit is global.
+
+    Each process keeps the session objects it has streamed from; one whose cursor is
+    behind the store (another worker delivered rows since) is rebuilt from the stored
+    state, loading its model with `model_loader(model_id) -> (scorer, metadata)`.
+    """
+
+    def __init__(self, store: SharedStateStore, model_loader: Callable[[str], Tuple[Any, dict]],
+                 max_sessions: int = SIMULATION_MAX_SESSIONS, idle_seconds: float = SIMULATION_IDLE_SECONDS):
+        self.store = store
+        self.model_loader = model_loader
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self._sessions: Dict[str, SimulationSession] = {}
+        self._lock = threading.Lock()
+
+    def create(self, dataset_path: str, window: TimeWindow, scorer, metadata: dict, total_rows: int,
+               batch_rows: Optional[int] = None, rate: Optional[float] = None) -> SimulationSession:
+        # Forget sessions nobody has streamed from for a while
+        self.store.delete_sessions_idle_since(time.time() - self.idle_seconds)
+        session = SimulationSession(uuid.uuid4().hex[:12], dataset_path, window, scorer, metadata, total_rows,
+                                    batch_rows or SIMULATION_BATCH_ROWS, SIMULATION_RATE if rate is None else rate,
+                                    self.store)
+        open_count = self.store.insert_session_within_limit(session.session_id, session.status, session.state(),
+                                                            OPEN_STATES, self.max_sessions)
+        if open_count >= self.max_sessions:
+            raise SessionLimitExceeded(f"{open_count} simulations already open (limit {self.max_sessions})")
+        with self._lock:
+            known = {row['session_id'] for row in self.store.list_sessions()}
+            self._sessions = {session_id: s for session_id, s in self._sessions.items() if session_id in known}
+            self._sessions[session.session_id] = session
+        return session
+
+    def get(self, session_id: str) -> Optional[SimulationSession]:
+        """
+        The session, rebuilt at the stored cursor if needed. May load a model: call it
+        off the event loop
+        """
+        row = self.store.get_session(session_id)
+        with self._lock:
+            local = self._sessions.get(session_id)
+            if row is None:
+                self._sessions.pop(session_id, None)
+                return None
+            if local is not None and (local.status == "streaming" or local.sent == row['state']['sent']):
+                if local.status != "streaming":
+                    local.status = _effective_status(row)
+                return local
+        scorer, metadata = self.model_loader(row['state']['model_id'])
+        session = SimulationSession.restore(row['state'], _effective_status(row), scorer, metadata, self.store)
+        with self._lock:
+            self._sessions[session_id] = session
+        return session
+
+    def stats(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        The session's counters as last written by any worker, without loading anything
+        """
+        row = self.store.get_session(session_id)
+        return None if row is None else session_stats(row['state'], _effective_status(row))
+
+    def close(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Cancel and forget a session; a stream on any worker stops after its current
+        batch. Returns the final stats, or None if there was no such session
+        """
+        stats = self.stats(session_id)
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is not None:
+            session.cancel()
+        if stats is None or not self.store.delete_session(session_id):
+            return None
+        return dict(stats, status="cancelled")
+
+    def list_sessions(self) -> List[dict]:
+        return [session_stats(row['state'], _effective_status(row)) for row in self.store.list_sessions()]
+
+    def status_counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for row in self.store.list_sessions():
+            status = _effective_status(row)
+            counts[status] = counts.get(status, 0) + 1
+        return counts
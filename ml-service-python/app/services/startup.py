@@ -0,0 +1,105 @@
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import importlib
+import os
+import threading
+import time
+
+from app.services.ml_model import HEAVY_MODULES
+
+# Warm the service in the background at startup (heavy imports, production model load);
+# /health/ready reports 503 until it finishes. Off: ready at once, first requests pay instead
+STARTUP_PREWARM = os.getenv("STARTUP_PREWARM", "1").lower() not in ("0", "false", "no")
+
+
+def warm_imports(modules=HEAVY_MODULES) -> List[str]:
+    """
+    Import the libraries the service defers until first use; returns the module names.
+    Also runs in training pool workers, which are fresh spawned interpreters
+    """
+    for name in modules:
+        importlib.import_module(name)
+    return list(modules)
+
+
+class StartupState:
+    """
+    Warm-up steps run one after another on a daemon thread, so the server accepts
+    connections (and answers liveness probes) while they run.
+
+    A step that raises LookupError is skipped (e.g. no production model yet); any other
+    error is recorded and the remaining steps still run. Readiness only waits for the
+    steps to finish: a failed warm-up leaves the work to the first request, it does not
+    keep the service out of rotation.
+    """
+
+    def __init__(self, prewarm: bool = STARTUP_PREWARM):
+        self.prewarm = prewarm
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self._steps: List[tuple] = []
+        # step name -> {'status', 'seconds', 'detail'}
+        self.results: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._start = 0.0
+
+    def add_step(self, name: str, fn: Callable[[], Optional[str]]):
+        """`fn` returns an optional detail string shown in the readiness report"""
+        self._steps.append((name, fn))
+        self.results[name] = {'status': 'pending', 'seconds': None, 'detail': None}
+
+    def start(self):
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        if not self.prewarm:
+            for name, _ in self._steps:
+                self._record(name, 'skipped', None, "STARTUP_PREWARM is off")
+            self._finish()
+            return
+        threading.Thread(target=self._run, name="startup-warmup", daemon=True).start()
+
+    def _run(self):
+        for name, fn in self._steps:
+            self._record(name, 'running', None, None)
+            start = time.perf_counter()
+            try:
+                detail = fn()
+                status = 'done'
+            except LookupError as e:
+                status, detail = 'skipped', str(e)
+            except Exception as e:
+                status, detail = 'failed', f"{type(e).__name__}: {e}"
+            self._record(name, status, time.perf_counter() - start, detail)
+        self._finish()
+
+    def _record(self, name: str, status: str, seconds: Optional[float], detail: Optional[str]):
+        with self._lock:
+            self.results[name] = {'status': status,
+                                  'seconds': round(seconds, 4) if seconds is not None else None,
+                                  'detail': detail}
+
+    def _finish(self):
+        self.finished_at = datetime.now()
+        self.seconds = time.perf_counter() - self._start
+        self._done.set()
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            steps = [{'name': name, **result} for name, result in self.results.items()]
+        return {
+            'ready': self.ready,
+            'prewarm': self.prewarm,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'seconds': round(self.seconds, 4) if self.ready else None,
+            'failed': [step['name'] for step in steps if step['status'] == 'failed'],
+            'steps': steps
+        }
@@ -0,0 +1,245 @@
+import pandas as pd
+from typing import List, Optional, Tuple
+import os
+from app.services.metrics import observe_stages, timed, timed_iter
+from app.services.processed_store import LABEL_COLUMN, TIMESTAMP_COLUMN, ProcessedDatasetWriter, ProcessedDataStore
+from app.services.schema_inference import SchemaMismatch, infer_schema, iter_csv, label_sum
+from app.services.timestamps import synthetic_timestamp_at
+
+# Bytes pulled from the upload stream per read; the upload never sits in RAM whole
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(8 * 1024 * 1024)))
+
+# Rows parsed per pandas chunk during streaming ingest
+INGEST_CHUNK_ROWS = int(os.getenv("INGEST_CHUNK_ROWS", "50000"))
+
+# Files larger than this are ingested in streaming mode unless the caller says otherwise
+STREAMING_THRESHOLD_BYTES = int(os.getenv("STREAMING_INGEST_THRESHOLD_BYTES", str(64 * 1024 * 1024)))
+
+
+def copy_upload_to_disk(source, destination: str, chunk_bytes: int = UPLOAD_CHUNK_BYTES, digest=None) -> int:
+    """
+    Copy an upload's spooled file object to disk in fixed-size chunks and return the
+    number of bytes written. A hashlib `digest` is fed every chunk on the way through.
+    Blocking: runs on the ingest executor with the parse that follows it.
+    """
+    written = 0
+    source.seek(0)
+    with open(destination, "wb") as buffer:
+        while True:
+            chunk = source.read(chunk_bytes)
+            if not chunk:
+                break
+            buffer.write(chunk)
+            if digest is not None:
+                digest.update(chunk)
+            written += len(chunk)
+    return written
+
+
+def should_stream(file_path: str, streaming: Optional[bool] = None) -> bool:
+    """
+    Resolve the ingest mode: an explicit flag wins, otherwise decide by file size
+    """
+    if streaming is not None:
+        return streaming
+    return os.path.getsize(file_path) >= STREAMING_THRESHOLD_BYTES
+
+
+def _timestamp(value) -> Optional[pd.Timestamp]:
+    return None if value is None else pd.Timestamp(value)
+
+
+def _isoformat(value) -> Optional[str]:
+    return None if value is None else pd.Timestamp(value).isoformat()
+
+
+class RunningSummary:
+    """
+    Running aggregates for the DataSummary fields, updated one chunk at a time
+    """
+
+    def __init__(self):
+        self.total_records = 0
+        self.total_columns = 0
+        self.pass_count = 0.0
+        self.earliest_timestamp = None
+        self.latest_timestamp = None
+
+    def update(self, chunk: pd.DataFrame):
+        self.total_records += len(chunk)
+        self.total_columns = len(chunk.columns)
+
+        if 'Response' in chunk.columns:
+            self.pass_count += label_sum(chunk['Response'])
+
+        if 'synthetic_timestamp' in chunk.columns and len(chunk) > 0:
+            chunk_min = chunk['synthetic_timestamp'].min()
+            chunk_max = chunk['synthetic_timestamp'].max()
+            if pd.notna(chunk_min) and (self.earliest_timestamp is None or chunk_min < self.earliest_timestamp):
+                self.earliest_timestamp = chunk_min
+            if pd.notna(chunk_max) and (self.latest_timestamp is None or chunk_max > self.latest_timestamp):
+                self.latest_timestamp = chunk_max
+
+    def to_dict(self) -> dict:
+        """
+        JSON form cached in the dataset manifest, so appends resume from it
+        """
+        return {
+            'total_records': self.total_records,
+            'total_columns': self.total_columns,
+            'pass_count': self.pass_count,
+            'earliest_timestamp': _isoformat(self.earliest_timestamp),
+            'latest_timestamp': _isoformat(self.latest_timestamp),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RunningSummary":
+        summary = cls()
+        summary.total_records = data['total_records']
+        summary.total_columns = data['total_columns']
+        summary.pass_count = data['pass_count']
+        summary.earliest_timestamp = _timestamp(data['earliest_timestamp'])
+        summary.latest_timestamp = _timestamp(data['latest_timestamp'])
+        return summary
+
+    @classmethod
+    def for_dataset(cls, dataset_path: str) -> "RunningSummary":
+        """
+        The dataset's cached aggregates; datasets written before they were cached are
+        summarised once from the label column and the date index
+        """
+        manifest = ProcessedDataStore.manifest(dataset_path)
+        if 'summary' in manifest:
+            return cls.from_dict(manifest['summary'])
+        summary = cls()
+        summary.total_records = manifest['total_records']
+        summary.total_columns = len(manifest['columns'])
+        if LABEL_COLUMN in manifest['columns']:
+            labels = ProcessedDataStore.read_table(dataset_path, [LABEL_COLUMN])[LABEL_COLUMN]
+            summary.pass_count = label_sum(labels.to_pandas())
+        if TIMESTAMP_COLUMN in manifest['columns']:
+            summary.earliest_timestamp, summary.latest_timestamp = ProcessedDataStore.date_index(dataset_path).bounds
+        return summary
+
+    def to_metadata(self, file_path: str, file_size: str, timestamp_start=None,
+                    timestamp_freq: Optional[str] = None) -> dict:
+        """
+        Produce the same metadata dict as DataProcessor._calculate_metadata
+        """
+        pass_rate = (self.pass_count / self.total_records * 100) if self.total_records > 0 else 0
+
+        earliest_timestamp = self.earliest_timestamp
+        latest_timestamp = self.latest_timestamp
+        if earliest_timestamp is None or latest_timestamp is None:
+            earliest_timestamp = synthetic_timestamp_at(0, timestamp_start, timestamp_freq)
+            latest_timestamp = synthetic_timestamp_at(max(self.total_records - 1, 0), timestamp_start, timestamp_freq)
+
+        return {
+            'file_name': os.path.basename(file_path),
+            'total_records': self.total_records,
+            'total_columns': self.total_columns,
+            'pass_rate': round(pass_rate, 2),
+            'earliest_timestamp': earliest_timestamp,
+            'latest_timestamp': latest_timestamp,
+            'file_size': file_size
+        }
+
+
+class StreamingCsvIngestor:
+    """
+    Bounded-memory ingest: parse the CSV in row chunks into the inferred compact dtypes,
+    synthesize timestamps per chunk, append each chunk to the processed dataset and fold
+    it into a RunningSummary.
+
+    Works with either DataProcessor implementation; it relies on
+    `_add_synthetic_timestamps(df, row_offset)`, `_format_file_size` and `processed_store`.
+    """
+
+    def __init__(self, processor, chunk_rows: int = INGEST_CHUNK_ROWS):
+        self.processor = processor
+        self.chunk_rows = chunk_rows
+
+    def ingest(self, file_path: str, add_synthetic_timestamps: bool = True,
+               append_to: Optional[str] = None) -> Tuple[dict, str]:
+        """
+        Process `file_path` chunk by chunk and return (metadata, processed_file_path).
+
+        With `append_to` (a processed dataset directory) the rows are added to that
+        dataset instead of replacing it: only the new rows are parsed and written, the
+        running aggregates resume from the ones cached in its manifest and synthetic
+        timestamps continue after its last row. The metadata covers the whole dataset.
+
+        Column dtypes come from a sample of the file, or from the schema stored with the
+        dataset being appended to.
+        """
+        try:
+            try:
+                return self._ingest(file_path, add_synthetic_timestamps, append_to, parse_hints=True)
+            except SchemaMismatch:
+                # A value the sample did not show: start over, narrowing after parsing. The
+                # first attempt's writer was aborted, so none of its parts are left behind
+                return self._ingest(file_path, add_synthetic_timestamps, append_to, parse_hints=False)
+        except Exception as e:
+            raise Exception(f"Error processing CSV file: {str(e)}")
+
+    def _ingest(self, file_path: str, add_synthetic_timestamps: bool, append_to: Optional[str],
+                parse_hints: bool) -> Tuple[dict, str]:
+        # Stage seconds summed over the chunks, observed once per ingest
+        timings = {}
+        with timed("ingest_parse", timings):
+            if append_to is not None:
+                summary = RunningSummary.for_dataset(append_to)
+                manifest = ProcessedDataStore.manifest(append_to)
+                columns = manifest['columns']
+                schema = dict(manifest['schema']) if 'schema' in manifest else infer_schema(file_path)
+                writer = ProcessedDataStore.open_appender(append_to, file_path)
+            else:
+                summary = RunningSummary()
+                columns = None
+                schema = infer_schema(file_path)
+                writer = self.processor.processed_store.open_writer(file_path)
+        row_offset = summary.total_records
+
+        try:
+            reader = iter_csv(file_path, schema, self.chunk_rows, parse_hints)
+            for chunk in timed_iter(reader, "ingest_parse", timings):
+                self._consume(chunk, summary, writer, row_offset, add_synthetic_timestamps, columns, timings)
+                row_offset += len(chunk)
+
+            if summary.total_columns == 0:
+                # Header-only file: the reader yields no chunks, keep the schema anyway
+                self._consume(pd.read_csv(file_path, nrows=0), summary, writer, 0, add_synthetic_timestamps,
+                              timings=timings)
+
+            with timed("ingest_save", timings):
+                writer.close(summary.to_dict())
+        except BaseException:
+            writer.abort()
+            raise
+        file_size = self.processor._format_file_size(os.path.getsize(file_path))
+        with timed("ingest_metadata", timings):
+            metadata = summary.to_metadata(file_path, file_size, self.processor.timestamp_start,
+                                           self.processor.timestamp_freq)
+        observe_stages(timings)
+        return metadata, writer.dataset_path
+
+    def _consume(self, chunk: pd.DataFrame, summary: RunningSummary, writer: ProcessedDatasetWriter,
+                 row_offset: int, add_synthetic_timestamps: bool, columns: Optional[List[str]] = None,
+                 timings: Optional[dict] = None):
+        if 'Response' not in chunk.columns:
+            raise ValueError("CSV file must contain a 'Response' column")
+
+        if add_synthetic_timestamps:
+            with timed("ingest_timestamps", timings):
+                chunk = self.processor._add_synthetic_timestamps(chunk, row_offset=row_offset)
+
+        if columns is not None:
+            # Appended rows must fit the dataset they join; columns are put in its order
+            if set(chunk.columns) != set(columns):
+                raise ValueError("CSV columns do not match the dataset being appended to")
+            chunk = chunk[columns]
+
+        with timed("ingest_metadata", timings):
+            summary.update(chunk)
+        with timed("ingest_save", timings):
+            writer.write(chunk)
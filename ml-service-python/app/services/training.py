@@ -0,0 +1,188 @@
+import multiprocessing
+import numpy as np
+import pyarrow as pa
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import os
+import time
+
+from app.services.feature_selection import SELECTION_PARAMS, select_features
+from app.services.fused_inference import PARITY_SAMPLE_ROWS, select_inference_backend
+from app.services.metrics import timed
+from app.services.ml_model import MLModelService, ProgressCallback
+from app.services.model_registry import MODEL_DIRECTORY, ModelRegistry
+from app.services.processed_store import ProcessedDataStore, TimeWindow, content_hash
+
+# Training runs in separate processes so the event loop keeps serving /health and predictions
+TRAINING_WORKERS = int(os.getenv("TRAINING_WORKERS", "1"))
+# "dense": mean-impute + scale a float64 frame (original path); "native": float32 matrix with
+# NaNs, no imputation or scaling; "sparse": like native but XGBoost gets a CSR matrix
+DATA_MODES = ("dense", "native", "sparse")
+TRAINING_DATA_MODE = os.getenv("TRAINING_DATA_MODE", "dense")
+# In native mode XGBoost is also given CSR input when at most this fraction of values is present
+SPARSE_DENSITY_THRESHOLD = float(os.getenv("SPARSE_DENSITY_THRESHOLD", "0.3"))
+# Inclusive synthetic_timestamp bounds of the training and testing periods (ISO strings or None)
+WINDOW_PARAMS = ("training_start", "training_end", "testing_start", "testing_end")
+
+
+def create_training_executor(max_workers: int = TRAINING_WORKERS) -> ProcessPoolExecutor:
+    """
+    Process pool for training jobs. Uses spawn: forking a process that already
+    initialised OpenMP (xgboost/lightgbm) can deadlock the child.
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def numeric_columns(dataset_path: str, target_column: str = 'Response') -> List[str]:
+    """
+    Numeric feature columns of a processed dataset, read from the Parquet schema only
+    """
+    schema = ProcessedDataStore.schema(dataset_path)
+    return [field.name for field in schema
+            if (pa.types.is_integer(field.type) or pa.types.is_floating(field.type) or pa.types.is_boolean(field.type))
+            and field.name != target_column and 'timestamp' not in field.name.lower()]
+
+
+def time_window(params: Dict[str, Any], period: str) -> Optional[TimeWindow]:
+    """
+    The (start, end) window of the 'training' or 'testing' period, or None if unbounded
+    """
+    start, end = params.get(f"{period}_start"), params.get(f"{period}_end")
+    return None if start is None and end is None else (start, end)
+
+
+def load_training_matrix(dataset_path: str, columns: List[str], data_mode: str, model_type: str,
+                         window: Optional[TimeWindow] = None):
+    """
+    Feature matrix for NaN-native training, read straight from the processed store:
+    CSR for XGBoost in sparse mode (or native mode on sparse enough data), otherwise a
+    float32 array with NaN for missing values. The density check uses whole-dataset
+    statistics even for a window.
+    """
+    if model_type == 'xgboost' and data_mode in ("native", "sparse"):
+        use_csr = data_mode == "sparse"
+        if not use_csr:
+            total_rows = ProcessedDataStore.manifest(dataset_path)['total_records']
+            null_counts = ProcessedDataStore.null_counts(dataset_path, columns)
+            if total_rows and columns and None not in null_counts.values():
+                density = 1.0 - sum(null_counts.values()) / (total_rows * len(columns))
+                use_csr = density <= SPARSE_DENSITY_THRESHOLD
+        if use_csr:
+            return ProcessedDataStore.read_csr(dataset_path, columns, window=window)
+    return ProcessedDataStore.read_matrix(dataset_path, columns, window=window)
+
+
+def run_training(dataset_path: str, params: Optional[Dict[str, Any]] = None,
+                 model_directory: str = MODEL_DIRECTORY,
+                 progress_callback: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+    """
+    Train on a processed dataset (loading only the selected feature columns and the
+    target) and register the result as a new model version. Executed inside the process pool.
+
+    With a training window only its rows are read, and the random split happens inside
+    it; with a testing window too, the testing rows are the held-out set instead.
+
+    A successful result carries `timings`, the seconds of each stage, because metrics
+    recorded here stay in the pool process; the job manager observes them.
+    """
+    start_time = time.perf_counter()
+    timings = {}
+    params = dict(params or {})
+    train_params = {key: value for key, value in params.items()
+                    if key not in SELECTION_PARAMS and key not in WINDOW_PARAMS and key != 'data_mode'}
+    target_column = params.get('target_column', 'Response')
+    model_type = params.get('model_type', 'xgboost')
+    data_mode = params.get('data_mode') or TRAINING_DATA_MODE
+    if data_mode not in DATA_MODES:
+        return {'success': False, 'error': f"Unknown data_mode '{data_mode}'; expected one of {', '.join(DATA_MODES)}"}
+    training_window = time_window(params, 'training')
+    testing_window = time_window(params, 'testing')
+    if testing_window is not None and training_window is None:
+        return {'success': False, 'error': "A testing window requires a training window"}
+    for period, window in (('training', training_window), ('testing', testing_window)):
+        if window is not None and not ProcessedDataStore.date_index(dataset_path).count(*window)['count']:
+            return {'success': False, 'error': f"No rows in the {period} window {window[0]} to {window[1]}"}
+
+    # Feature selection runs on the stored dataset, so dropped columns are never loaded
+    input_columns = numeric_columns(dataset_path, target_column)
+    selection = None
+    columns = input_columns
+    if params.get('feature_selection', True):
+        with timed("train_feature_selection", timings):
+            selection = select_features(dataset_path, input_columns, target_column,
+                                        max_missing_ratio=params.get('max_missing_ratio'),
+                                        min_variance=params.get('min_variance'),
+                                        top_k_features=params.get('top_k_features'),
+                                        n_jobs=params.get('n_jobs'), window=training_window)
+        columns = selection['selected_columns']
+        if not columns:
+            return {'success': False,
+                    'error': f"Feature selection kept none of the {len(input_columns)} numeric columns"}
+
+    registry = ModelRegistry(os.path.join(model_directory, "registry"))
+    model_id = registry.new_model_id(model_type)
+    service = MLModelService(registry.version_path(model_id))
+    try:
+        if data_mode == "dense":
+            df = ProcessedDataStore.read_frame(dataset_path, columns + [target_column], window=training_window)
+            eval_df = None if testing_window is None else \
+                ProcessedDataStore.read_frame(dataset_path, columns + [target_column], window=testing_window)
+            result = service.train_model(df, progress_callback=progress_callback, eval_df=eval_df, **train_params)
+            del df, eval_df
+        else:
+            train_params.pop('target_column', None)
+            y = ProcessedDataStore.read_table(dataset_path, [target_column], window=training_window)[target_column] \
+                .to_numpy(zero_copy_only=False)
+            # Passed without local names so train_matrix can release them after splitting
+            result = service.train_matrix(
+                load_training_matrix(dataset_path, columns, data_mode, model_type, training_window), y, columns,
+                progress_callback=progress_callback,
+                eval_set=None if testing_window is None else (
+                    load_training_matrix(dataset_path, columns, data_mode, model_type, testing_window),
+                    ProcessedDataStore.read_table(dataset_path, [target_column], window=testing_window)
+                    [target_column].to_numpy(zero_copy_only=False)),
+                **train_params)
+    except BaseException:
+        registry.discard(model_id)
+        raise
+    if not result['success']:
+        registry.discard(model_id)
+        return result
+    timings['train_fit'] = result['training_time']
+    register_start = time.perf_counter()
+    # Parity is checked on raw training rows, NaNs included, as requests send them: both
+    # paths impute missing values with the training means (dense) or keep them (native)
+    sample = ProcessedDataStore.read_frame(dataset_path, result['feature_columns'], row_stop=PARITY_SAMPLE_ROWS,
+                                           window=training_window).to_numpy(dtype=np.float64)
+    backend, parity = select_inference_backend(service, sample)
+
+    metadata = registry.register(model_id, {
+        'model_type': model_type,
+        'trained_at': datetime.now().isoformat(),
+        'dataset_path': dataset_path,
+        'dataset_hash': content_hash(dataset_path),
+        'feature_columns': result['feature_columns'],
+        # Full-width positional rows in this order are projected to feature_columns at serving time
+        'input_columns': input_columns,
+        'feature_selection': selection,
+        'metrics': result['metrics'],
+        'params': params,
+        'model_path': result['model_path'],
+        'scaler_path': result['scaler_path'],
+        'imputer_path': result['imputer_path'],
+        'training_samples': result['training_samples'],
+        'test_samples': result['test_samples'],
+        'training_time': result['training_time'],
+        'data_mode': data_mode,
+        'training_window': training_window,
+        'testing_window': testing_window,
+        'inference_backend': backend,
+        'fused_parity': parity
+    })
+    result.update({key: metadata[key] for key in ('model_id', 'trained_at', 'model_type', 'dataset_path',
+                                                  'dataset_hash', 'inference_backend')})
+    timings['train_register'] = time.perf_counter() - register_start
+    timings['train_total'] = time.perf_counter() - start_time
+    result['timings'] = {stage: round(seconds, 4) for stage, seconds in timings.items()}
+    return result
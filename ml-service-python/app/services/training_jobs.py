@@ -0,0 +1,282 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+import json
+import os
+import threading
+import time
+import uuid
+
+from app.services.atomic_json import write_json
+from app.services.metrics import REGISTRY, observe_stages
+from app.services.ml_model import TrainingCancelled
+from app.services.training import MODEL_DIRECTORY, run_training
+from app.services.tuning import run_tuning
+
+# Jobs beyond this many queued + running are rejected (HTTP 429) instead of piling up
+MAX_ACTIVE_JOBS = int(os.getenv("TRAINING_MAX_ACTIVE_JOBS", "4"))
+# Minimum seconds between progress writes from a worker; the final round is always written
+PROGRESS_WRITE_INTERVAL = float(os.getenv("TRAINING_PROGRESS_INTERVAL", "0.25"))
+
+TERMINAL_STATES = ("succeeded", "failed", "cancelled")
+WORKER_EXITED = "A training worker exited unexpectedly (e.g. killed for memory); the pool was restarted, retry the job"
+
+JOBS_FINISHED = REGISTRY.counter("training_jobs_finished_total", "Training and tuning jobs by outcome",
+                                 ("kind", "outcome"))
+
+
+class JobLimitExceeded(Exception):
+    """
+    Raised when a submission would exceed MAX_ACTIVE_JOBS
+    """
+
+
+class JobStateFile:
+    """
+    Job state persisted as one JSON file per job. Workers in other processes update it,
+    the API reads it, and cancellation is signalled with a sibling `.cancel` file.
+    """
+
+    def __init__(self, jobs_directory: str, job_id: str):
+        self.path = os.path.join(jobs_directory, f"{job_id}.json")
+        self.cancel_path = os.path.join(jobs_directory, f"{job_id}.cancel")
+
+    def read(self) -> Optional[dict]:
+        try:
+            with open(self.path) as fh:
+                return json.load(fh)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def update(self, **fields) -> dict:
+        state = self.read() or {}
+        state.update(fields)
+        write_json(self.path, state)
+        return state
+
+    def cancel_requested(self) -> bool:
+        return os.path.exists(self.cancel_path)
+
+    def request_cancel(self):
+        open(self.cancel_path, "w").close()
+
+
+def run_training_job(job_id: str, jobs_directory: str, dataset_path: str, params: Dict[str, Any],
+                     model_directory: str = MODEL_DIRECTORY) -> Dict[str, Any]:
+    """
+    Process-pool entry point: run training while streaming per-round progress into the
+    job state file and honouring cancellation between boosting rounds
+    """
+    state = JobStateFile(jobs_directory, job_id)
+    if state.cancel_requested():
+        state.update(status="cancelled", finished_at=datetime.now().isoformat())
+        return {'success': False, 'error': 'cancelled'}
+    state.update(status="running", started_at=datetime.now().isoformat())
+
+    last_write = [0.0]
+
+    def on_progress(iteration: int, total: int, loss: float, accuracy: float):
+        if state.cancel_requested():
+            raise TrainingCancelled()
+        now = time.monotonic()
+        if now - last_write[0] >= PROGRESS_WRITE_INTERVAL or iteration >= total:
+            last_write[0] = now
+            state.update(progress={'iteration': iteration, 'total_iterations': total,
+                                   'loss': round(float(loss), 6), 'accuracy': round(float(accuracy), 6)})
+
+    try:
+        result = run_training(dataset_path, params, model_directory, progress_callback=on_progress)
+    except TrainingCancelled:
+        state.update(status="cancelled", finished_at=datetime.now().isoformat())
+        return {'success': False, 'error': 'cancelled'}
+    except Exception as e:
+        result = {'success': False, 'error': str(e)}
+
+    if result['success']:
+        state.update(status="succeeded", finished_at=datetime.now().isoformat(), result=result)
+    else:
+        state.update(status="failed", finished_at=datetime.now().isoformat(), error=result['error'])
+    return result
+
+
+def run_tuning_job(job_id: str, jobs_directory: str, dataset_path: str, params: Dict[str, Any],
+                   model_directory: str = MODEL_DIRECTORY) -> Dict[str, Any]:
+    """
+    Process-pool entry point for a hyperparameter search: trials fan out to their own
+    pool, the leaderboard is written to the job state file after every trial, and the
+    cancel file stops running trials at their next boosting round
+    """
+    state = JobStateFile(jobs_directory, job_id)
+    if state.cancel_requested():
+        state.update(status="cancelled", finished_at=datetime.now().isoformat())
+        return {'success': False, 'error': 'cancelled'}
+    state.update(status="running", started_at=datetime.now().isoformat())
+
+    def on_trial(progress: dict):
+        state.update(tuning={key: value if key != 'leaderboard' else
+                             [{k: v for k, v in entry.items() if k != 'curve'} for entry in value]
+                             for key, value in progress.items()})
+
+    try:
+        result = run_tuning(dataset_path, params, model_directory, os.path.join(jobs_directory, f"{job_id}.trials"),
+                            report=on_trial, cancel_path=state.cancel_path)
+    except TrainingCancelled:
+        state.update(status="cancelled", finished_at=datetime.now().isoformat())
+        return {'success': False, 'error': 'cancelled'}
+    except Exception as e:
+        result = {'success': False, 'error': str(e)}
+
+    if result['success']:
+        state.update(status="succeeded", finished_at=datetime.now().isoformat(), tuning=result['tuning'],
+                     result=result)
+    else:
+        state.update(status="failed", finished_at=datetime.now().isoformat(), error=result['error'])
+    return result
+
+
+class TrainingJobManager:
+    """
+    Submits training jobs to a bounded process pool and tracks them by job ID.
+
+    With a TrainingCache, a job whose dataset and params were trained before completes
+    at submission with the memoized result, and successful runs are memoized.
+
+    A worker that dies (e.g. OOM-killed mid-fit) breaks the whole pool: its jobs fail,
+    and `executor_factory` builds the pool later jobs run on. A submission that meets
+    the broken pool first fails its job and raises BrokenProcessPool.
+    """
+
+    def __init__(self, executor: ProcessPoolExecutor, jobs_directory: str = os.path.join(MODEL_DIRECTORY, "jobs"),
+                 max_active_jobs: int = MAX_ACTIVE_JOBS, model_directory: str = MODEL_DIRECTORY,
+                 cache=None, executor_factory: Optional[Callable[[], ProcessPoolExecutor]] = None):
+        self.executor = executor
+        self.executor_factory = executor_factory
+        self.jobs_directory = jobs_directory
+        self.max_active_jobs = max_active_jobs
+        self.model_directory = model_directory
+        self.cache = cache
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        os.makedirs(jobs_directory, exist_ok=True)
+
+    def active_jobs(self) -> List[str]:
+        with self._lock:
+            return [job_id for job_id, future in self._futures.items() if not future.done()]
+
+    def submit(self, dataset_path: str, params: Dict[str, Any]) -> str:
+        """
+        Queue a training job and return its ID immediately
+        """
+        cache_key = self.cache.key(dataset_path, params) if self.cache is not None else None
+        cached = self.cache.lookup(cache_key) if cache_key is not None else None
+        if cached is not None:
+            return self._complete_cached(dataset_path, params, cached)
+        return self._submit(run_training_job, "training", dataset_path, params, cache_key)
+
+    def submit_tuning(self, dataset_path: str, params: Dict[str, Any]) -> str:
+        """
+        Queue a hyperparameter search (see run_tuning); it counts as one active job
+        """
+        return self._submit(run_tuning_job, "tuning", dataset_path, params)
+
+    def _submit(self, target, kind: str, dataset_path: str, params: Dict[str, Any],
+                cache_key: Optional[str] = None) -> str:
+        with self._lock:
+            # Forget finished jobs; their outcome lives in the state file
+            self._futures = {job_id: future for job_id, future in self._futures.items() if not future.done()}
+            active = len(self._futures)
+            if active >= self.max_active_jobs:
+                raise JobLimitExceeded(f"{active} training jobs already queued or running "
+                                       f"(limit {self.max_active_jobs})")
+            job_id = uuid.uuid4().hex[:12]
+            state = JobStateFile(self.jobs_directory, job_id)
+            state.update(job_id=job_id, kind=kind, status="queued", submitted_at=datetime.now().isoformat(),
+                         dataset_path=dataset_path, params=params, progress=None)
+            executor = self.executor
+            try:
+                future = executor.submit(target, job_id, self.jobs_directory, dataset_path, params,
+                                         self.model_directory)
+            except BrokenProcessPool:
+                state.update(status="failed", finished_at=datetime.now().isoformat(), error=WORKER_EXITED)
+                JOBS_FINISHED.inc(kind=kind, outcome="failed")
+                self._replace_executor(executor)
+                raise
+            self._futures[job_id] = future
+        future.add_done_callback(lambda f: self._finalize(job_id, f, kind, cache_key, executor))
+        return job_id
+
+    def _replace_executor(self, broken: ProcessPoolExecutor):
+        # Called with self._lock held; only the first caller for a broken pool replaces it
+        if self.executor is broken and self.executor_factory is not None:
+            broken.shutdown(wait=False, cancel_futures=True)
+            self.executor = self.executor_factory()
+
+    def _complete_cached(self, dataset_path: str, params: Dict[str, Any], result: dict) -> str:
+        job_id = uuid.uuid4().hex[:12]
+        now = datetime.now().isoformat()
+        JobStateFile(self.jobs_directory, job_id).update(
+            job_id=job_id, kind="training", status="succeeded", submitted_at=now, started_at=now, finished_at=now,
+            dataset_path=dataset_path, params=params, progress=None, cached=True, result=result)
+        future = Future()
+        future.set_result(result)
+        with self._lock:
+            self._futures[job_id] = future
+        JOBS_FINISHED.inc(kind="training", outcome="cached")
+        return job_id
+
+    def future(self, job_id: str) -> Optional[Future]:
+        with self._lock:
+            return self._futures.get(job_id)
+
+    def status(self, job_id: str) -> Optional[dict]:
+        state = JobStateFile(self.jobs_directory, job_id)
+        current = state.read()
+        if current is not None and current.get('status') not in TERMINAL_STATES:
+            current['cancel_requested'] = state.cancel_requested()
+        return current
+
+    def cancel(self, job_id: str) -> Optional[dict]:
+        """
+        Cancel a queued job outright, or flag a running one to stop after its current round.
+
+        Only the worker writes the state file once a job may be running, so a running job
+        is signalled through the cancel file rather than a state update.
+        """
+        state = JobStateFile(self.jobs_directory, job_id)
+        current = state.read()
+        if current is None or current.get('status') in TERMINAL_STATES:
+            return current
+        state.request_cancel()
+        future = self.future(job_id)
+        if future is not None and future.cancel():
+            return state.update(status="cancelled", finished_at=datetime.now().isoformat())
+        return dict(current, cancel_requested=True)
+
+    def _finalize(self, job_id: str, future: Future, kind: str, cache_key: Optional[str] = None,
+                  executor: Optional[ProcessPoolExecutor] = None):
+        state = JobStateFile(self.jobs_directory, job_id)
+        succeeded = not future.cancelled() and future.exception() is None and future.result()['success']
+        if succeeded:
+            # Stage timings recorded in the worker process
+            observe_stages(future.result().get('timings'))
+        if cache_key is not None and succeeded:
+            self.cache.store(cache_key, future.result())
+        if future.cancelled():
+            state.update(status="cancelled", finished_at=datetime.now().isoformat())
+            outcome = "cancelled"
+        elif future.exception() is not None:
+            # The worker died before it could record an outcome (e.g. BrokenProcessPool)
+            error = future.exception()
+            if isinstance(error, BrokenProcessPool):
+                with self._lock:
+                    self._replace_executor(executor)
+                error = WORKER_EXITED
+            state.update(status="failed", finished_at=datetime.now().isoformat(), error=str(error))
+            outcome = "failed"
+        else:
+            outcome = "succeeded" if succeeded else \
+                ("cancelled" if future.result().get('error') == 'cancelled' else "failed")
+        JOBS_FINISHED.inc(kind=kind, outcome=outcome)
+        if os.path.exists(state.cancel_path):
+            os.remove(state.cancel_path)
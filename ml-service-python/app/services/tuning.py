@@ -0,0 +1,296 @@
+import functools
+import math
+import multiprocessing
+import numpy as np
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import os
+import shutil
+import time
+
+from app.services.feature_selection import select_features
+from app.services.ml_model import MLModelService, TrainingCancelled
+from app.services.model_registry import MODEL_DIRECTORY
+from app.services.processed_store import ProcessedDataStore
+from app.services.training import numeric_columns, run_training, time_window
+
+# (low, high) per tuned parameter; learning_rate is sampled log-uniformly
+SEARCH_SPACE = {
+    'n_estimators': (50, 400),
+    'max_depth': (3, 10),
+    'learning_rate': (0.01, 0.3),
+}
+SEARCH_STRATEGIES = ("random", "halving")
+TUNING_TRIALS = int(os.getenv("TUNING_TRIALS", "12"))
+# Trials run at once; each gets cpu_count // parallel_trials threads so cores are never oversubscribed
+TUNING_PARALLEL_TRIALS = int(os.getenv("TUNING_PARALLEL_TRIALS", "0")) or max(1, (os.cpu_count() or 1) // 2)
+# Successive halving keeps the best 1/factor of the configs at each rung and gives them factor x the rounds
+HALVING_FACTOR = int(os.getenv("TUNING_HALVING_FACTOR", "3"))
+# Random search: from this round on, a trial whose eval loss is above the median of finished
+# trials at the same round is pruned (checked every PRUNE_INTERVAL rounds)
+PRUNE_WARMUP_ROUNDS = int(os.getenv("TUNING_PRUNE_WARMUP_ROUNDS", "20"))
+PRUNE_INTERVAL = 10
+# Request keys that configure the search rather than the model
+TUNING_PARAMS = ("strategy", "n_trials", "parallel_trials", "seed", "search_space")
+# Request keys passed through to every trial (the tuned ones come from the sampled config)
+TRIAL_TRAIN_PARAMS = ("model_type", "test_size", "tree_method", "early_stopping_rounds")
+# Trials train NaN-native on a float32 matrix, so the winner is retrained the same way
+# ("sparse" gives XGBoost the same missing values as a CSR matrix), never imputed and scaled
+TUNING_DATA_MODES = ("native", "sparse")
+
+
+class TrialPruned(TrainingCancelled):
+    """
+    Raised from a trial's progress callback when its eval loss falls behind the median
+    """
+
+
+def sample_configs(n_trials: int, search_space: Dict[str, Tuple[float, float]], seed: int) -> List[dict]:
+    rng = np.random.default_rng(seed)
+    configs = []
+    for _ in range(n_trials):
+        config = {}
+        for name, (low, high) in search_space.items():
+            if name == 'learning_rate':
+                config[name] = round(float(math.exp(rng.uniform(math.log(low), math.log(high)))), 5)
+            else:
+                config[name] = int(rng.integers(int(low), int(high) + 1))
+        configs.append(config)
+    return configs
+
+
+def halving_budgets(n_trials: int, max_rounds: int, factor: int = HALVING_FACTOR) -> List[Tuple[int, int]]:
+    """
+    (configs, boosting rounds) per successive-halving rung, ending at max_rounds
+    """
+    rungs = 1 + int(math.log(max(n_trials, 1)) / math.log(factor) + 1e-9)
+    budgets = []
+    configs = n_trials
+    for rung in range(rungs):
+        budgets.append((configs, max(1, int(max_rounds / factor ** (rungs - 1 - rung)))))
+        configs = max(1, configs // factor)
+    return budgets
+
+
+def median_curve(curves: List[List[float]]) -> List[float]:
+    """
+    Per-round median eval loss over the curves that reach that round
+    """
+    length = max((len(curve) for curve in curves), default=0)
+    return [float(np.median([curve[i] for curve in curves if len(curve) > i])) for i in range(length)]
+
+
+def prepare_trial_data(dataset_path: str, params: Dict[str, Any], work_directory: str) -> List[str]:
+    """
+    Select features once and store the training (and testing-window) matrices as .npy
+    files that every trial memory-maps instead of reading the dataset again
+    """
+    target_column = params.get('target_column', 'Response')
+    training_window = time_window(params, 'training')
+    testing_window = time_window(params, 'testing')
+    columns = numeric_columns(dataset_path, target_column)
+    if params.get('feature_selection', True):
+        columns = select_features(dataset_path, columns, target_column,
+                                  max_missing_ratio=params.get('max_missing_ratio'),
+                                  min_variance=params.get('min_variance'),
+                                  top_k_features=params.get('top_k_features'),
+                                  n_jobs=params.get('n_jobs'), window=training_window)['selected_columns']
+    os.makedirs(work_directory, exist_ok=True)
+    for name, window in (('train', training_window), ('test', testing_window)):
+        if name == 'test' and window is None:
+            continue
+        np.save(os.path.join(work_directory, f"X_{name}.npy"),
+                ProcessedDataStore.read_matrix(dataset_path, columns, window=window))
+        np.save(os.path.join(work_directory, f"y_{name}.npy"),
+                ProcessedDataStore.read_table(dataset_path, [target_column], window=window)[target_column]
+                .to_numpy(zero_copy_only=False))
+    return columns
+
+
+def run_trial(work_directory: str, trial: int, config: Dict[str, Any], base_params: Dict[str, Any],
+              n_jobs: int, reference_curve: Optional[List[float]] = None,
+              cancel_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Process-pool entry point: train one configuration on the memory-mapped trial data
+    (NaN-native, no imputation) and report its best eval loss. With a reference curve
+    the trial is pruned once its eval loss is above the reference at a checkpoint.
+    """
+    start = time.perf_counter()
+    losses = []
+
+    def on_progress(iteration: int, total: int, loss: float, accuracy: float):
+        if cancel_path is not None and os.path.exists(cancel_path):
+            raise TrainingCancelled()
+        losses.append(float(loss))
+        if reference_curve and iteration >= PRUNE_WARMUP_ROUNDS and iteration % PRUNE_INTERVAL == 0 \
+                and iteration <= len(reference_curve) and loss > reference_curve[iteration - 1]:
+            raise TrialPruned()
+
+    X = np.load(os.path.join(work_directory, "X_train.npy"), mmap_mode="r")
+    y = np.load(os.path.join(work_directory, "y_train.npy"), allow_pickle=True)
+    eval_set = None
+    if os.path.exists(os.path.join(work_directory, "X_test.npy")):
+        eval_set = (np.load(os.path.join(work_directory, "X_test.npy"), mmap_mode="r"),
+                    np.load(os.path.join(work_directory, "y_test.npy"), allow_pickle=True))
+    trial_directory = os.path.join(work_directory, f"trial_{trial}")
+    train_params = {key: base_params[key] for key in TRIAL_TRAIN_PARAMS if base_params.get(key) is not None}
+    entry = {'trial': trial, 'params': config}
+    try:
+        result = MLModelService(trial_directory).train_matrix(
+            X, y, [], n_jobs=n_jobs, progress_callback=on_progress, eval_set=eval_set, **train_params, **config)
+    except TrialPruned:
+        return dict(entry, status="pruned", score=min(losses), rounds=len(losses), curve=losses,
+                    seconds=round(time.perf_counter() - start, 3))
+    finally:
+        shutil.rmtree(trial_directory, ignore_errors=True)
+    if not result['success']:
+        return dict(entry, status="failed", error=result['error'], score=None, rounds=len(losses), curve=losses,
+                    seconds=round(time.perf_counter() - start, 3))
+    return dict(entry, status="completed", score=min(result['loss_curve']), rounds=len(result['loss_curve']),
+                best_iteration=result['best_iteration'], accuracy=result['metrics']['accuracy'],
+                f1_score=result['metrics']['f1_score'], curve=result['loss_curve'],
+                seconds=round(time.perf_counter() - start, 3))
+
+
+def run_tuning(dataset_path: str, params: Optional[Dict[str, Any]] = None, model_directory: str = MODEL_DIRECTORY,
+               work_directory: Optional[str] = None, report: Optional[Callable[[dict], None]] = None,
+               cancel_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Search n_estimators / max_depth / learning_rate for a dataset (and time windows),
+    then train the best configuration through run_training so it is registered and
+    promoted like any other version, in the trials' NaN-native data mode whatever
+    TRAINING_DATA_MODE says.
+
+    "random" runs n_trials sampled configurations with median pruning; "halving" runs
+    successive halving over boosting rounds. Trials run `parallel_trials` at a time in
+    their own processes, each limited to an equal share of the cores.
+    `report(progress)` is called after every finished trial.
+    """
+    params = dict(params or {})
+    strategy = params.get('strategy') or "random"
+    if strategy not in SEARCH_STRATEGIES:
+        return {'success': False,
+                'error': f"Unknown strategy '{strategy}'; expected one of {', '.join(SEARCH_STRATEGIES)}"}
+    n_trials = params.get('n_trials') or TUNING_TRIALS
+    parallel_trials = max(1, min(params.get('parallel_trials') or TUNING_PARALLEL_TRIALS, n_trials))
+    threads_per_trial = max(1, (os.cpu_count() or 1) // parallel_trials)
+    search_space = dict(SEARCH_SPACE, **{name: tuple(bounds) for name, bounds in (params.get('search_space') or {}).items()
+                                         if name in SEARCH_SPACE})
+    base_params = {key: value for key, value in params.items() if key not in TUNING_PARAMS}
+    base_params['data_mode'] = base_params.get('data_mode') or "native"
+    if base_params['data_mode'] not in TUNING_DATA_MODES:
+        return {'success': False,
+                'error': f"Tuning trains NaN-native; data_mode must be one of {', '.join(TUNING_DATA_MODES)}, "
+                         f"not '{base_params['data_mode']}'"}
+    for period in ('training', 'testing'):
+        window = time_window(params, period)
+        if window is not None and not ProcessedDataStore.date_index(dataset_path).count(*window)['count']:
+            return {'success': False, 'error': f"No rows in the {period} window {window[0]} to {window[1]}"}
+
+    budgets = halving_budgets(n_trials, int(search_space['n_estimators'][1])) if strategy == "halving" else None
+    work_directory = work_directory or os.path.join(model_directory, "tuning", f"{int(time.time() * 1000)}")
+    started = time.perf_counter()
+    trials = list(enumerate(sample_configs(n_trials, search_space, params.get('seed') or 42)))
+    entries: List[dict] = []
+    progress = {'strategy': strategy, 'trials_total': sum(count for count, _ in budgets) if budgets else n_trials,
+                'trials_completed': 0, 'rung': None, 'leaderboard': [], 'compute_time': 0.0}
+
+    def on_trial(entry: dict):
+        entries.append(entry)
+        progress['trials_completed'] += 1
+        progress['compute_time'] = round(progress['compute_time'] + entry['seconds'], 3)
+        progress['leaderboard'] = _leaderboard(entries)
+        if report is not None:
+            report(progress)
+
+    # Children inherit the thread limit, so numpy/OpenMP pools inside a trial stay within its share
+    saved_threads = os.environ.get("OMP_NUM_THREADS")
+    os.environ["OMP_NUM_THREADS"] = str(threads_per_trial)
+    pool = ProcessPoolExecutor(max_workers=parallel_trials, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        prepare_trial_data(dataset_path, base_params, work_directory)
+        run = functools.partial(pool.submit, run_trial, work_directory, base_params=base_params,
+                                n_jobs=threads_per_trial, cancel_path=cancel_path)
+        if budgets is None:
+            _random_search(run, trials, parallel_trials, on_trial)
+        else:
+            for rung, (_, rounds) in enumerate(budgets):
+                progress['rung'] = rung
+                ranked = _run_rung(run, trials, rounds, rung, on_trial)
+                keep = max(1, len(ranked) // HALVING_FACTOR) if rung < len(budgets) - 1 else len(ranked)
+                for entry in ranked[keep:]:
+                    entry['status'] = "pruned"
+                trials = [(entry['trial'], entry['params']) for entry in ranked[:keep]]
+                progress['leaderboard'] = _leaderboard(entries)
+    finally:
+        # Queued trials are dropped on failure or cancellation; running ones stop at their next round
+        pool.shutdown(wait=True, cancel_futures=True)
+        if saved_threads is None:
+            os.environ.pop("OMP_NUM_THREADS", None)
+        else:
+            os.environ["OMP_NUM_THREADS"] = saved_threads
+        shutil.rmtree(work_directory, ignore_errors=True)
+
+    leaderboard = _leaderboard(entries)
+    best = next((entry for entry in leaderboard if entry['status'] == "completed"), None)
+    if best is None:
+        return {'success': False, 'error': "No tuning trial completed"}
+    result = run_training(dataset_path, dict(base_params, **best['params']), model_directory)
+    if not result['success']:
+        return result
+    result['tuning'] = {
+        'strategy': strategy,
+        'best_params': best['params'],
+        'leaderboard': [{key: value for key, value in entry.items() if key != 'curve'} for entry in leaderboard],
+        'trials': len(entries),
+        'pruned': sum(entry['status'] == "pruned" for entry in leaderboard),
+        'parallel_trials': parallel_trials,
+        'threads_per_trial': threads_per_trial,
+        'compute_time': progress['compute_time'],
+        'wall_time': round(time.perf_counter() - started, 3)
+    }
+    return result
+
+
+def _random_search(run, trials: List[Tuple[int, dict]], parallel_trials: int, on_trial):
+    finished_curves: List[List[float]] = []
+    pending = {}
+    queue = list(trials)
+    while queue or pending:
+        while queue and len(pending) < parallel_trials:
+            trial, config = queue.pop(0)
+            # Judged against the trials that finished before it started
+            pending[run(trial, config, reference_curve=median_curve(finished_curves) or None)] = trial
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            pending.pop(future)
+            entry = future.result()
+            if entry['status'] == "completed":
+                finished_curves.append(entry['curve'])
+            on_trial(entry)
+
+
+def _run_rung(run, trials: List[Tuple[int, dict]], rounds: int, rung: int, on_trial) -> List[dict]:
+    """
+    Train every surviving config for `rounds` boosting rounds; completed entries best first
+    """
+    futures = [run(trial, dict(config, n_estimators=rounds)) for trial, config in trials]
+    entries = []
+    for future in futures:
+        entry = dict(future.result(), rung=rung)
+        entries.append(entry)
+        on_trial(entry)
+    return sorted((entry for entry in entries if entry['status'] == "completed"), key=_rank)
+
+
+def _rank(entry: dict):
+    return (entry['status'] != "completed", entry['score'] if entry['score'] is not None else math.inf)
+
+
+def _leaderboard(entries: List[dict]) -> List[dict]:
+    # One row per configuration: its furthest rung (halving) or its only run (random); best first
+    latest = {}
+    for entry in entries:
+        if entry['trial'] not in latest or entry.get('rung', 0) >= latest[entry['trial']].get('rung', 0):
+            latest[entry['trial']] = entry
+    return sorted(latest.values(), key=lambda entry: (-entry.get('rung', 0),) + _rank(entry))
@@ -0,0 +1 @@
+# IntelliInspect ML Service benchmarks (run from ml-service-python/, e.g. `python -m benchmarks.bench_ingest`)
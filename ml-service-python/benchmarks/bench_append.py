@@ -0,0 +1,82 @@
+"""
+Append benchmark: adding one CSV batch to an existing processed dataset in append mode
+vs re-ingesting the base file plus the batch from scratch, as the base grows.
+
+Append cost should track the batch size and stay flat across base sizes; the full
+re-ingest grows with the dataset. Each measurement runs in its own interpreter.
+
+    python -m benchmarks.bench_append --base-rows 100000 1000000 --batch-rows 10000 --columns 100
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.common import emit, generate_production_csv, peak_rss_mb, run_isolated
+
+
+def _measure(mode: str, csv_path: str, dataset_path: str):
+    from app.services.data_processor import DataProcessor
+    from app.services.streaming_ingest import StreamingCsvIngestor
+
+    os.chdir(os.path.dirname(csv_path))
+    ingestor = StreamingCsvIngestor(DataProcessor())
+    start = time.perf_counter()
+    metadata, _ = ingestor.ingest(csv_path, append_to=dataset_path if mode == "append" else None)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "mode": mode,
+        "total_records": metadata["total_records"],
+        "seconds": round(elapsed, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }))
+
+
+def _concatenate(base_csv: str, batch_csv: str, destination: str):
+    with open(destination, "wb") as out:
+        with open(base_csv, "rb") as base:
+            shutil.copyfileobj(base, out)
+        with open(batch_csv, "rb") as batch:
+            batch.readline()  # header
+            shutil.copyfileobj(batch, out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-rows", type=int, nargs="+", default=[100000, 400000, 1000000])
+    parser.add_argument("--batch-rows", type=int, default=10000)
+    parser.add_argument("--columns", type=int, default=100)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--worker", nargs=3, metavar=("MODE", "CSV", "DATASET"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _measure(*args.worker)
+        return
+
+    results = []
+    for base_rows in args.base_rows:
+        with tempfile.TemporaryDirectory() as workdir:
+            base_csv = generate_production_csv(os.path.join(workdir, "line.csv"), base_rows, args.columns)
+            batch_csv = generate_production_csv(os.path.join(workdir, "batch.csv"), args.batch_rows, args.columns,
+                                                seed=base_rows)
+            combined_csv = os.path.join(workdir, "combined.csv")
+            _concatenate(base_csv, batch_csv, combined_csv)
+            dataset_path = os.path.join(workdir, "data", "processed", "line_processed")
+            run_isolated("benchmarks.bench_append", ["--worker", "full", base_csv, dataset_path])
+
+            row = {"base_rows": base_rows, "batch_rows": args.batch_rows}
+            for mode, csv_path in (("append", batch_csv), ("reingest", combined_csv)):
+                result = run_isolated("benchmarks.bench_append", ["--worker", mode, csv_path, dataset_path])
+                row[f"{mode}_seconds"] = result["seconds"]
+                row[f"{mode}_peak_rss_mb"] = result["peak_rss_mb"]
+                row[f"{mode}_total_records"] = result["total_records"]
+            row["speedup"] = round(row["reingest_seconds"] / row["append_seconds"], 1)
+            results.append(row)
+    emit({"benchmark": "append", "columns": args.columns, "results": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Batch ingest benchmark: `--files` CSVs (one per station per shift) ingested one
+/process-data call at a time vs as one batch (a directory) on BATCH_INGEST_WORKERS
+processes, for each worker count in `--workers`.
+
+The batch should approach `sequential / workers` wall-clock time up to the machine's
+core count (reported as `cpus`); past it the workers only share cores. The pool is
+started before timing, as a running service's would be. Each mode runs in its own
+interpreter and must produce the same total rows and pass rate.
+
+    python -m benchmarks.bench_batch_ingest --files 16 --rows 50000 --columns 100 --workers 1 2 4 8
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.common import emit, generate_production_csv, peak_rss_mb, run_isolated
+
+
+def _measure(mode: str, directory: str, workers: int):
+    os.chdir(directory)
+    from app.services.batch_ingest import BatchIngestor, batch_name, create_batch_ingest_executor, resolve_batch_files
+    from app.services.data_processor import DataProcessor
+
+    processor = DataProcessor()
+    files = resolve_batch_files(os.path.join(directory, "line"))
+    if mode == "sequential":
+        start = time.perf_counter()
+        total_records, pass_count = 0, 0.0
+        for path in files:
+            df, metadata = processor.process_csv_file(path)
+            processor.save_processed_data(df, path)
+            total_records += metadata['total_records']
+            pass_count += metadata['pass_rate'] * metadata['total_records'] / 100
+        elapsed = time.perf_counter() - start
+        pass_rate = round(pass_count / total_records * 100, 2)
+    else:
+        executor = create_batch_ingest_executor(workers)
+        for future in [executor.submit(batch_name, "warm-up") for _ in range(workers)]:
+            future.result()
+        start = time.perf_counter()
+        metadata, _, _ = BatchIngestor(processor, executor, workers).ingest(os.path.join(directory, "line"), files)
+        elapsed = time.perf_counter() - start
+        executor.shutdown()
+        total_records, pass_rate = metadata['total_records'], metadata['pass_rate']
+    print(json.dumps({
+        "mode": mode,
+        "workers": workers,
+        "total_records": total_records,
+        "pass_rate": pass_rate,
+        "seconds": round(elapsed, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=16)
+    parser.add_argument("--rows", type=int, default=50000, help="rows per file")
+    parser.add_argument("--columns", type=int, default=100)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--worker", nargs=3, metavar=("MODE", "DIRECTORY", "WORKERS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _measure(args.worker[0], args.worker[1], int(args.worker[2]))
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        os.makedirs(os.path.join(workdir, "line"))
+        for i in range(args.files):
+            generate_production_csv(os.path.join(workdir, "line", f"station{i % 4}_shift{i // 4:03d}.csv"),
+                                    args.rows, args.columns, seed=i)
+        results.append(run_isolated("benchmarks.bench_batch_ingest", ["--worker", "sequential", workdir, 1]))
+        for workers in args.workers:
+            results.append(run_isolated("benchmarks.bench_batch_ingest", ["--worker", "batch", workdir, workers]))
+    sequential = results[0]['seconds']
+    for result in results:
+        if (result['total_records'], result['pass_rate']) != (results[0]['total_records'], results[0]['pass_rate']):
+            raise RuntimeError(f"{result['mode']} with {result['workers']} workers ingested different data")
+        result['speedup'] = round(sequential / result['seconds'], 2)
+    emit({"benchmark": "batch_ingest", "files": args.files, "rows_per_file": args.rows, "columns": args.columns,
+          "cpus": os.cpu_count(), "results": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Content cache benchmark: a cold ingest / training run vs the same request answered from
+the content-addressed caches (a re-upload of identical bytes, a retrain with identical
+params on the same dataset).
+
+    python -m benchmarks.bench_cache --rows 200000 --columns 100
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.common import emit, generate_production_csv
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--columns", type=int, default=100)
+    parser.add_argument("--n-estimators", type=int, default=50)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    from app.services.content_cache import DatasetCache, TrainingCache
+    from app.services.data_processor import DataProcessor
+    from app.services.model_registry import ModelRegistry
+    from app.services.processed_store import file_sha256
+    from app.services.streaming_ingest import RunningSummary
+    from app.services.training import run_training
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        csv_path = generate_production_csv(os.path.join(workdir, "line.csv"), args.rows, args.columns)
+        processor = DataProcessor()
+        dataset_cache = DatasetCache(processor.processed_store)
+
+        def ingest():
+            key = DatasetCache.key(file_sha256(csv_path))
+            dataset_path = dataset_cache.lookup(key)
+            if dataset_path is not None:
+                return RunningSummary.for_dataset(dataset_path).total_records, dataset_path
+            metadata, dataset_path = processor.process_csv_file_streaming(csv_path)
+            dataset_cache.record(key, dataset_path)
+            return metadata['total_records'], dataset_path
+
+        for mode in ("ingest_miss", "ingest_hit"):
+            start = time.perf_counter()
+            rows, dataset_path = ingest()
+            results.append({"mode": mode, "rows": rows, "seconds": round(time.perf_counter() - start, 4)})
+
+        registry = ModelRegistry(os.path.join(workdir, "models", "registry"))
+        training_cache = TrainingCache(registry, os.path.join(workdir, "models", "training_cache"))
+        params = {"n_estimators": args.n_estimators}
+        for mode in ("train_miss", "train_hit"):
+            start = time.perf_counter()
+            key = TrainingCache.key(dataset_path, params)
+            result = training_cache.lookup(key)
+            if result is None:
+                result = run_training(dataset_path, params, os.path.join(workdir, "models"))
+                training_cache.store(key, result)
+            results.append({"mode": mode, "model_id": result['model_id'],
+                            "seconds": round(time.perf_counter() - start, 4)})
+        stats = {"datasets": dataset_cache.stats(), "training": training_cache.stats()}
+
+    for hit in results[1::2]:
+        miss = next(r for r in results if r["mode"] == hit["mode"].replace("hit", "miss"))
+        hit["speedup"] = round(miss["seconds"] / hit["seconds"], 1)
+    emit({"benchmark": "content_cache", "rows": args.rows, "columns": args.columns, "results": results,
+          "cache": stats}, args.output)
+
+
+if __name__ == "__main__":
+    main()
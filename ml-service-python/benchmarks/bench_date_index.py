@@ -0,0 +1,98 @@
+"""
+Date-range benchmark: period counts and the daily series from the date index vs a
+full scan of the processed dataset's timestamp and label columns (what answering the
+same question without the index costs).
+
+    python -m benchmarks.bench_date_index --rows 100000 1000000 5000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import emit, percentile_ms
+from app.services.date_index import DateIndex
+from app.services.processed_store import LABEL_COLUMN, TIMESTAMP_COLUMN, ProcessedDataStore
+from app.services.timestamps import DEFAULT_FREQ, DEFAULT_START, synthetic_timestamps
+
+
+def _build_dataset(workdir: str, rows: int, chunk_rows: int = 1_000_000) -> str:
+    rng = np.random.default_rng(3)
+    writer = ProcessedDataStore(workdir).open_writer(os.path.join(workdir, f"dates_{rows}.csv"))
+    for offset in range(0, rows, chunk_rows):
+        n = min(chunk_rows, rows - offset)
+        writer.write(pd.DataFrame({
+            "Id": np.arange(offset, offset + n),
+            "F0": rng.normal(size=n).astype(np.float32),
+            LABEL_COLUMN: (rng.random(n) < 0.006).astype(np.int64),
+            TIMESTAMP_COLUMN: synthetic_timestamps(n, row_offset=offset),
+        }))
+    writer.close()
+    return writer.dataset_path
+
+
+def _periods(rows: int):
+    span = pd.Timedelta(DEFAULT_FREQ) * rows
+    edges = [DEFAULT_START + span * f for f in (0.0, 0.6, 0.8, 1.0)]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def _scan(dataset_path: str, periods):
+    frame = ProcessedDataStore.read_frame(dataset_path, [TIMESTAMP_COLUMN, LABEL_COLUMN])
+    timestamps = frame[TIMESTAMP_COLUMN]
+    counts = []
+    for start, end in periods:
+        mask = (timestamps >= start) & (timestamps <= end)
+        counts.append((int(mask.sum()), int(frame[LABEL_COLUMN][mask].sum())))
+    frame.groupby(timestamps.dt.floor("D"))[LABEL_COLUMN].agg(["size", "sum"])
+    return counts
+
+
+def _indexed(index: DateIndex, periods):
+    counts = [index.count(start, end) for start, end in periods]
+    index.daily()
+    return [(c['count'], c['fail']) for c in counts]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000, 5_000_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--scan-repeat", type=int, default=3)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in args.rows:
+            dataset_path = _build_dataset(workdir, rows)
+            periods = _periods(rows)
+            index = DateIndex(dataset_path)
+
+            indexed_samples = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                indexed = _indexed(index, periods)
+                indexed_samples.append(time.perf_counter() - start)
+            scan_samples = []
+            for _ in range(args.scan_repeat):
+                start = time.perf_counter()
+                scanned = _scan(dataset_path, periods)
+                scan_samples.append(time.perf_counter() - start)
+            if indexed != scanned:
+                raise RuntimeError(f"index/scan mismatch at {rows} rows: {indexed} vs {scanned}")
+
+            results.append({
+                "rows": rows,
+                "indexed_p50_ms": percentile_ms(indexed_samples, 50),
+                "scan_p50_ms": percentile_ms(scan_samples, 50),
+                "speedup": round(float(np.median(scan_samples) / np.median(indexed_samples)), 1),
+            })
+    emit({"benchmark": "date_index", "results": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Feature-selection benchmark: training time, peak RSS and serving throughput on a wide,
+sparse production-line dataset with and without the feature-selection stage.
+
+Most sensor columns are almost entirely NaN and a few are constant, like the real line
+data. Every mode runs run_training in its own interpreter so peak RSS is per mode;
+serving throughput is measured on full-width rows, which the selected model projects.
+
+    python -m benchmarks.bench_feature_selection --rows 100000 --columns 1000 --top-k 50
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.common import emit, peak_rss_mb, production_frame, run_isolated
+
+MODES = {
+    "all_columns": {"feature_selection": False},
+    "thresholds": {"feature_selection": True},
+    "thresholds_top_k": {"feature_selection": True},
+}
+
+
+def _build_dataset(workdir: str, rows: int, columns: int, sparse_fraction: float, constant_fraction: float) -> str:
+    from app.services.processed_store import ProcessedDataStore
+
+    rng = np.random.default_rng(11)
+    frame = production_frame(rows, columns, nan_density=0.3, failure_rate=0.05)
+    sensors = [c for c in frame.columns if c not in ("Id", "Response")]
+    order = rng.permutation(len(sensors))
+    n_sparse = int(len(sensors) * sparse_fraction)
+    n_constant = int(len(sensors) * constant_fraction)
+    # Keep the label-carrying first sensors informative
+    order = [i for i in order if i >= 4]
+    for i in order[:n_sparse]:
+        values = frame[sensors[i]].to_numpy()
+        values[rng.random(rows) < 0.98] = np.nan
+    for i in order[n_sparse:n_sparse + n_constant]:
+        frame[sensors[i]] = np.where(frame[sensors[i]].isna(), np.nan, 1.0).astype(np.float32)
+    return ProcessedDataStore(workdir).write(frame, os.path.join(workdir, "wide.csv"))
+
+
+def _measure(mode: str, dataset_path: str, top_k: int, predict_rows: int):
+    from app.services.model_registry import ModelRegistry
+    from app.services.processed_store import ProcessedDataStore
+    from app.services.serving import project_columns
+    from app.services.training import run_training
+
+    model_directory = os.path.join(os.path.dirname(os.path.dirname(dataset_path)), f"models_{mode}")
+    params = dict(MODES[mode], n_estimators=100, top_k_features=top_k if mode == "thresholds_top_k" else 0)
+    start = time.perf_counter()
+    result = run_training(dataset_path, params, model_directory)
+    elapsed = time.perf_counter() - start
+    if not result['success']:
+        raise RuntimeError(result['error'])
+
+    registry = ModelRegistry(os.path.join(model_directory, "registry"))
+    scorer, metadata = registry.load(result['model_id'])
+    full_width = ProcessedDataStore.read_frame(dataset_path, metadata['input_columns'], row_stop=predict_rows)
+    rows = full_width.to_numpy(dtype=np.float64)
+    predict_start = time.perf_counter()
+    repeats = 5
+    for _ in range(repeats):
+        scorer.predict_batch(project_columns(rows, None, metadata['feature_columns'], metadata['input_columns']))
+    predict_elapsed = time.perf_counter() - predict_start
+
+    print(json.dumps({
+        "mode": mode,
+        "features": len(metadata['feature_columns']),
+        "candidate_columns": len(metadata['input_columns']),
+        "pipeline_seconds": round(elapsed, 3),
+        "training_seconds": result['training_time'],
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "accuracy": result['metrics']['accuracy'],
+        "serving_rows_per_sec": round(repeats * len(rows) / predict_elapsed),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--columns", type=int, default=1000)
+    parser.add_argument("--sparse-fraction", type=float, default=0.8, help="Columns that are ~98%% NaN")
+    parser.add_argument("--constant-fraction", type=float, default=0.05)
+    parser.add_argument("--top-k", type=int, default=50)
+    parser.add_argument("--predict-rows", type=int, default=10000)
+    parser.add_argument("--modes", nargs="+", default=list(MODES))
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--worker", nargs=2, metavar=("MODE", "DATASET"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _measure(args.worker[0], args.worker[1], args.top_k, args.predict_rows)
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        dataset_path = _build_dataset(workdir, args.rows, args.columns, args.sparse_fraction, args.constant_fraction)
+        for mode in args.modes:
+            results.append(run_isolated("benchmarks.bench_feature_selection",
+                                        ["--top-k", args.top_k, "--predict-rows", args.predict_rows,
+                                         "--worker", mode, dataset_path]))
+    baseline = next((r for r in results if r["mode"] == "all_columns"), None)
+    if baseline is not None:
+        for result in results:
+            result["pipeline_speedup"] = round(baseline["pipeline_seconds"] / result["pipeline_seconds"], 2)
+            result["peak_rss_reduction"] = round(1 - result["peak_rss_mb"] / baseline["peak_rss_mb"], 3)
+            result["serving_speedup"] = round(result["serving_rows_per_sec"] / baseline["serving_rows_per_sec"], 2)
+    emit({"benchmark": "feature_selection", "rows": args.rows, "columns": args.columns, "results": results},
+         args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Fused inference benchmark: throughput of the legacy predict() path (scaler.transform on a
+DataFrame, then predict and predict_proba), MLModelService.predict_batch, and the fused
+float32 model with the scaler folded into the trees, plus a parity report per model type.
+
+    python -m benchmarks.bench_fused --model-types xgboost lightgbm --batch-sizes 1 256 16384
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.common import emit, percentile_ms, production_frame, train_benchmark_model
+from app.services.fused_inference import FusedTreeModel, parity_report
+
+
+def _measure(fn, duration: float):
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-types", nargs="+", default=["xgboost", "lightgbm"])
+    parser.add_argument("--train-rows", type=int, default=20000)
+    parser.add_argument("--columns", type=int, default=100)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 256, 16384])
+    parser.add_argument("--duration", type=float, default=2.0, help="Seconds spent per path and batch size")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    results = []
+    for model_type in args.model_types:
+        with tempfile.TemporaryDirectory() as model_directory:
+            service, _ = train_benchmark_model(args.train_rows, args.columns, model_directory, model_type=model_type)
+            fused = FusedTreeModel.from_service(service)
+            frame = production_frame(max(args.batch_sizes), args.columns, nan_density=0.3, seed=7)
+            feature_frame = frame[list(service.scaler.feature_names_in_)]
+            features = feature_frame.to_numpy(dtype=np.float64)
+
+            parity = parity_report(service, fused, features)
+            paths = {
+                "legacy_predict": lambda n: service.predict(feature_frame.iloc[:n]),
+                "predict_batch": lambda n: service.predict_batch(features[:n]),
+                "fused": lambda n: fused.predict_batch(features[:n]),
+            }
+            for batch_size in args.batch_sizes:
+                for path, fn in paths.items():
+                    latencies = _measure(lambda: fn(batch_size), args.duration)
+                    results.append({"model_type": model_type, "path": path, "batch_size": batch_size,
+                                    "calls": len(latencies), "p50_ms": percentile_ms(latencies, 50),
+                                    "p99_ms": percentile_ms(latencies, 99),
+                                    "rows_per_sec": round(batch_size * len(latencies) / sum(latencies))})
+            results.append({"model_type": model_type, "parity": parity})
+    emit({"benchmark": "fused_inference", "cpu_count": os.cpu_count(), "results": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Ingest benchmark: whole-file read_csv vs streaming chunked ingest.
+
+Measures peak RSS and rows/sec for each mode across file sizes. Every measurement
+runs in its own interpreter so ru_maxrss reflects only that run.
+
+    python -m benchmarks.bench_ingest --rows 50000 200000 1000000 --columns 200
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.common import generate_production_csv, peak_rss_mb, emit, run_isolated
+
+
+def _measure(mode: str, csv_path: str, workdir: str, chunk_rows: int):
+    from app.services.data_processor import DataProcessor
+    from app.services.streaming_ingest import StreamingCsvIngestor
+
+    os.chdir(workdir)
+    processor = DataProcessor()
+    baseline_rss = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "in_memory":
+        df, metadata = processor.process_csv_file(csv_path)
+        processor.save_processed_data(df, csv_path)
+    else:
+        metadata, _ = StreamingCsvIngestor(processor, chunk_rows=chunk_rows).ingest(csv_path)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "mode": mode,
+        "rows": metadata["total_records"],
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(metadata["total_records"] / elapsed, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "import_rss_mb": round(baseline_rss, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[20000, 100000, 400000])
+    parser.add_argument("--columns", type=int, default=200)
+    parser.add_argument("--chunk-rows", type=int, default=50000)
+    parser.add_argument("--modes", nargs="+", default=["in_memory", "streaming"])
+    parser.add_argument("--output", default=None, help="Optional JSON output path")
+    parser.add_argument("--worker", nargs=2, metavar=("MODE", "CSV"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _measure(args.worker[0], args.worker[1], os.path.dirname(args.worker[1]), args.chunk_rows)
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in args.rows:
+            csv_path = os.path.join(workdir, f"bench_{rows}x{args.columns}.csv")
+            generate_production_csv(csv_path, rows, args.columns)
+            size_mb = os.path.getsize(csv_path) / (1024 * 1024)
+            for mode in args.modes:
+                result = run_isolated("benchmarks.bench_ingest",
+                                      ["--chunk-rows", args.chunk_rows, "--worker", mode, csv_path])
+                result.update({"columns": args.columns, "file_mb": round(size_mb, 1)})
+                results.append(result)
+            os.remove(csv_path)
+    emit({"benchmark": "ingest", "results": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Ingest concurrency benchmark against a live `python -m app.serve` server: /health latency
+while it is idle and while `--clients` large CSVs are ingested at once through
+/process-data, plus how many of those ingests were admitted or turned away with 429
+(INGEST_MAX_CONCURRENT).
+
+Every client ingests a different file, so none is answered from the ingest dedup cache.
+
+    python -m benchmarks.bench_ingest_concurrency --rows 200000 --columns 200 --clients 4 --max-concurrent 2
+"""
+import argparse
+import http.client
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks.bench_simulation import _request
+from benchmarks.bench_workers import _start_server
+from benchmarks.common import emit, generate_production_csv, percentile_ms
+
+
+def _probe(port: int, stop: threading.Event, interval: float) -> list:
+    """/health latencies (seconds) until `stop` is set"""
+    samples = []
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    while not stop.is_set():
+        start = time.perf_counter()
+        connection.request("GET", "/health")
+        connection.getresponse().read()
+        samples.append(time.perf_counter() - start)
+        time.sleep(interval)
+    connection.close()
+    return samples
+
+
+def _probe_for(port: int, seconds: float, interval: float) -> list:
+    stop = threading.Event()
+    timer = threading.Timer(seconds, stop.set)
+    timer.start()
+    return _probe(port, stop, interval)
+
+
+def _latency(samples: list) -> dict:
+    return {"samples": len(samples), "p50_ms": percentile_ms(samples, 50), "p99_ms": percentile_ms(samples, 99),
+            "max_ms": round(max(samples) * 1000.0, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--columns", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=4, help="concurrent /process-data requests")
+    parser.add_argument("--max-concurrent", type=int, default=2, help="INGEST_MAX_CONCURRENT of the server")
+    parser.add_argument("--streaming", action="store_true", help="chunked ingest instead of whole-file")
+    parser.add_argument("--idle-seconds", type=float, default=2.0)
+    parser.add_argument("--probe-interval", type=float, default=0.02)
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        paths = [generate_production_csv(os.path.join(workdir, f"line_{i}.csv"), args.rows, args.columns, seed=i)
+                 for i in range(args.clients)]
+        os.environ["INGEST_MAX_CONCURRENT"] = str(args.max_concurrent)
+        server = _start_server(workdir, args.port, 1, False)
+        try:
+            idle = _probe_for(args.port, args.idle_seconds, args.probe_interval)
+
+            results = [None] * args.clients
+
+            def client(i: int):
+                start = time.perf_counter()
+                status, body = _request(http.client.HTTPConnection("127.0.0.1", args.port), "POST", "/process-data",
+                                        {"file_path": paths[i], "streaming": args.streaming})
+                results[i] = {"status": status, "success": status == 200 and body['success'],
+                              "seconds": round(time.perf_counter() - start, 3)}
+
+            samples = []
+            stop = threading.Event()
+            prober = threading.Thread(target=lambda: samples.extend(_probe(args.port, stop, args.probe_interval)))
+            prober.start()
+            threads = [threading.Thread(target=client, args=(i,)) for i in range(args.clients)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            stop.set()
+            prober.join()
+        finally:
+            server.terminate()
+            server.wait()
+
+    emit({"benchmark": "ingest_concurrency", "rows": args.rows, "columns": args.columns, "clients": args.clients,
+          "max_concurrent": args.max_concurrent, "streaming": args.streaming, "cpus": os.cpu_count(),
+          "health_idle": _latency(idle), "health_during_ingest": _latency(samples),
+          "ingest_wall_s": round(elapsed, 3),
+          "admitted": sum(1 for r in results if r['status'] == 200),
+          "rejected_429": sum(1 for r in results if r['status'] == 429),
+          "ingests": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
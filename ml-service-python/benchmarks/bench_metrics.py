@@ -0,0 +1,109 @@
+"""
+Instrumentation overhead benchmark: per-request latency of a small FastAPI app called
+directly over ASGI (no sockets) without middleware, with MetricsMiddleware, and with the
+sampling profiler active, for an empty route and a ~1 ms CPU route; plus the cost of one
+timed() block and of rendering /metrics.
+
+    python -m benchmarks.bench_metrics --requests 5000
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from benchmarks.common import emit, percentile_ms
+
+
+def _build_app(mode: str):
+    from fastapi import FastAPI
+    from app.services.metrics import MetricsMiddleware
+    from app.services.profiling import SamplingProfiler
+
+    app = FastAPI()
+    work = np.random.default_rng(0).normal(size=(200, 200))
+
+    @app.get("/empty")
+    async def empty():
+        return {}
+
+    @app.get("/work/{item_id}")
+    def cpu_work(item_id: int):
+        return {"item": item_id, "trace": float(np.trace(work @ work))}
+
+    if mode != "baseline":
+        # A threshold no request reaches: the sampler runs but nothing is kept
+        profiler = SamplingProfiler(threshold_ms=1e9) if mode == "profiler" else None
+        app.add_middleware(MetricsMiddleware, router=app.router, profiler=profiler)
+    return app
+
+
+async def _call(app, path: str):
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+             "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80)}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def _bench_route(app, path: str, requests: int):
+    for _ in range(min(200, requests)):
+        await _call(app, path)
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await _call(app, path)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def _bench_primitives(iterations: int):
+    from app.services.metrics import REGISTRY, STAGE_SECONDS, timed
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        with timed("bench"):
+            pass
+    timed_us = (time.perf_counter() - start) / iterations * 1e6
+    for stage in range(50):
+        STAGE_SECONDS.observe(0.01, stage=f"bench_{stage}")
+    start = time.perf_counter()
+    body = REGISTRY.render()
+    render_ms = (time.perf_counter() - start) * 1000.0
+    return {"timed_block_us": round(timed_us, 3), "render_ms": round(render_ms, 3),
+            "render_lines": body.count("\n")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    results = []
+    for route, path in (("empty", "/empty"), ("cpu_1ms", "/work/7")):
+        baseline = None
+        for mode in ("baseline", "metrics", "profiler"):
+            app = _build_app(mode)
+            latencies = asyncio.run(_bench_route(app, path, args.requests))
+            row = {"route": route, "mode": mode, "requests": len(latencies),
+                   "p50_ms": percentile_ms(latencies, 50), "p99_ms": percentile_ms(latencies, 99),
+                   "mean_ms": round(float(np.mean(latencies)) * 1000.0, 4)}
+            if baseline is None:
+                baseline = row
+            else:
+                row["overhead_us"] = round((row["mean_ms"] - baseline["mean_ms"]) * 1000.0, 1)
+                row["overhead_pct"] = round((row["mean_ms"] / baseline["mean_ms"] - 1) * 100, 1)
+            results.append(row)
+    emit({"benchmark": "metrics_overhead", "results": results, "primitives": _bench_primitives(100000)},
+         args.output)
+
+
+if __name__ == "__main__":
+    main()
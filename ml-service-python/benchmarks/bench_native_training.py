@@ -0,0 +1,91 @@
+"""
+NaN-native training benchmark: peak RSS and time of run_training in the dense path
+(mean imputation + StandardScaler on float64), the native path (float32 matrix with
+NaNs straight from the processed store) and the sparse path (CSR for XGBoost).
+
+Feature selection is disabled so every mode sees the same mostly-empty matrix. Each
+measurement runs in its own interpreter.
+
+    python -m benchmarks.bench_native_training --rows 200000 --columns 400 --nan-density 0.9
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.common import emit, peak_rss_mb, production_frame, run_isolated
+
+
+def _build_dataset(workdir: str, rows: int, columns: int, nan_density: float, chunk_rows: int = 50000) -> str:
+    import numpy as np
+    from app.services.processed_store import ProcessedDataStore
+
+    rng = np.random.default_rng(5)
+    writer = ProcessedDataStore(workdir).open_writer(os.path.join(workdir, "sparse.csv"))
+    for offset in range(0, rows, chunk_rows):
+        writer.write(production_frame(min(chunk_rows, rows - offset), columns, nan_density=nan_density,
+                                      failure_rate=0.05, id_offset=offset, rng=rng))
+    writer.close()
+    return writer.dataset_path
+
+
+def _measure(mode: str, model_type: str, dataset_path: str, n_estimators: int):
+    from app.services.training import run_training
+
+    model_directory = os.path.join(os.path.dirname(os.path.dirname(dataset_path)), f"models_{model_type}_{mode}")
+    baseline_rss = peak_rss_mb()
+    start = time.perf_counter()
+    result = run_training(dataset_path, {"model_type": model_type, "data_mode": mode, "feature_selection": False,
+                                         "n_estimators": n_estimators}, model_directory)
+    elapsed = time.perf_counter() - start
+    if not result['success']:
+        raise RuntimeError(result['error'])
+    print(json.dumps({
+        "model_type": model_type,
+        "mode": mode,
+        "pipeline_seconds": round(elapsed, 3),
+        "training_seconds": result['training_time'],
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "import_rss_mb": round(baseline_rss, 1),
+        "accuracy": result['metrics']['accuracy'],
+        "inference_backend": result['inference_backend'],
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--columns", type=int, default=400)
+    parser.add_argument("--nan-density", type=float, default=0.9)
+    parser.add_argument("--n-estimators", type=int, default=50)
+    parser.add_argument("--model-types", nargs="+", default=["xgboost", "lightgbm"])
+    parser.add_argument("--modes", nargs="+", default=["dense", "native", "sparse"])
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--worker", nargs=3, metavar=("MODE", "MODEL_TYPE", "DATASET"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _measure(args.worker[0], args.worker[1], args.worker[2], args.n_estimators)
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        dataset_path = _build_dataset(workdir, args.rows, args.columns, args.nan_density)
+        for model_type in args.model_types:
+            for mode in args.modes:
+                if mode == "sparse" and model_type != "xgboost":
+                    continue  # LightGBM reads implicit CSR entries as zeros
+                results.append(run_isolated("benchmarks.bench_native_training",
+                                            ["--n-estimators", args.n_estimators,
+                                             "--worker", mode, model_type, dataset_path]))
+    for result in results:
+        dense = next((r for r in results if r["model_type"] == result["model_type"] and r["mode"] == "dense"), None)
+        if dense is not None:
+            result["peak_rss_reduction"] = round(1 - result["peak_rss_mb"] / dense["peak_rss_mb"], 3)
+    emit({"benchmark": "native_training", "rows": args.rows, "columns": args.columns,
+          "nan_density": args.nan_density, "results": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Prediction benchmark: latency and throughput of MLModelService.predict_batch by batch
+size, and of concurrent single-row requests with and without micro-batching.
+
+    python -m benchmarks.bench_predict --batch-sizes 1 16 256 4096 --clients 64
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.common import emit, percentile_ms, production_frame, train_benchmark_model
+from app.services.micro_batcher import MicroBatcher
+
+
+def _bench_batches(service, features: np.ndarray, batch_sizes, duration: float):
+    results = []
+    for batch_size in batch_sizes:
+        batch = features[:batch_size]
+        latencies = []
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            service.predict_batch(batch)
+            latencies.append(time.perf_counter() - start)
+        results.append({"mode": "batch", "batch_size": batch_size, "calls": len(latencies),
+                        "p50_ms": percentile_ms(latencies, 50), "p99_ms": percentile_ms(latencies, 99),
+                        "rows_per_sec": round(batch_size * len(latencies) / sum(latencies))})
+    return results
+
+
+async def _bench_concurrent(predict_fn, features: np.ndarray, clients: int, requests_per_client: int,
+                            micro_batching: bool, window_ms: float):
+    batcher = MicroBatcher(predict_fn, window_ms=window_ms) if micro_batching else None
+    loop = asyncio.get_running_loop()
+    latencies = []
+
+    async def client(offset: int):
+        for i in range(requests_per_client):
+            row = features[(offset + i) % len(features)]
+            start = time.perf_counter()
+            if batcher is not None:
+                await batcher.submit(row)
+            else:
+                await loop.run_in_executor(None, predict_fn, row.reshape(1, -1))
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(c * requests_per_client) for c in range(clients)))
+    elapsed = time.perf_counter() - start
+    if batcher is not None:
+        await batcher.close()
+    result = {"mode": "micro_batched" if micro_batching else "per_row", "clients": clients,
+              "requests": len(latencies), "p50_ms": percentile_ms(latencies, 50),
+              "p99_ms": percentile_ms(latencies, 99), "rows_per_sec": round(len(latencies) / elapsed)}
+    if batcher is not None:
+        result.update({"window_ms": window_ms, "mean_batch_rows": round(batcher.rows / max(batcher.batches, 1), 1)})
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--train-rows", type=int, default=20000)
+    parser.add_argument("--columns", type=int, default=100)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 16, 256, 4096])
+    parser.add_argument("--duration", type=float, default=2.0, help="Seconds spent per batch size")
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--requests-per-client", type=int, default=50)
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as model_directory:
+        service, _ = train_benchmark_model(args.train_rows, args.columns, model_directory)
+        frame = production_frame(max(args.batch_sizes), args.columns, nan_density=0.3, seed=7)
+        features = frame[service.scaler.feature_names_in_].to_numpy(dtype=np.float64)
+
+        results = _bench_batches(service, features, args.batch_sizes, args.duration)
+        for micro_batching in (False, True):
+            results.append(asyncio.run(_bench_concurrent(service.predict_batch, features, args.clients,
+                                                         args.requests_per_client, micro_batching,
+                                                         args.window_ms)))
+    emit({"benchmark": "predict", "cpu_count": os.cpu_count(), "results": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Schema inference benchmark: ingest and training with compact dtypes inferred from a
+sample of the CSV (SCHEMA_INFERENCE=1) vs pandas' float64/int64 defaults (=0).
+
+Per mode, in a fresh interpreter each: whole-file ingest (seconds, peak RSS, size of the
+parsed frame), streaming ingest, the in-memory size of the processed dataset read back
+for training, and a training run on it. The pass rate must come out the same.
+
+    python -m benchmarks.bench_schema --rows 200000 --columns 200
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.common import emit, generate_production_csv, peak_rss_mb, reset_peak_rss, run_isolated
+
+MODES = ("compact", "default")
+
+
+def _measure(mode: str, csv_path: str, n_estimators: int):
+    os.environ["SCHEMA_INFERENCE"] = "1" if mode == "compact" else "0"
+    os.chdir(os.path.dirname(csv_path))
+    from app.services.data_processor import DataProcessor
+    from app.services.ml_model import MLModelService
+    from app.services.processed_store import ProcessedDataStore
+    from app.services.streaming_ingest import StreamingCsvIngestor
+
+    processor = DataProcessor()
+    reset_peak_rss()
+    start = time.perf_counter()
+    df, metadata = processor.process_csv_file(csv_path)
+    ingest_seconds = time.perf_counter() - start
+    ingest_peak = peak_rss_mb()
+    frame_mb = df.memory_usage(deep=True).sum() / 2 ** 20
+    del df
+
+    start = time.perf_counter()
+    _, dataset_path = StreamingCsvIngestor(processor).ingest(csv_path)
+    streaming_seconds = time.perf_counter() - start
+
+    reset_peak_rss()
+    start = time.perf_counter()
+    df = ProcessedDataStore.read_frame(dataset_path)
+    load_seconds = time.perf_counter() - start
+    loaded_mb = df.memory_usage(deep=True).sum() / 2 ** 20
+    start = time.perf_counter()
+    result = MLModelService(os.path.join(os.path.dirname(csv_path), f"models_{mode}")).train_model(
+        df, n_estimators=n_estimators)
+    if not result['success']:
+        raise RuntimeError(result['error'])
+    train_seconds = time.perf_counter() - start
+
+    print(json.dumps({
+        "mode": mode,
+        "pass_rate": metadata['pass_rate'],
+        "ingest_s": round(ingest_seconds, 3),
+        "ingest_peak_rss_mb": round(ingest_peak, 1),
+        "frame_mb": round(frame_mb, 1),
+        "streaming_ingest_s": round(streaming_seconds, 3),
+        "load_s": round(load_seconds, 3),
+        "loaded_frame_mb": round(loaded_mb, 1),
+        "train_s": round(train_seconds, 3),
+        "load_and_train_peak_rss_mb": round(peak_rss_mb(), 1),
+        "accuracy": result['metrics']['accuracy'],
+        "dtypes": {str(dtype): int(count) for dtype, count in df.dtypes.astype(str).value_counts().items()},
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--columns", type=int, default=200)
+    parser.add_argument("--n-estimators", type=int, default=20)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--worker", nargs=2, metavar=("MODE", "CSV"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _measure(args.worker[0], args.worker[1], args.n_estimators)
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_path = generate_production_csv(os.path.join(workdir, "line.csv"), args.rows, args.columns)
+        file_mb = round(os.path.getsize(csv_path) / 2 ** 20, 1)
+        for mode in args.modes:
+            results.append(run_isolated("benchmarks.bench_schema",
+                                        ["--n-estimators", args.n_estimators, "--worker", mode, csv_path]))
+    if len(results) == 2 and results[0]['pass_rate'] != results[1]['pass_rate']:
+        raise RuntimeError("pass rate differs between modes")
+    emit({"benchmark": "schema", "rows": args.rows, "columns": args.columns,
+          "file_mb": file_mb, "results": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
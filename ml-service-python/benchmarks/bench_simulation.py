@@ -0,0 +1,125 @@
+"""
+Simulation throughput benchmark against a live uvicorn server: rows per second for the
+per-sample polling path (/start-simulation + one GET /next-prediction per row, over a
+keep-alive connection) vs one Server-Sent Events replay session (/simulations).
+
+    python -m benchmarks.bench_simulation --rows 200000 --poll-rows 2000 --batch-sizes 64 256 1024
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import emit, percentile_ms, production_frame
+
+SERVICE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _prepare(workdir: str, rows: int, columns: int):
+    from app.services.processed_store import TIMESTAMP_COLUMN, ProcessedDataStore
+    from app.services.timestamps import synthetic_timestamps
+    from app.services.training import run_training
+
+    frame = production_frame(rows, columns, nan_density=0.3, failure_rate=0.05)
+    frame[TIMESTAMP_COLUMN] = synthetic_timestamps(rows)
+    dataset_path = ProcessedDataStore(os.path.join(workdir, "data")).write(frame, "replay.csv")
+    result = run_training(dataset_path, {"n_estimators": 100}, os.path.join(workdir, "models"))
+    if not result['success']:
+        raise RuntimeError(result['error'])
+    return frame[TIMESTAMP_COLUMN].iloc[0].isoformat(), frame[TIMESTAMP_COLUMN].iloc[-1].isoformat()
+
+
+def _request(connection: http.client.HTTPConnection, method: str, path: str, body=None):
+    payload = None if body is None else json.dumps(body)
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+    connection.request(method, path, body=payload, headers=headers)
+    response = connection.getresponse()
+    return response.status, json.loads(response.read() or b"null")
+
+
+def _start_server(workdir: str, port: int) -> subprocess.Popen:
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+                               "--log-level", "warning"],
+                              cwd=workdir, env=dict(os.environ, PYTHONPATH=SERVICE_ROOT))
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if _request(http.client.HTTPConnection("127.0.0.1", port), "GET", "/health")[0] == 200:
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("uvicorn did not start")
+
+
+def _poll(port: int, window, rows: int) -> dict:
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    _request(connection, "POST", "/start-simulation", {"simulation_start": window[0], "simulation_end": window[1]})
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(rows):
+        sent = time.perf_counter()
+        status, _ = _request(connection, "GET", "/next-prediction")
+        latencies.append(time.perf_counter() - sent)
+        if status != 200:
+            break
+    elapsed = time.perf_counter() - start
+    return {"mode": "poll", "rows": len(latencies), "rows_per_sec": round(len(latencies) / elapsed),
+            "request_p50_ms": percentile_ms(latencies, 50)}
+
+
+def _stream(port: int, window, batch_size: int) -> dict:
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    _, session = _request(connection, "POST", "/simulations", {"simulation_start": window[0],
+                                                               "simulation_end": window[1],
+                                                               "batch_size": batch_size, "rate": 0})
+    start = time.perf_counter()
+    connection.request("GET", f"/simulations/{session['sessionId']}/events")
+    response = connection.getresponse()
+    rows = events = 0
+    first_event = None
+    for line in response:
+        if line.startswith(b"data: "):
+            payload = json.loads(line[6:])
+            if 'rows' in payload:
+                rows += len(payload['rows'])
+                events += 1
+                first_event = first_event or time.perf_counter() - start
+    elapsed = time.perf_counter() - start
+    return {"mode": "sse", "batch_size": batch_size, "rows": rows, "events": events,
+            "rows_per_sec": round(rows / elapsed), "first_event_ms": round(first_event * 1000, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="Rows in the simulation window")
+    parser.add_argument("--columns", type=int, default=50)
+    parser.add_argument("--poll-rows", type=int, default=2000, help="Rows fetched one request at a time")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[64, 256, 1024])
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        window = _prepare(workdir, args.rows, args.columns)
+        server = _start_server(workdir, args.port)
+        try:
+            results.append(_poll(args.port, window, args.poll_rows))
+            for batch_size in args.batch_sizes:
+                results.append(_stream(args.port, window, batch_size))
+        finally:
+            server.terminate()
+            server.wait()
+    poll = results[0]["rows_per_sec"]
+    for result in results[1:]:
+        result["speedup_vs_poll"] = round(result["rows_per_sec"] / poll, 1)
+    emit({"benchmark": "simulation", "rows": args.rows, "columns": args.columns, "results": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
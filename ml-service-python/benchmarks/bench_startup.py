@@ -0,0 +1,122 @@
+"""
+Cold-start benchmark: how long a fresh service process takes to import app.main, to
+report ready, and to answer its first /predict, with a trained production model on disk.
+
+Modes, each run in a fresh interpreter:
+  prewarm  STARTUP_PREWARM=1: heavy imports and the production model load run in the
+           background at startup; the first prediction is sent once /health/ready is 200
+  lazy     STARTUP_PREWARM=0: the first prediction imports xgboost and loads the model
+  eager    like lazy, but sklearn/xgboost/lightgbm/scipy/joblib are imported before
+           app.main, as the service did before imports were deferred
+
+`time_to_first_prediction_s` runs from before `import app.main` to the first response.
+
+    python -m benchmarks.bench_startup --rows 20000 --columns 50 --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.common import emit, generate_production_csv, run_isolated
+
+MODES = ("prewarm", "lazy", "eager")
+# The libraries app.main imported at module level before they were deferred
+EAGER_MODULES = ("sklearn.model_selection", "sklearn.metrics", "sklearn.preprocessing", "xgboost", "lightgbm",
+                 "scipy.sparse", "joblib")
+
+
+def _setup(workdir: str, csv_path: str, n_estimators: int):
+    """Ingest the CSV and train the production model the measured workers will serve"""
+    os.environ["STARTUP_PREWARM"] = "0"
+    os.chdir(workdir)
+    from fastapi.testclient import TestClient
+    import app.main as service
+
+    with TestClient(service.app) as client:
+        response = client.post('/process-data', json={'file_path': csv_path, 'add_synthetic_timestamps': True})
+        if not response.json()['success']:
+            raise RuntimeError(response.json()['message'])
+        response = client.post('/train-model', json={'n_estimators': n_estimators})
+        if not response.json()['success']:
+            raise RuntimeError(response.json()['message'])
+        _, metadata = service.model_registry.production()
+    columns = metadata.get('input_columns') or metadata['feature_columns']
+    print(json.dumps({"model_id": metadata['model_id'], "input_values": len(columns)}))
+
+
+def _measure(mode: str, workdir: str, input_values: int):
+    os.environ["STARTUP_PREWARM"] = "1" if mode == "prewarm" else "0"
+    os.chdir(workdir)
+    start = time.perf_counter()
+    if mode == "eager":
+        import importlib
+        for name in EAGER_MODULES:
+            importlib.import_module(name)
+    import app.main as service
+    import_seconds = time.perf_counter() - start
+
+    from fastapi.testclient import TestClient
+    payload = {'values': [0.0] * input_values}
+    with TestClient(service.app) as client:
+        started = time.perf_counter()
+        while client.get('/health/ready').status_code == 503:
+            time.sleep(0.02)
+        ready = time.perf_counter()
+        response = client.post('/predict', json=payload)
+        first = time.perf_counter()
+        if response.status_code != 200:
+            raise RuntimeError(response.text)
+        client.post('/predict', json=payload)
+        second = time.perf_counter()
+    print(json.dumps({
+        "mode": mode,
+        "import_s": round(import_seconds, 4),
+        "startup_to_ready_s": round(ready - started, 4),
+        "ready_s": round(ready - start, 4),
+        "first_predict_ms": round((first - ready) * 1000.0, 2),
+        "second_predict_ms": round((second - first) * 1000.0, 2),
+        "time_to_first_prediction_s": round(first - start, 4),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--columns", type=int, default=50)
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--setup", nargs=2, metavar=("WORKDIR", "CSV"), help=argparse.SUPPRESS)
+    parser.add_argument("--worker", nargs=3, metavar=("MODE", "WORKDIR", "INPUT_VALUES"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.setup:
+        _setup(*args.setup, args.n_estimators)
+        return
+    if args.worker:
+        mode, workdir, input_values = args.worker
+        _measure(mode, workdir, int(input_values))
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_path = generate_production_csv(os.path.join(workdir, "line.csv"), args.rows, args.columns)
+        model = run_isolated("benchmarks.bench_startup",
+                             ["--n-estimators", args.n_estimators, "--setup", workdir, csv_path])
+        for mode in args.modes:
+            runs = [run_isolated("benchmarks.bench_startup", ["--worker", mode, workdir, model['input_values']])
+                    for _ in range(args.repeat)]
+            # Median of each measurement over the runs
+            results.append({"mode": mode, "runs": len(runs),
+                            **{key: statistics.median(run[key] for run in runs)
+                               for key in runs[0] if key != "mode"}})
+    emit({"benchmark": "startup", "rows": args.rows, "columns": args.columns,
+          "results": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Benchmark suite: throughput and peak memory of the core ingest, training and inference
+calls on a synthetic production-line CSV, comparable run to run.
+
+Cases: process_csv_file, add_synthetic_timestamps, save_processed_data (DataProcessor),
+train_model, predict and predict_batch (MLModelService). Each case runs in its own
+interpreter; setup (reading the CSV, training the model to predict with) happens before
+the peak-RSS reset, so `peak_delta_mb` is what the measured call itself allocates.
+`seconds` is the median over --repeat runs.
+
+Everything is generated locally from --seed and runs on CPU only. Save a run with
+--output, then compare later runs against it:
+
+    python -m benchmarks.bench_suite --rows 200000 --columns 100 --output baseline.json
+    python -m benchmarks.bench_suite --rows 200000 --columns 100 --baseline baseline.json --fail-on-regression
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.common import (current_rss_mb, emit, environment, generate_production_csv, peak_rss_mb,
+                               reset_peak_rss, run_isolated)
+
+CASES = ("process_csv_file", "add_synthetic_timestamps", "save_processed_data", "train_model", "predict",
+         "predict_batch")
+# Shape and seed settings that must match for two runs to be compared
+CONFIG_KEYS = ("rows", "columns", "nan_density", "failure_rate", "seed", "n_estimators", "n_jobs")
+
+
+def _setup(case: str, csv_path: str, args):
+    """
+    Return (prepare, run): run(*prepare()) is the measured call, and prepare's work
+    (per-run input copies) is not timed
+    """
+    import pandas as pd
+    from app.services.data_processor import DataProcessor
+    from app.services.ml_model import MLModelService
+
+    processor = DataProcessor()
+    no_input = tuple
+    if case == "process_csv_file":
+        return no_input, lambda: processor.process_csv_file(csv_path)
+    df = pd.read_csv(csv_path)
+    if case == "add_synthetic_timestamps":
+        # A fresh copy per run, so every run synthesizes rather than fills an existing column
+        return lambda: (df.copy(),), processor._add_synthetic_timestamps
+    if case == "save_processed_data":
+        df = processor._add_synthetic_timestamps(df)
+        return no_input, lambda: processor.save_processed_data(df, csv_path)
+    train_params = {"n_estimators": args.n_estimators, "n_jobs": args.n_jobs}
+    if case == "train_model":
+        return no_input, lambda: _check(MLModelService(os.path.join("models", "bench")).train_model(
+            df, **train_params))
+    service = MLModelService(os.path.join("models", "bench"))
+    result = _check(service.train_model(df, **train_params))
+    # Imputed with the column means, as the model was trained
+    features = df[result['feature_columns']]
+    features = features.fillna(features.mean())
+    if case == "predict":
+        return no_input, lambda: service.predict(features)
+    matrix = features.to_numpy(dtype="float64")
+    return no_input, lambda: service.predict_batch(matrix)
+
+
+def _check(result: dict) -> dict:
+    if not result['success']:
+        raise RuntimeError(result['error'])
+    return result
+
+
+def _measure(case: str, csv_path: str, workdir: str, args):
+    os.chdir(workdir)
+    prepare, run = _setup(case, csv_path, args)
+    seconds = []
+    peak_deltas = []
+    peak = 0.0
+    for _ in range(args.repeat):
+        inputs = prepare()
+        reset = reset_peak_rss()
+        before = current_rss_mb()
+        start = time.perf_counter()
+        run(*inputs)
+        seconds.append(time.perf_counter() - start)
+        peak = max(peak, peak_rss_mb())
+        if reset:
+            peak_deltas.append(peak_rss_mb() - before)
+    median = statistics.median(seconds)
+    result = {
+        "case": case,
+        "rows": args.rows,
+        "seconds": round(median, 4),
+        "min_seconds": round(min(seconds), 4),
+        "rows_per_sec": round(args.rows / median, 1),
+        "peak_rss_mb": round(peak, 1),
+        "peak_delta_mb": round(max(peak_deltas), 1) if peak_deltas else None,
+    }
+    if case == "process_csv_file":
+        result["csv_mb_per_sec"] = round(os.path.getsize(csv_path) / 1024 / 1024 / median, 1)
+    print(json.dumps(result))
+
+
+def compare(results: list, config: dict, baseline: dict, tolerance: float) -> dict:
+    """
+    Per-case change against a saved run; slower than `tolerance` (a fraction) is a regression
+    """
+    mismatched = {key: [baseline.get('config', {}).get(key), config[key]] for key in CONFIG_KEYS
+                  if baseline.get('config', {}).get(key) != config[key]}
+    previous = {row['case']: row for row in baseline.get('results', [])}
+    cases = []
+    for row in results:
+        before = previous.get(row['case'])
+        if before is None:
+            continue
+        change = row['seconds'] / before['seconds'] - 1 if before['seconds'] else 0.0
+        status = "regression" if change > tolerance else ("improvement" if change < -tolerance else "unchanged")
+        entry = {"case": row['case'], "baseline_seconds": before['seconds'], "seconds": row['seconds'],
+                 "change_pct": round(change * 100, 1), "status": status}
+        if row.get('peak_delta_mb') is not None and before.get('peak_delta_mb') is not None:
+            entry["peak_delta_mb_change"] = round(row['peak_delta_mb'] - before['peak_delta_mb'], 1)
+        cases.append(entry)
+    return {"tolerance_pct": round(tolerance * 100, 1), "config_mismatch": mismatched,
+            "environment_changed": baseline.get('environment') != environment(),
+            "regressions": [entry['case'] for entry in cases if entry['status'] == "regression"], "cases": cases}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--columns", type=int, default=100)
+    parser.add_argument("--nan-density", type=float, default=0.8)
+    parser.add_argument("--failure-rate", type=float, default=0.006)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--n-estimators", type=int, default=50)
+    # Pinned by default so results do not depend on the core count
+    parser.add_argument("--n-jobs", type=int, default=1)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--baseline", default=None, help="JSON written by an earlier --output run")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="slowdown fraction counted as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--worker", nargs=3, metavar=("CASE", "CSV", "WORKDIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _measure(*args.worker, args)
+        return
+
+    config = {"rows": args.rows, "columns": args.columns, "nan_density": args.nan_density,
+              "failure_rate": args.failure_rate, "seed": args.seed, "n_estimators": args.n_estimators,
+              "n_jobs": args.n_jobs, "repeat": args.repeat}
+    worker_args = ["--rows", args.rows, "--repeat", args.repeat, "--n-estimators", args.n_estimators,
+                   "--n-jobs", args.n_jobs]
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_path = generate_production_csv(os.path.join(workdir, "line.csv"), args.rows, args.columns,
+                                           args.nan_density, args.failure_rate, args.seed)
+        config["csv_mb"] = round(os.path.getsize(csv_path) / 1024 / 1024, 1)
+        for case in args.cases:
+            results.append(run_isolated("benchmarks.bench_suite",
+                                        worker_args + ["--worker", case, csv_path, workdir]))
+
+    report = {"benchmark": "suite", "config": config, "environment": environment(), "results": results}
+    if args.baseline:
+        with open(args.baseline) as fh:
+            report["comparison"] = compare(results, config, json.load(fh), args.tolerance)
+    emit(report, args.output)
+    if args.fail_on_regression and report.get("comparison", {}).get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Time-window benchmark: run_training on one period of a long dataset vs on all of it,
+and the windowed read alone, with row groups pruned on synthetic_timestamp.
+
+Timestamps are one per --freq, so the dataset spans rows * freq; the window covers
+--window-fraction of it. Each measurement runs in its own interpreter.
+
+    python -m benchmarks.bench_time_window --rows 1000000 --columns 100 --window-fraction 0.083
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.common import emit, peak_rss_mb, production_frame, run_isolated
+
+
+def _build_dataset(workdir: str, rows: int, columns: int, freq: str, chunk_rows: int = 100000) -> str:
+    import numpy as np
+    from app.services.processed_store import TIMESTAMP_COLUMN, ProcessedDataStore
+    from app.services.timestamps import synthetic_timestamps
+
+    rng = np.random.default_rng(7)
+    writer = ProcessedDataStore(workdir).open_writer(os.path.join(workdir, "long.csv"))
+    for offset in range(0, rows, chunk_rows):
+        frame = production_frame(min(chunk_rows, rows - offset), columns, nan_density=0.3, failure_rate=0.05,
+                                 id_offset=offset, rng=rng)
+        frame[TIMESTAMP_COLUMN] = synthetic_timestamps(len(frame), freq=freq, row_offset=offset)
+        writer.write(frame)
+    writer.close()
+    return writer.dataset_path
+
+
+def _window(rows: int, freq: str, fraction: float):
+    from app.services.timestamps import DEFAULT_START
+
+    # The last `fraction` of the timeline, like a recent training period
+    end = DEFAULT_START + pd.Timedelta(freq) * (rows - 1)
+    start = end - pd.Timedelta(freq) * int(rows * fraction)
+    return start.isoformat(), end.isoformat()
+
+
+def _measure(mode: str, dataset_path: str, window, n_estimators: int):
+    from app.services.processed_store import ProcessedDataStore
+    from app.services.training import numeric_columns, run_training
+
+    window = tuple(window) if mode.endswith("window") else None
+    baseline_rss = peak_rss_mb()
+    start = time.perf_counter()
+    if mode.startswith("read"):
+        matrix = ProcessedDataStore.read_matrix(dataset_path, numeric_columns(dataset_path), window=window)
+        rows = len(matrix)
+    else:
+        params = {"n_estimators": n_estimators, "data_mode": "native", "feature_selection": False}
+        if window is not None:
+            params.update(training_start=window[0], training_end=window[1])
+        result = run_training(dataset_path, params, os.path.join(os.path.dirname(dataset_path), f"models_{mode}"))
+        if not result['success']:
+            raise RuntimeError(result['error'])
+        rows = result['training_samples'] + result['test_samples']
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "mode": mode,
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "import_rss_mb": round(baseline_rss, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--columns", type=int, default=100)
+    parser.add_argument("--freq", default="30s")
+    parser.add_argument("--window-fraction", type=float, default=1 / 12)
+    parser.add_argument("--n-estimators", type=int, default=50)
+    parser.add_argument("--modes", nargs="+", default=["read_full", "read_window", "train_full", "train_window"])
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--worker", nargs=4, metavar=("MODE", "DATASET", "START", "END"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _measure(args.worker[0], args.worker[1], args.worker[2:], args.n_estimators)
+        return
+
+    window = _window(args.rows, args.freq, args.window_fraction)
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        dataset_path = _build_dataset(workdir, args.rows, args.columns, args.freq)
+        for mode in args.modes:
+            results.append(run_isolated("benchmarks.bench_time_window",
+                                        ["--n-estimators", args.n_estimators,
+                                         "--worker", mode, dataset_path, *window]))
+    for result in results:
+        full = next((r for r in results if r["mode"] == result["mode"].replace("window", "full")), None)
+        if full is not None and result is not full:
+            result["speedup"] = round(full["seconds"] / result["seconds"], 2)
+            result["peak_rss_reduction"] = round(1 - result["peak_rss_mb"] / full["peak_rss_mb"], 3)
+    emit({"benchmark": "time_window", "rows": args.rows, "columns": args.columns, "window": list(window),
+          "results": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Synthetic timestamp micro-benchmark: vectorized engine vs the old per-row list.
+
+    python -m benchmarks.bench_timestamps --rows 1000000 10000000 50000000
+
+The legacy list-comprehension path is only timed up to --legacy-max-rows because it
+takes minutes (and several GB) beyond that.
+"""
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import emit
+from app.services.timestamps import add_synthetic_timestamp_column
+
+
+def _legacy(df: pd.DataFrame) -> pd.DataFrame:
+    start_date = datetime(2021, 1, 1)
+    df['synthetic_timestamp'] = [start_date + pd.Timedelta(seconds=i) for i in range(len(df))]
+    return df
+
+
+def _time(fn, frame_factory, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        df = frame_factory()
+        start = time.perf_counter()
+        fn(df)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000, 50_000_000])
+    parser.add_argument("--nat-fraction", type=float, default=0.1,
+                        help="Share of unparseable values in the masked-fill scenario")
+    parser.add_argument("--legacy-max-rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    results = []
+    for rows in args.rows:
+        blank = lambda: pd.DataFrame({"Response": np.zeros(rows, dtype=np.int8)})
+        seconds = _time(add_synthetic_timestamp_column, blank, args.repeat)
+        results.append({"scenario": "generate", "engine": "vectorized", "rows": rows,
+                        "seconds": round(seconds, 4), "rows_per_sec": round(rows / seconds)})
+
+        rng = np.random.default_rng(0)
+        existing = pd.Series(pd.date_range("2022-01-01", periods=rows, freq="1s"))
+        existing[rng.random(rows) < args.nat_fraction] = pd.NaT
+        with_gaps = lambda: pd.DataFrame({"event_time": existing})
+        seconds = _time(add_synthetic_timestamp_column, with_gaps, args.repeat)
+        results.append({"scenario": "masked_fill", "engine": "vectorized", "rows": rows,
+                        "seconds": round(seconds, 4), "rows_per_sec": round(rows / seconds)})
+
+        if rows <= args.legacy_max_rows:
+            seconds = _time(_legacy, blank, 1)
+            results.append({"scenario": "generate", "engine": "legacy_list", "rows": rows,
+                            "seconds": round(seconds, 4), "rows_per_sec": round(rows / seconds)})
+    emit({"benchmark": "synthetic_timestamps", "results": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Hyperparameter search benchmark: random search without pruning vs random search with
+median pruning vs successive halving, on the same sampled configurations.
+
+Reports summed trial compute, wall time (search + final training) and the best eval
+log loss found. Each mode runs in its own interpreter.
+
+    python -m benchmarks.bench_tuning --rows 100000 --columns 50 --trials 12 --parallel-trials 2
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.common import emit, production_frame, run_isolated
+
+MODES = ("random_unpruned", "random", "halving")
+
+
+def _build_dataset(workdir: str, rows: int, columns: int) -> str:
+    from app.services.processed_store import TIMESTAMP_COLUMN, ProcessedDataStore
+    from app.services.timestamps import synthetic_timestamps
+
+    frame = production_frame(rows, columns, nan_density=0.3, failure_rate=0.05)
+    frame[TIMESTAMP_COLUMN] = synthetic_timestamps(rows)
+    return ProcessedDataStore(os.path.join(workdir, "data")).write(frame, "tuning.csv")
+
+
+def _measure(mode: str, dataset_path: str, trials: int, parallel_trials: int):
+    if mode == "random_unpruned":
+        # Read at import by the coordinator and by every spawned trial process
+        os.environ["TUNING_PRUNE_WARMUP_ROUNDS"] = str(10 ** 9)
+    from app.services.tuning import run_tuning
+
+    start = time.perf_counter()
+    result = run_tuning(dataset_path, {"strategy": "halving" if mode == "halving" else "random",
+                                       "n_trials": trials, "parallel_trials": parallel_trials},
+                        os.path.join(os.path.dirname(dataset_path), f"models_{mode}"))
+    if not result['success']:
+        raise RuntimeError(result['error'])
+    tuning = result['tuning']
+    print(json.dumps({
+        "mode": mode,
+        "trials": tuning['trials'],
+        "pruned": tuning['pruned'],
+        "compute_seconds": tuning['compute_time'],
+        "wall_seconds": round(time.perf_counter() - start, 3),
+        "best_score": round(min(e['score'] for e in tuning['leaderboard'] if e['status'] == "completed"), 5),
+        "best_params": tuning['best_params'],
+        "accuracy": result['metrics']['accuracy'],
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--columns", type=int, default=50)
+    parser.add_argument("--trials", type=int, default=12)
+    parser.add_argument("--parallel-trials", type=int, default=2)
+    parser.add_argument("--modes", nargs="+", default=list(MODES))
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--worker", nargs=2, metavar=("MODE", "DATASET"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _measure(args.worker[0], args.worker[1], args.trials, args.parallel_trials)
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        dataset_path = _build_dataset(workdir, args.rows, args.columns)
+        for mode in args.modes:
+            results.append(run_isolated("benchmarks.bench_tuning",
+                                        ["--trials", args.trials, "--parallel-trials", args.parallel_trials,
+                                         "--worker", mode, dataset_path]))
+    baseline = next((r for r in results if r["mode"] == "random_unpruned"), None)
+    for result in results:
+        if baseline is not None and result is not baseline:
+            result["compute_reduction"] = round(1 - result["compute_seconds"] / baseline["compute_seconds"], 3)
+    emit({"benchmark": "tuning", "rows": args.rows, "columns": args.columns, "cpus": os.cpu_count(),
+          "trials": args.trials, "parallel_trials": args.parallel_trials, "results": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
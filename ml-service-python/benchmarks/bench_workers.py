@@ -0,0 +1,190 @@
+"""
+Multi-worker serving benchmark against a live `python -m app.serve` server: aggregate
+simulation replay throughput and the memory of the whole server process tree for 1..N
+workers, with datasets decoded per worker (PROCESSED_MMAP_VIEWS=0) or replayed from the
+shared memory-mapped view (=1).
+
+Memory is proportional set size (PSS) summed over the supervisor, its workers and their
+training pool processes: pages shared between processes count once in total, so the
+sum is the server's real footprint. Also streams one session in pieces over fresh
+connections (landing on any worker) and checks that no row is delivered twice and the
+session completes; events the server had written when a client hung up count as sent,
+so `rows_in_flight_at_disconnect` is what the client dropped.
+
+    python -m benchmarks.bench_workers --rows 200000 --columns 100 --workers 1 2 4 --clients 4
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.bench_simulation import SERVICE_ROOT, _prepare, _request
+from benchmarks.common import emit
+
+
+def _process_tree(root_pid: int):
+    children = {}
+    for name in os.listdir("/proc"):
+        if name.isdigit():
+            try:
+                with open(f"/proc/{name}/stat") as fh:
+                    parent = int(fh.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(parent, []).append(int(name))
+    pids, pending = [], [root_pid]
+    while pending:
+        pid = pending.pop()
+        pids.append(pid)
+        pending.extend(children.get(pid, []))
+    return pids
+
+
+def _pss_mb(root_pid: int) -> float:
+    total_kb = 0
+    for pid in _process_tree(root_pid):
+        try:
+            with open(f"/proc/{pid}/smaps_rollup") as fh:
+                total_kb += next(int(line.split()[1]) for line in fh if line.startswith("Pss:"))
+        except (OSError, StopIteration):
+            continue
+    return total_kb / 1024
+
+
+def _start_server(workdir: str, port: int, workers: int, mmap_views: bool) -> subprocess.Popen:
+    env = dict(os.environ, PYTHONPATH=SERVICE_ROOT, SERVICE_PORT=str(port), SERVICE_WORKERS=str(workers),
+               PROCESSED_MMAP_VIEWS="1" if mmap_views else "0", STARTUP_PREWARM="1")
+    server = subprocess.Popen([sys.executable, "-m", "app.serve"], cwd=workdir, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 120
+    ready = 0
+    # Connections land on any worker: wait until several in a row report ready
+    while time.monotonic() < deadline and ready < 3 * workers:
+        try:
+            ready = ready + 1 if _request(http.client.HTTPConnection("127.0.0.1", port), "GET",
+                                          "/health/ready")[0] == 200 else 0
+        except (OSError, http.client.HTTPException):
+            ready = 0
+        time.sleep(0.1)
+    if ready < 3 * workers:
+        server.kill()
+        raise RuntimeError("server did not become ready")
+    return server
+
+
+def _open_session(port: int, body: dict) -> dict:
+    status, session = _request(http.client.HTTPConnection("127.0.0.1", port), "POST", "/simulations", body)
+    if status != 201:
+        raise RuntimeError(session)
+    return session
+
+
+def _stream(port: int, session_id: str, max_events=None):
+    """(sample IDs delivered, completed) for one connection's stream"""
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    connection.request("GET", f"/simulations/{session_id}/events")
+    response = connection.getresponse()
+    ids, events, completed = [], 0, False
+    for line in response:
+        if line.startswith(b"event: complete"):
+            completed = True
+        elif line.startswith(b"data: ") and not completed:
+            ids.extend(row['sampleId'] for row in json.loads(line[6:])['rows'])
+            events += 1
+            if max_events is not None and events >= max_events:
+                break
+    connection.close()
+    return ids, completed
+
+
+def _load(port: int, clients: int, batch_size: int, server_pid: int) -> dict:
+    sessions = [_open_session(port, {"batch_size": batch_size, "rate": 0}) for _ in range(clients)]
+    rows = [0] * clients
+    peak = [_pss_mb(server_pid)]
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(0.2):
+            peak[0] = max(peak[0], _pss_mb(server_pid))
+
+    def client(i: int):
+        rows[i] = len(_stream(port, sessions[i]['sessionId'])[0])
+
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    sampler.join()
+    return {"rows": sum(rows), "rows_per_sec": round(sum(rows) / elapsed), "peak_pss_mb": round(peak[0], 1)}
+
+
+def _resume_check(port: int, batch_size: int) -> dict:
+    """Stream one session three events at a time, reconnecting each time"""
+    session = _open_session(port, {"batch_size": batch_size, "rate": 0})
+    ids, pieces, completed = [], 0, False
+    while not completed and pieces < 10000:
+        piece, completed = _stream(port, session['sessionId'], max_events=3)
+        ids.extend(piece)
+        pieces += 1
+        # The next connection may reach a worker that still sees this one streaming
+        while True:
+            status = _request(http.client.HTTPConnection("127.0.0.1", port), "GET",
+                              f"/simulations/{session['sessionId']}")[1]
+            if status['status'] != "streaming":
+                break
+            time.sleep(0.01)
+    return {"connections": pieces, "status": status['status'], "sent": status['sent'],
+            "total_rows": session['totalRows'], "rows_received": len(ids),
+            "rows_in_flight_at_disconnect": status['sent'] - len(ids), "duplicates": len(ids) - len(set(ids))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--columns", type=int, default=100)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=4, help="concurrent replay sessions")
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--port", type=int, default=8798)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        window = _prepare(workdir, args.rows, args.columns)
+        for workers in args.workers:
+            for mmap_views in (False, True):
+                server = _start_server(workdir, args.port, workers, mmap_views)
+                try:
+                    # Builds the view on first use, outside the measurement
+                    _stream(args.port, _open_session(args.port, {"simulation_start": window[0],
+                                                                 "simulation_end": window[0]})['sessionId'])
+                    row = {"workers": workers, "mmap_views": mmap_views,
+                           "idle_pss_mb": round(_pss_mb(server.pid), 1)}
+                    row.update(_load(args.port, args.clients, args.batch_size, server.pid))
+                    # About 30 events: ten reconnections
+                    resume = _resume_check(args.port, max(1, args.rows // 30))
+                    row["resume_ok"] = resume['status'] == "completed" and resume['sent'] == resume['total_rows'] \
+                        and not resume['duplicates']
+                    row["resume"] = resume
+                    results.append(row)
+                finally:
+                    server.terminate()
+                    server.wait()
+    emit({"benchmark": "workers", "rows": args.rows, "columns": args.columns, "clients": args.clients,
+          "cpus": os.cpu_count(), "results": results}, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+import resource
+import json
+import os
+import sys
+
+
+def production_frame(rows: int, columns: int, nan_density: float = 0.8, failure_rate: float = 0.006,
+                     seed: int = 42, id_offset: int = 0, rng: np.random.Generator = None) -> pd.DataFrame:
+    """
+    Synthetic production-line frame: Id, `columns` float sensor readings with the given
+    NaN density, and a Response label that weakly depends on the first sensors
+    """
+    rng = rng if rng is not None else np.random.default_rng(seed)
+    feature_names = [f"L{i % 4}_S{i // 4}_F{i}" for i in range(columns)]
+    values = rng.normal(0, 1, size=(rows, columns)).astype(np.float32)
+    signal = values[:, :min(columns, 4)].sum(axis=1)
+    values[rng.random(size=(rows, columns)) < nan_density] = np.nan
+    frame = pd.DataFrame(values, columns=feature_names)
+    frame.insert(0, "Id", np.arange(id_offset, id_offset + rows))
+    threshold = np.quantile(signal, 1 - failure_rate) if rows else 0
+    frame["Response"] = ((signal >= threshold) ^ (rng.random(rows) < failure_rate / 4)).astype(np.int64)
+    return frame
+
+
+def generate_production_csv(path: str, rows: int, columns: int, nan_density: float = 0.8,
+                            failure_rate: float = 0.006, seed: int = 42, chunk_rows: int = 100000) -> str:
+    """
+    Write a synthetic production-line CSV (Id, sensor columns, Response) without
+    materialising the whole frame, so very large files can be produced on small boxes.
+    """
+    rng = np.random.default_rng(seed)
+    written = 0
+    with open(path, "w") as out:
+        production_frame(0, columns).to_csv(out, index=False)
+        while written < rows:
+            n = min(chunk_rows, rows - written)
+            frame = production_frame(n, columns, nan_density, failure_rate, id_offset=written, rng=rng)
+            frame.to_csv(out, header=False, index=False, float_format="%.3f")
+            written += n
+    return path
+
+
+def train_benchmark_model(rows: int = 20000, columns: int = 100, model_directory: str = "models",
+                          **train_params):
+    """
+    Train an MLModelService on a synthetic frame; returns (service, training result)
+    """
+    from app.services.ml_model import MLModelService
+    df = production_frame(rows, columns, nan_density=0.3, failure_rate=0.05)
+    service = MLModelService(model_directory)
+    result = service.train_model(df, **train_params)
+    if not result['success']:
+        raise RuntimeError(result['error'])
+    return service, result
+
+
+def percentile_ms(samples, q: float) -> float:
+    return round(float(np.percentile(np.asarray(samples) * 1000.0, q)), 3)
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of the current process in MB.
+
+    Prefers VmHWM from /proc because ru_maxrss survives exec() and would report the
+    parent's peak for freshly spawned benchmark workers.
+    """
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def reset_peak_rss() -> bool:
+    """
+    Reset VmHWM to the current RSS so peak_rss_mb() covers only what runs next; Linux
+    only (clear_refs), returns False where the peak cannot be reset
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def current_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return peak_rss_mb()
+
+
+def environment() -> dict:
+    """
+    Interpreter, library versions and CPU count, recorded with results so runs from
+    different machines or dependency sets are not compared unknowingly
+    """
+    import platform
+    import sklearn
+    import xgboost
+    import lightgbm
+    import pyarrow
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "pyarrow": pyarrow.__version__,
+        "scikit_learn": sklearn.__version__,
+        "xgboost": xgboost.__version__,
+        "lightgbm": lightgbm.__version__,
+    }
+
+
+def emit(results, output_path: str = None):
+    """
+    Print results as JSON and optionally write them to a file for later comparison
+    """
+    text = json.dumps(results, indent=2, default=str)
+    print(text)
+    if output_path:
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        with open(output_path, "w") as fh:
+            fh.write(text)
+
+
+def run_isolated(module: str, args) -> dict:
+    """
+    Run `python -m <module> <args>` in a fresh interpreter and parse the JSON it prints,
+    so peak RSS numbers are not polluted by earlier measurements.
+    """
+    import subprocess
+    completed = subprocess.run([sys.executable, "-m", module] + [str(a) for a in args],
+                               capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.data_processor import DataProcessor
+
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+    # DataProcessor keeps its stores relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    return DataProcessor()
+
+
+@pytest.fixture
+def line_frame():
+    def make(rows: int, seed: int = 0, pass_rate: float = 0.5, unlabelled: float = 0.0,
+             label: bool = True) -> pd.DataFrame:
+        rng = np.random.default_rng(seed)
+        df = pd.DataFrame({'Id': np.arange(rows), 'F1': np.round(rng.normal(size=rows), 2)})
+        if label:
+            labels = (rng.random(rows) < pass_rate).astype(float)
+            labels[rng.random(rows) < unlabelled] = np.nan  # unlabelled rows are not passes
+            df['Response'] = labels if unlabelled else labels.astype(int)
+        return df
+    return make
+
+
+@pytest.fixture
+def write_csv(tmp_path, line_frame):
+    def write(name: str, rows: int, **kwargs) -> str:
+        path = str(tmp_path / name)
+        line_frame(rows, **kwargs).to_csv(path, index=False)
+        return path
+    return write
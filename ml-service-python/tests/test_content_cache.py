@@ -0,0 +1,32 @@
+import os
+import threading
+
+from app.services.content_cache import CONTENT_INDEX_FILE, DatasetCache
+
+
+def test_workers_recording_at_once_keep_every_entry(processor, write_csv):
+    datasets = [processor.process_csv_file_streaming(write_csv(f"line{i}.csv", 200, seed=i))[1] for i in range(6)]
+    # Two caches over one store stand in for two worker processes
+    workers = [DatasetCache(processor.processed_store), DatasetCache(processor.processed_store)]
+    errors = []
+
+    def record(cache, owned):
+        try:
+            for round_number in range(30):
+                for dataset_path in owned:
+                    cache.record(f"{os.path.basename(dataset_path)}-{round_number}", dataset_path)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=record, args=(cache, datasets[i::2])) for i, cache in enumerate(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    for dataset_path in datasets:
+        assert workers[0].lookup(f"{os.path.basename(dataset_path)}-29") == dataset_path
+    assert workers[1].stats()['entries'] == len(datasets)
+    assert not [name for name in os.listdir(processor.processed_store.root)
+                if name.startswith(CONTENT_INDEX_FILE) and name.endswith(".tmp")]
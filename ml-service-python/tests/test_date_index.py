@@ -0,0 +1,99 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from app.services import date_index
+from app.services.date_index import DAILY_ROLLUP_FILE, FAILURE_CUMSUM_FILE, TIMESTAMP_INDEX_FILE
+from app.services.processed_store import ProcessedDataStore
+
+
+def _index_pass_rate(dataset_path: str) -> float:
+    counts = ProcessedDataStore.date_index(dataset_path).count(None, None)
+    assert counts['pass'] + counts['fail'] == counts['count']
+    return round(counts['pass'] / counts['count'] * 100, 2)
+
+
+def _append_and_reingest(processor, line_frame, tmp_path):
+    """
+    Ingest three CSVs, the second and third appended, and their concatenation in one go;
+    returns (metadata, dataset path) for each
+    """
+    processor.timestamp_freq = "1min"  # several days of rows
+    parts = [line_frame(rows, seed=seed, pass_rate=pass_rate, unlabelled=0.05)
+             for rows, seed, pass_rate in ((2500, 0, 0.3), (1500, 1, 0.7), (2000, 2, 0.5))]
+    dataset_path = None
+    for i, part in enumerate(parts):
+        part.to_csv(tmp_path / f"part{i}.csv", index=False)
+        metadata, dataset_path = processor.process_csv_file_streaming(str(tmp_path / f"part{i}.csv"),
+                                                                      append_to=dataset_path)
+    pd.concat(parts, ignore_index=True).to_csv(tmp_path / "whole.csv", index=False)
+    return (metadata, dataset_path), processor.process_csv_file_streaming(str(tmp_path / "whole.csv"))
+
+
+def _assert_same_counts(appended: tuple, whole: tuple):
+    (metadata, dataset_path), (whole_metadata, whole_path) = appended, whole
+    for key in ('total_records', 'pass_rate', 'earliest_timestamp', 'latest_timestamp'):
+        assert metadata[key] == whole_metadata[key]
+    index, whole_index = ProcessedDataStore.date_index(dataset_path), ProcessedDataStore.date_index(whole_path)
+    assert index.count(None, None) == whole_index.count(None, None)
+    assert index.count("2021-01-02 06:00", "2021-01-03 18:30") == whole_index.count("2021-01-02 06:00",
+                                                                                   "2021-01-03 18:30")
+    assert len(index.daily()) > 3 and index.daily() == whole_index.daily()
+    assert index.bounds == whole_index.bounds
+
+
+def test_date_index_pass_count_matches_upload_pass_rate(processor, write_csv):
+    csv_path = write_csv("line.csv", 5000, pass_rate=0.2, unlabelled=0.05)
+    df, metadata = processor.process_csv_file(csv_path)
+    dataset_path = processor.save_processed_data(df, csv_path)
+
+    assert 15 < metadata['pass_rate'] < 25
+    assert _index_pass_rate(dataset_path) == metadata['pass_rate']
+    daily = ProcessedDataStore.date_index(dataset_path).daily()
+    assert sum(day['pass'] for day in daily) == round(metadata['pass_rate'] * metadata['total_records'] / 100)
+
+
+def test_streaming_ingest_and_append_keep_the_convention(processor, write_csv):
+    csv_path = write_csv("line.csv", 3000, pass_rate=0.3, unlabelled=0.05)
+    metadata, dataset_path = processor.process_csv_file_streaming(csv_path)
+    assert _index_pass_rate(dataset_path) == metadata['pass_rate']
+
+    csv_path = write_csv("more.csv", 2000, seed=1, pass_rate=0.7, unlabelled=0.05)
+    metadata, dataset_path = processor.process_csv_file_streaming(csv_path, append_to=dataset_path)
+    assert _index_pass_rate(dataset_path) == metadata['pass_rate']
+
+
+def test_index_of_an_older_format_is_rebuilt(processor, write_csv):
+    csv_path = write_csv("line.csv", 2000, pass_rate=0.2, unlabelled=0.05)
+    df, metadata = processor.process_csv_file(csv_path)
+    dataset_path = processor.save_processed_data(df, csv_path)
+    # A version 1 index: no version field, and Response == 1 counted as a failure
+    cumsum_path = os.path.join(dataset_path, FAILURE_CUMSUM_FILE)
+    failure_cumsum = np.load(cumsum_path)
+    np.save(cumsum_path, np.arange(len(failure_cumsum)) - failure_cumsum)
+    with open(os.path.join(dataset_path, DAILY_ROLLUP_FILE)) as fh:
+        rollup = json.load(fh)
+    del rollup['version']
+    with open(os.path.join(dataset_path, DAILY_ROLLUP_FILE), "w") as fh:
+        json.dump(rollup, fh)
+
+    assert _index_pass_rate(dataset_path) == metadata['pass_rate']
+
+
+def test_two_appends_count_like_a_full_reingest(processor, line_frame, tmp_path):
+    appended, whole = _append_and_reingest(processor, line_frame, tmp_path)
+
+    _assert_same_counts(appended, whole)
+    assert ProcessedDataStore.date_index(appended[1]).rollup['segments'] == [0, 1, 2]
+
+
+def test_appends_past_the_segment_limit_are_compacted(processor, line_frame, tmp_path, monkeypatch):
+    monkeypatch.setattr(date_index, 'DATE_INDEX_MAX_SEGMENTS', 2)
+    appended, whole = _append_and_reingest(processor, line_frame, tmp_path)
+
+    _assert_same_counts(appended, whole)
+    assert ProcessedDataStore.date_index(appended[1]).rollup['segments'] == [0]
+    index_files = [name for name in os.listdir(appended[1]) if name.endswith(".npy")]
+    assert sorted(index_files) == sorted([FAILURE_CUMSUM_FILE, TIMESTAMP_INDEX_FILE])
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import fused_inference
+from app.services.fused_inference import (PARITY_MAX_PROBABILITY_DIFFERENCE, FusedTreeModel, parity_report,
+                                          select_inference_backend)
+from app.services.ml_model import MLModelService
+
+
+def _training_frame(rows: int = 4000, columns: int = 12, seed: int = 0) -> pd.DataFrame:
+    # float32 values on mixed scales and offsets, 30% missing: what the processed store serves
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, columns)) * rng.uniform(0.5, 50, columns) + rng.uniform(-100, 100, columns)
+    signal = ((X[:, :4] - X[:, :4].mean(0)) / X[:, :4].std(0)).sum(1) + rng.normal(size=rows)
+    X[rng.random((rows, columns)) < 0.3] = np.nan
+    df = pd.DataFrame(X.astype(np.float32), columns=[f"F{i}" for i in range(columns)])
+    df['Response'] = (signal > 0.5).astype(int)
+    return df
+
+
+@pytest.mark.parametrize("model_type", ["xgboost", "lightgbm"])
+@pytest.mark.parametrize("data_mode", ["dense", "native"])
+def test_fused_model_matches_standard_path_with_missing_values(tmp_path, model_type, data_mode):
+    df = _training_frame()
+    features = [c for c in df.columns if c != 'Response']
+    service = MLModelService(str(tmp_path))
+    if data_mode == "dense":
+        service.train_model(df, model_type=model_type, n_estimators=40)
+    else:
+        service.train_matrix(df[features].to_numpy(np.float32), df['Response'].to_numpy(), features,
+                             model_type=model_type, n_estimators=40)
+    sample = df[features].to_numpy(np.float64)
+    assert np.isnan(sample).any()
+
+    report = parity_report(service, FusedTreeModel.from_service(service), sample)
+
+    assert report['max_probability_difference'] <= PARITY_MAX_PROBABILITY_DIFFERENCE
+    assert report['class_agreement'] == 1.0
+    assert report['passed']
+    assert select_inference_backend(service, sample, 'fused') == ('fused', report)
+
+
+def test_new_models_default_to_standard_backend(tmp_path):
+    df = _training_frame(rows=1000)
+    service = MLModelService(str(tmp_path))
+    service.train_model(df, model_type='xgboost', n_estimators=10)
+    sample = df.drop(columns='Response').to_numpy(np.float64)
+
+    assert fused_inference.DEFAULT_INFERENCE_BACKEND == 'standard'
+    backend, report = select_inference_backend(service, sample)
+    assert backend == 'standard'
+    assert report['passed']
+
+
+def test_parity_gate_rejects_a_single_large_difference(tmp_path, monkeypatch):
+    df = _training_frame(rows=1000)
+    service = MLModelService(str(tmp_path))
+    service.train_model(df, model_type='xgboost', n_estimators=10)
+    fused = FusedTreeModel.from_service(service)
+    sample = df.drop(columns='Response').to_numpy(np.float64)
+    predict_proba = fused.predict_proba
+
+    def off_by_one_row(X):
+        probabilities = predict_proba(X).copy()
+        probabilities[0] = np.clip(probabilities[0] + 0.02, 0, 1)
+        return probabilities
+
+    monkeypatch.setattr(fused, 'predict_proba', off_by_one_row)
+    report = parity_report(service, fused, sample)
+
+    assert report['p99_probability_difference'] <= fused_inference.PARITY_PROBABILITY_TOLERANCE
+    assert report['max_probability_difference'] > PARITY_MAX_PROBABILITY_DIFFERENCE
+    assert not report['passed']
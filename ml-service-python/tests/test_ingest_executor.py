@@ -0,0 +1,66 @@
+import threading
+import time
+
+import pytest
+
+from app.services.ingest_executor import IngestBusy, IngestExecutor, IngestLimitExceeded
+
+
+@pytest.fixture
+def workers(tmp_path):
+    # Two executors over one lock directory stand in for two worker processes: flock()
+    # locks of separately opened files conflict within a process just as across processes
+    executors = [IngestExecutor(max_concurrent=2, lock_directory=str(tmp_path / "locks")) for _ in range(2)]
+    yield executors
+    for executor in executors:
+        executor.shutdown()
+
+
+def _blocked_ingest(executor: IngestExecutor, key: str, release: threading.Event):
+    started = threading.Event()
+
+    def ingest():
+        started.set()
+        release.wait(10)
+
+    future = executor.submit(ingest, keys=[key])
+    started.wait(10)
+    return future
+
+
+def _wait_idle(executor: IngestExecutor):
+    # Keys and slots are released by the future's done callback, just after result() returns
+    deadline = time.monotonic() + 10
+    while executor.active and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_dataset_key_is_held_across_workers(workers):
+    worker_a, worker_b = workers
+    release = threading.Event()
+    future = _blocked_ingest(worker_a, "data/processed/line_processed", release)
+
+    with pytest.raises(IngestBusy):
+        worker_b.submit(lambda: None, keys=["data/processed/line_processed"])
+    assert worker_b.submit(lambda: "other", keys=["data/processed/other_processed"]).result() == "other"
+
+    release.set()
+    future.result()
+    _wait_idle(worker_a)
+    assert worker_b.submit(lambda: "line", keys=["data/processed/line_processed"]).result() == "line"
+
+
+def test_concurrency_limit_is_shared_across_workers(workers):
+    worker_a, worker_b = workers
+    release = threading.Event()
+    futures = [_blocked_ingest(worker_a, "a", release), _blocked_ingest(worker_b, "b", release)]
+
+    with pytest.raises(IngestLimitExceeded):
+        worker_b.submit(lambda: None, keys=["c"])
+
+    release.set()
+    for future in futures:
+        future.result()
+    _wait_idle(worker_a)
+    _wait_idle(worker_b)
+    assert worker_a.submit(lambda: "c", keys=["c"]).result() == "c"
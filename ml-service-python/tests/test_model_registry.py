@@ -0,0 +1,58 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from app.services.fused_inference import FusedTreeModel
+from app.services.ml_model import MLModelService
+from app.services.model_registry import METADATA_FILE, ModelRegistry
+
+
+def _register(registry: ModelRegistry) -> str:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(500, 4)).astype(np.float32), columns=["F0", "F1", "F2", "F3"])
+    df['Response'] = (df['F0'] + rng.normal(size=500) > 0).astype(int)
+    model_id = registry.new_model_id('xgboost')
+    result = MLModelService(registry.version_path(model_id)).train_model(df, n_estimators=5)
+    registry.register(model_id, {'model_path': result['model_path'], 'scaler_path': result['scaler_path'],
+                                 'imputer_path': result['imputer_path'], 'inference_backend': 'standard'})
+    return model_id
+
+
+def test_backend_switch_reaches_every_worker(tmp_path):
+    # Two registries over one directory stand in for two worker processes
+    worker_a, worker_b = ModelRegistry(str(tmp_path)), ModelRegistry(str(tmp_path))
+    model_id = _register(worker_a)
+    assert isinstance(worker_a.load(model_id)[0], MLModelService)
+    assert isinstance(worker_b.load(model_id)[0], MLModelService)
+
+    worker_a.set_backend(model_id, 'fused')
+
+    assert isinstance(worker_b.load(model_id)[0], FusedTreeModel)
+    assert worker_b.load(model_id)[1]['inference_backend'] == 'fused'
+    assert worker_b.cache_stats()['cached_models'] == [model_id]
+
+
+def test_concurrent_metadata_writes_stay_complete(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    model_id = _register(registry)
+    errors = []
+
+    def switch(backend):
+        try:
+            for _ in range(50):
+                registry.set_backend(model_id, backend)
+        except Exception as e:  # a shared temp file makes os.replace fail or tears the JSON
+            errors.append(e)
+
+    threads = [threading.Thread(target=switch, args=(backend,)) for backend in ('standard', 'fused') * 2]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert registry.metadata(model_id)['inference_backend'] in ('standard', 'fused')
+    assert METADATA_FILE in os.listdir(registry.version_path(model_id))
+    assert not [name for name in os.listdir(registry.version_path(model_id)) if name.endswith(".tmp")]
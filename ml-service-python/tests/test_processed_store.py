@@ -0,0 +1,38 @@
+import os
+
+import pandas as pd
+import pytest
+
+from app.services.processed_store import ProcessedDataStore
+
+
+def test_failed_reingest_keeps_the_previous_dataset(processor, write_csv):
+    csv_path = write_csv("line.csv", 3000)
+    metadata, dataset_path = processor.process_csv_file_streaming(csv_path)
+    before = ProcessedDataStore.read_frame(dataset_path)
+
+    write_csv("line.csv", 1000, seed=1, label=False)
+    with pytest.raises(Exception, match="Response"):
+        processor.process_csv_file_streaming(csv_path)
+
+    pd.testing.assert_frame_equal(ProcessedDataStore.read_frame(dataset_path), before)
+    assert ProcessedDataStore.manifest(dataset_path)['total_records'] == metadata['total_records']
+    assert os.listdir(processor.processed_store.root) == [os.path.basename(dataset_path)]
+
+
+def test_reingest_replaces_the_dataset_on_close(processor, write_csv):
+    csv_path = write_csv("line.csv", 3000)
+    _, dataset_path = processor.process_csv_file_streaming(csv_path)
+
+    write_csv("line.csv", 1000, seed=1)
+    writer = processor.processed_store.open_writer(csv_path)
+    writer.write(pd.read_csv(csv_path))
+    # Until the writer is closed, readers still see the previous dataset
+    assert ProcessedDataStore.manifest(dataset_path)['total_records'] == 3000
+    writer.close()
+
+    assert writer.dataset_path == dataset_path
+    assert ProcessedDataStore.manifest(dataset_path)['total_records'] == 1000
+    assert len(ProcessedDataStore.read_frame(dataset_path)) == 1000
+    assert processor.processed_store.latest_dataset() == dataset_path
+    assert os.listdir(processor.processed_store.root) == [os.path.basename(dataset_path)]
@@ -0,0 +1,35 @@
+import io
+
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from app.services.serving import ARROW_CONTENT_TYPE, decode_feature_matrix, project_columns, require_features
+
+FEATURES = ["F0", "F1", "F2"]
+
+
+def test_named_columns_are_projected_into_feature_order():
+    values = np.array([[1.0, np.nan, 3.0, 9.0]])
+
+    projected = project_columns(values, ["F2", "F1", "F0", "extra"], FEATURES)
+
+    np.testing.assert_array_equal(projected, [[3.0, np.nan, 1.0]])
+
+
+def test_omitted_features_are_rejected_by_name():
+    with pytest.raises(ValueError, match=r"1 of the model's 3 features are missing \(F1\)"):
+        project_columns(np.array([[1.0, 3.0]]), ["F0", "F2"], FEATURES)
+    with pytest.raises(ValueError, match="F1"):
+        require_features({"F0": 1.0, "F2": None}, FEATURES)
+    require_features({"F0": 1.0, "F1": None, "F2": None}, FEATURES)
+
+
+def test_arrow_batch_must_carry_every_feature():
+    sink = io.BytesIO()
+    table = pa.table({"F0": [1.0], "F2": [3.0]})
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+    with pytest.raises(ValueError, match="F1"):
+        decode_feature_matrix(sink.getvalue(), ARROW_CONTENT_TYPE, FEATURES)
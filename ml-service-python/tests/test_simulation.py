@@ -0,0 +1,105 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.services.processed_store import ProcessedDataStore
+from app.services.shared_state import SharedStateStore
+from app.services.simulation import SessionBusy, SimulationManager, SimulationSession
+
+METADATA = {'model_id': "m1", 'feature_columns': ['F1']}
+
+
+class _ThresholdScorer:
+    # Passes rows with a positive F1; stands in for a registered model
+    def predict_batch(self, X):
+        probabilities = 1 / (1 + np.exp(-X[:, 0]))
+        return (probabilities >= 0.5).astype(int), probabilities
+
+
+def _session(dataset_path: str, session_id: str = "s1", **kwargs) -> SimulationSession:
+    total_rows = ProcessedDataStore.manifest(dataset_path)['total_records']
+    return SimulationSession(session_id, dataset_path, (None, None), _ThresholdScorer(), METADATA, total_rows,
+                             **kwargs)
+
+
+def _manager(tmp_path) -> SimulationManager:
+    # Managers over one state file stand in for worker processes
+    return SimulationManager(SharedStateStore(str(tmp_path / "state.db")),
+                             lambda model_id: (_ThresholdScorer(), METADATA))
+
+
+async def _take(session: SimulationSession, acknowledged: int) -> list:
+    """
+    Read batches like the SSE endpoint: a batch counts as delivered once the next one is
+    requested. Disconnects right after receiving one more batch, which is never delivered.
+    """
+    rows = []
+    stream = session.stream()
+    try:
+        async for batch in stream:
+            if acknowledged == 0:
+                break
+            rows += batch
+            acknowledged -= 1
+    finally:
+        await stream.aclose()
+    return rows
+
+
+def _assert_delivered_once(session: SimulationSession, rows: list, total_rows: int):
+    assert [row['sampleId'] for row in rows] == [f"SAMPLE_{i}" for i in range(total_rows)]
+    assert session.sent == total_rows and session.status == "completed"
+    assert session.passed == sum(row['prediction'] == "Pass" for row in rows)
+    assert session.failed == sum(row['prediction'] == "Fail" for row in rows)
+    assert session.labelled == total_rows
+    assert session.correct == sum(row['actual'] == row['prediction'] for row in rows)
+
+
+def test_replayed_rows_carry_the_dataset_sensor_readings(processor, tmp_path, line_frame):
+    df = line_frame(300)
+    df['Temperature'] = np.round(np.linspace(20, 35, 300), 1)
+    df.loc[5, 'Temperature'] = np.nan
+    df.to_csv(tmp_path / "line.csv", index=False)
+    _, dataset_path = processor.process_csv_file_streaming(str(tmp_path / "line.csv"))
+
+    rows = _session(dataset_path, batch_rows=300).next_batch()
+
+    assert [row['temperature'] for row in rows] == [None if np.isnan(t) else t for t in df['Temperature']]
+    assert not any('pressure' in row or 'humidity' in row for row in rows)
+
+
+@pytest.fixture
+def dataset_path(processor, write_csv):
+    return processor.process_csv_file_streaming(write_csv("line.csv", 1000))[1]
+
+
+def test_disconnected_stream_resumes_with_every_row_delivered_once(dataset_path, tmp_path):
+    session = _manager(tmp_path).create(dataset_path, (None, None), _ThresholdScorer(), METADATA, 1000,
+                                        batch_rows=64, rate=0)
+
+    rows = asyncio.run(_take(session, acknowledged=3))
+    # The batch in flight at the disconnect and the read-ahead are kept for the next stream
+    assert session.sent == len(rows) == 192 and session.status == "paused"
+    rows += asyncio.run(_take(session, acknowledged=5))
+    assert session.sent == len(rows) == 512
+    rows += asyncio.run(_take(session, acknowledged=1000))
+
+    _assert_delivered_once(session, rows, 1000)
+    assert session.store.get_session(session.session_id)['state']['sent'] == 1000
+
+
+def test_another_worker_resumes_at_the_stored_cursor(dataset_path, tmp_path):
+    worker_a, worker_b = _manager(tmp_path), _manager(tmp_path)
+    session = worker_a.create(dataset_path, (None, None), _ThresholdScorer(), METADATA, 1000, batch_rows=64, rate=0)
+    rows = asyncio.run(_take(session, acknowledged=4))
+
+    restored = worker_b.get(session.session_id)
+    assert restored is not session and restored.sent == 256 and restored.status == "paused"
+    rows += asyncio.run(_take(restored, acknowledged=1000))
+
+    _assert_delivered_once(restored, rows, 1000)
+    # The first worker's copy is behind the store now and may not stream again
+    with pytest.raises(SessionBusy):
+        asyncio.run(_take(session, acknowledged=1))
+    assert worker_a.stats(session.session_id)['status'] == "completed"
@@ -0,0 +1,73 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.processed_store import ProcessedDataStore
+from app.services.schema_inference import SCHEMA_SAMPLE_ROWS
+from app.services.streaming_ingest import StreamingCsvIngestor
+
+
+def _part_files(dataset_path: str) -> set:
+    return {name for name in os.listdir(dataset_path) if name.startswith("part-")}
+
+
+def test_schema_mismatch_retry_leaves_no_orphan_parts_when_appending(processor, tmp_path, line_frame):
+    line_frame(2000).to_csv(tmp_path / "line.csv", index=False)
+    _, dataset_path = processor.process_csv_file_streaming(str(tmp_path / "line.csv"))
+    # Text in a float column past the first chunk: the hinted parse fails mid-file and restarts
+    more = line_frame(3000, seed=1)
+    more['F1'] = more['F1'].astype(object)
+    more.loc[2500, 'F1'] = "fault"
+    more.to_csv(tmp_path / "more.csv", index=False)
+
+    metadata, _ = StreamingCsvIngestor(processor, chunk_rows=1000).ingest(str(tmp_path / "more.csv"),
+                                                                          append_to=dataset_path)
+
+    manifest = ProcessedDataStore.manifest(dataset_path)
+    assert metadata['total_records'] == manifest['total_records'] == 5000
+    assert _part_files(dataset_path) == {part['file'] for part in manifest['parts']}
+    assert len(ProcessedDataStore.read_frame(dataset_path, ['Id'])) == 5000
+
+
+def test_failed_append_removes_the_parts_it_wrote(processor, tmp_path, monkeypatch, line_frame):
+    line_frame(2000).to_csv(tmp_path / "line.csv", index=False)
+    _, dataset_path = processor.process_csv_file_streaming(str(tmp_path / "line.csv"))
+    before = _part_files(dataset_path)
+    line_frame(3000, seed=1).to_csv(tmp_path / "more.csv", index=False)
+    consume = StreamingCsvIngestor._consume
+    calls = []
+
+    def fail_on_third_chunk(self, chunk, *args, **kwargs):
+        calls.append(len(chunk))
+        if len(calls) == 3:
+            raise OSError("disk full")
+        return consume(self, chunk, *args, **kwargs)
+
+    monkeypatch.setattr(StreamingCsvIngestor, '_consume', fail_on_third_chunk)
+    with pytest.raises(Exception, match="disk full"):
+        StreamingCsvIngestor(processor, chunk_rows=1000).ingest(str(tmp_path / "more.csv"), append_to=dataset_path)
+
+    assert _part_files(dataset_path) == before
+    assert ProcessedDataStore.manifest(dataset_path)['total_records'] == 2000
+
+
+def test_float32_column_is_widened_when_a_later_chunk_does_not_round_trip(processor, tmp_path, line_frame):
+    df = line_frame(SCHEMA_SAMPLE_ROWS + 5000)
+    # Two decimals in the sampled rows, full float64 precision further down
+    df.loc[SCHEMA_SAMPLE_ROWS + 100:, 'F1'] = np.random.default_rng(2).normal(size=4900)
+    csv_path = str(tmp_path / "line.csv")
+    df.to_csv(csv_path, index=False)
+    expected = pd.read_csv(csv_path)['F1'].to_numpy()
+
+    _, dataset_path = StreamingCsvIngestor(processor, chunk_rows=4000).ingest(csv_path)
+    streamed = ProcessedDataStore.read_frame(dataset_path, ['F1'])['F1']
+    whole, _ = processor.process_csv_file(csv_path)
+
+    # Chunks read before the widening round-trip as float32 and stay in their own part
+    assert [part['rows'] for part in ProcessedDataStore.manifest(dataset_path)['parts']] == [8000, 7000]
+    assert streamed.dtype == np.float64
+    np.testing.assert_array_equal(streamed[:8000].to_numpy(), expected[:8000].astype(np.float32))
+    np.testing.assert_array_equal(streamed[8000:].to_numpy(), expected[8000:])
+    np.testing.assert_array_equal(whole['F1'].to_numpy(), expected)
@@ -0,0 +1,78 @@
+import os
+
+import numpy as np
+import pytest
+
+from app.services.content_cache import TrainingCache
+from app.services.model_registry import ModelRegistry
+from app.services.training import run_training
+
+PARAMS = {'n_estimators': 5, 'feature_selection': False}
+
+
+@pytest.fixture
+def dataset_path(processor, write_csv):
+    return processor.process_csv_file_streaming(write_csv("line.csv", 1500))[1]
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return ModelRegistry(str(tmp_path / "models" / "registry"))
+
+
+@pytest.fixture
+def cache(registry, tmp_path):
+    return TrainingCache(registry, str(tmp_path / "cache"))
+
+
+def _train(cache: TrainingCache, dataset_path: str, params: dict, tmp_path) -> tuple:
+    key = cache.key(dataset_path, params)
+    result = run_training(dataset_path, params, str(tmp_path / "models"))
+    assert result['success'], result.get('error')
+    cache.store(key, result)
+    return key, result
+
+
+def test_same_dataset_and_params_hit_the_cache(cache, registry, dataset_path, tmp_path):
+    assert cache.lookup(cache.key(dataset_path, PARAMS)) is None
+    key, result = _train(cache, dataset_path, PARAMS, tmp_path)
+
+    cached = cache.lookup(key)
+
+    assert cached['cached'] and cached['model_id'] == result['model_id']
+    assert registry.production_model_id() == result['model_id']
+    assert cache.lookup(cache.key(dataset_path, dict(PARAMS, n_estimators=6))) is None
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 2
+
+
+def test_hit_after_the_registry_version_was_deleted_registers_it_again(cache, registry, dataset_path, tmp_path):
+    key, result = _train(cache, dataset_path, PARAMS, tmp_path)
+    X = np.random.default_rng(0).normal(size=(50, 2))
+    expected = registry.load(result['model_id'])[0].predict_batch(X)
+    registry.discard(result['model_id'])
+
+    cached = cache.lookup(key)
+
+    assert cached['model_id'] != result['model_id']
+    assert registry.production_model_id() == cached['model_id']
+    assert os.path.dirname(cached['model_path']) == registry.version_path(cached['model_id'])
+    scorer = registry.load(cached['model_id'])[0]
+    np.testing.assert_array_equal(scorer.predict_batch(X)[1], expected[1])
+    # The entry now points at the new version
+    assert cache.lookup(key)['model_id'] == cached['model_id']
+
+
+def test_least_recently_used_entry_is_evicted(cache, registry, dataset_path, tmp_path):
+    first, _ = _train(cache, dataset_path, PARAMS, tmp_path)
+    second, second_result = _train(cache, dataset_path, dict(PARAMS, n_estimators=6), tmp_path)
+    assert cache.lookup(first) is not None  # now the most recently used
+    # Room for two entries, not three
+    cache.max_bytes = cache.stats()['bytes'] * 5 // 4
+
+    third, _ = _train(cache, dataset_path, dict(PARAMS, n_estimators=7), tmp_path)
+
+    assert cache.stats()['evictions'] == 1 and cache.stats()['entries'] == 2
+    assert cache.lookup(second) is None
+    assert cache.lookup(first) is not None and cache.lookup(third) is not None
+    # Evicting an entry never touches the registry
+    assert registry.metadata(second_result['model_id']) is not None
@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.services.model_registry import ModelRegistry
+from app.services.training import create_training_executor
+from app.services.training_jobs import TERMINAL_STATES, WORKER_EXITED, JobStateFile, TrainingJobManager
+
+# Boosts until cancelled
+UNTIL_CANCELLED = {'n_estimators': 100000, 'early_stopping_rounds': None, 'feature_selection': False}
+
+
+def _exit_worker(job_id, jobs_directory, dataset_path, params, model_directory):
+    # A worker killed mid-fit (e.g. by the OOM killer) takes the pool down with it
+    os._exit(1)
+
+
+def _finish(job_id, jobs_directory, dataset_path, params, model_directory):
+    return {'success': True, 'job_id': job_id}
+
+
+def _wait_finished(manager: TrainingJobManager, job_id: str) -> dict:
+    # The outcome is recorded by the future's done callback, just after result() returns
+    deadline = time.monotonic() + 60
+    while manager.status(job_id)['status'] not in TERMINAL_STATES and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return manager.status(job_id)
+
+
+def _wait_running(manager: TrainingJobManager, job_id: str) -> dict:
+    deadline = time.monotonic() + 60
+    while not manager.status(job_id).get('progress') and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return manager.status(job_id)
+
+
+@pytest.fixture
+def dataset_path(processor, write_csv):
+    return os.path.abspath(processor.process_csv_file_streaming(write_csv("line.csv", 2000))[1])
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = TrainingJobManager(create_training_executor(1), jobs_directory=str(tmp_path / "jobs"),
+                                 model_directory=str(tmp_path / "models"),
+                                 executor_factory=lambda: create_training_executor(1))
+    yield manager
+    manager.executor.shutdown(wait=True, cancel_futures=True)
+
+
+def test_dead_worker_fails_its_job_and_the_pool_is_replaced(manager):
+    broken = manager.executor
+    job_id = manager._submit(_exit_worker, "training", "dataset", {})
+    with pytest.raises(BrokenProcessPool):
+        manager.future(job_id).result(timeout=60)
+    state = _wait_finished(manager, job_id)
+
+    assert manager.executor is not broken
+    assert state['status'] == "failed" and state['error'] == WORKER_EXITED
+    next_job = manager._submit(_finish, "training", "dataset", {})
+    assert manager.future(next_job).result(timeout=60) == {'success': True, 'job_id': next_job}
+
+
+def test_submission_to_a_broken_pool_fails_its_job_and_replaces_the_pool(manager):
+    broken = manager.executor
+    with pytest.raises(BrokenProcessPool):
+        broken.submit(os._exit, 1).result(timeout=60)
+
+    with pytest.raises(BrokenProcessPool):
+        manager.submit_tuning("dataset", {})
+
+    assert manager.executor is not broken
+    assert manager.active_jobs() == []
+    failed = [name for name in os.listdir(manager.jobs_directory) if name.endswith(".json")]
+    assert len(failed) == 1
+    assert manager.status(failed[0][:-5])['status'] == "failed"
+    job_id = manager._submit(_finish, "training", "dataset", {})
+    assert manager.future(job_id).result(timeout=60)['success']
+
+
+def test_concurrent_state_updates_keep_the_file_complete(tmp_path):
+    # A worker streaming progress while the API records the outcome, for example
+    state_file = JobStateFile(str(tmp_path), "job1")
+    errors = []
+
+    def update(field):
+        try:
+            for round_number in range(50):
+                state_file.update(**{field: round_number})
+        except Exception as e:  # a shared temp file makes os.replace fail or tears the JSON
+            errors.append(e)
+
+    threads = [threading.Thread(target=update, args=(field,)) for field in ('progress', 'status') * 2]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert state_file.read() is not None
+    assert os.listdir(tmp_path) == ["job1.json"]
+
+
+def test_running_job_stops_at_its_next_round_when_cancelled(manager, dataset_path, tmp_path):
+    job_id = manager.submit(dataset_path, UNTIL_CANCELLED)
+    assert _wait_running(manager, job_id)['status'] == "running"
+
+    assert manager.cancel(job_id)['cancel_requested']
+
+    assert manager.future(job_id).result(timeout=60) == {'success': False, 'error': 'cancelled'}
+    state = _wait_finished(manager, job_id)
+    assert state['status'] == "cancelled" and 'result' not in state
+    assert manager.active_jobs() == []
+    # The half-trained version is discarded
+    assert ModelRegistry(str(tmp_path / "models" / "registry")).list_models() == []
+
+
+def test_queued_job_is_cancelled_before_it_starts(manager, dataset_path):
+    running = manager.submit(dataset_path, UNTIL_CANCELLED)
+    _wait_running(manager, running)
+    queued = manager.submit(dataset_path, dict(UNTIL_CANCELLED, n_estimators=5))
+    assert manager.status(queued)['status'] == "queued"
+
+    manager.cancel(queued)
+    manager.cancel(running)
+
+    for job_id in (running, queued):
+        assert _wait_finished(manager, job_id)['status'] == "cancelled"
+    assert 'started_at' not in manager.status(queued)
+    assert manager.active_jobs() == []
@@ -0,0 +1,45 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import training
+from app.services.data_processor import DataProcessor
+from app.services.model_registry import ModelRegistry
+from app.services.tuning import run_tuning
+
+
+@pytest.fixture
+def dataset_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(np.round(rng.normal(size=(1500, 6)), 3), columns=[f"F{i}" for i in range(6)])
+    df[df > 1.5] = np.nan
+    df['Response'] = (df['F0'].fillna(0) + rng.normal(size=1500) > 0).astype(int)
+    csv_path = str(tmp_path / "line.csv")
+    df.to_csv(csv_path, index=False)
+    processor = DataProcessor()
+    df, _ = processor.process_csv_file(csv_path)
+    return processor.save_processed_data(df, csv_path)
+
+
+def test_best_configuration_is_retrained_like_the_trials(dataset_path, tmp_path, monkeypatch):
+    # The trials train NaN-native whatever the service default is
+    monkeypatch.setattr(training, 'TRAINING_DATA_MODE', "dense")
+    result = run_tuning(dataset_path, {'n_trials': 2, 'parallel_trials': 1, 'search_space': {'n_estimators': [5, 10]},
+                                       'feature_selection': False}, str(tmp_path / "models"))
+
+    assert result['success'], result.get('error')
+    metadata = ModelRegistry(os.path.join(tmp_path, "models", "registry")).metadata(result['model_id'])
+    assert metadata['data_mode'] == "native"
+    assert joblib.load(metadata['scaler_path']) is None
+    assert result['tuning']['best_params']['n_estimators'] in range(5, 11)
+
+
+def test_dense_data_mode_is_rejected(dataset_path, tmp_path):
+    result = run_tuning(dataset_path, {'n_trials': 2, 'data_mode': "dense"}, str(tmp_path / "models"))
+
+    assert not result['success']
+    assert "data_mode" in result['error']